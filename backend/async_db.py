@@ -0,0 +1,69 @@
+"""
+Asynchroniczny dostęp do bazy (aiosqlite / asyncpg) dla najczęściej odpytywanych endpointów odczytu.
+
+Włączany przez ASYNC_DB=true - wtedy endpointy z async_routes.py zastępują swoje synchroniczne
+odpowiedniki, a zapytania nie zajmują wątków z puli Starlette. Zapisy nadal idą przez models.SessionLocal.
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import models
+
+ASYNC_DB = os.getenv("ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+# Sterowniki asynchroniczne dla dialektów z DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_engine = None
+_sessionmaker = None
+
+
+def make_async_engine(database_url: str = models.DATABASE_URL):
+    """Tworzy silnik asynchroniczny z tymi samymi ustawieniami co models.make_engine."""
+    url = make_url(database_url)
+    dialect = url.get_backend_name()
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"unsupported dialect: {dialect}")
+    url = url.set(drivername=ASYNC_DRIVERS[dialect])
+
+    if dialect == "sqlite":
+        engine = create_async_engine(url, connect_args={"timeout": models.SQLITE_BUSY_TIMEOUT_MS / 1000})
+        event.listen(engine.sync_engine, "connect", models.set_sqlite_pragmas)
+        return engine
+
+    # asyncpg nie rozumie parametru libpq sslmode - przekazywany jest jako argument ssl
+    query = dict(url.query)
+    sslmode = query.pop("sslmode", None)
+    connect_args = {"ssl": sslmode} if sslmode else {}
+    return create_async_engine(url.set(query=query), connect_args=connect_args, **models.pool_settings())
+
+
+def get_async_engine():
+    """Silnik tworzony jest leniwie, więc sterowniki async są potrzebne tylko przy ASYNC_DB=true."""
+    global _engine
+    if _engine is None:
+        _engine = make_async_engine()
+    return _engine
+
+
+def get_async_sessionmaker():
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(get_async_engine(), expire_on_commit=False)
+    return _sessionmaker
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose():
+    if _engine is not None:
+        await _engine.dispose()
@@ -0,0 +1,96 @@
+"""
+Asynchroniczne wersje najczęściej odpytywanych endpointów odczytu (ASYNC_DB=true, patrz async_db.py).
+
+Odpowiedzi mają te same schematy co synchroniczne endpointy w main.py. Relacje potrzebne
+w odpowiedzi są ładowane z góry (selectinload) - w trybie async nie ma leniwego doładowania.
+"""
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+import auth, models, response_cache, schemas, scoring, serialization, versions
+from async_db import get_async_db
+
+router = APIRouter()
+
+
+@router.get("/players", response_model=list[schemas.Player])
+async def get_all_players(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
+):
+    """Lista wszystkich aktywnych zawodników (z response_cache, jak w main.py)."""
+    key, body = await response_cache.lookup_async("players", (versions.STATS,))
+    if body is None:
+        body = serialization.dumps(await db.run_sync(serialization.active_players))
+        await response_cache.store_async(key, body)
+    return response_cache.json_response(body)
+
+
+@router.get("/me/team", response_model=list[schemas.Player])
+async def get_my_team(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
+):
+    """Zawodnicy w drużynie zalogowanego użytkownika."""
+    return (await db.scalars(
+        select(models.Player)
+        .join(models.user_player_association, models.user_player_association.c.player_id == models.Player.id)
+        .where(models.user_player_association.c.user_id == current_user.id)
+    )).all()
+
+
+@router.get("/leaderboard", response_model=list[schemas.User])
+async def get_leaderboard(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
+):
+    """Wszyscy użytkownicy posortowani malejąco po łącznej liczbie punktów fantasy (z response_cache)."""
+    key, body = await response_cache.lookup_async("leaderboard", (versions.STATS, versions.USERS))
+    if body is None:
+        body = serialization.dumps(await db.run_sync(serialization.leaderboard))
+        await response_cache.store_async(key, body)
+    return response_cache.json_response(body)
+
+
+@router.get("/leagues", response_model=List[schemas.League])
+async def get_user_leagues(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
+):
+    """Ligi użytkownika (wszystkie ligi dla administratora)."""
+    query = select(models.League).options(selectinload(models.League.users))
+    if current_user.role != "admin":
+        query = query.join(
+            models.user_league_association, models.user_league_association.c.league_id == models.League.id
+        ).where(models.user_league_association.c.user_id == current_user.id)
+    return (await db.scalars(query)).all()
+
+
+@router.get("/users/me/daily_fantasy_points", response_model=schemas.DailyFantasyPoints)
+async def get_user_daily_fantasy_points(
+    game_date: Optional[date] = Query(None, alias="date"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
+):
+    """Punkty fantasy drużyny z danego dnia (domyślnie z ostatniego dnia z meczami), według historii składów."""
+    if game_date is not None:
+        target_date = game_date.isoformat()
+    else:
+        target_date = await db.scalar(select(func.max(models.PlayerGameStats.game_date)))
+        if not target_date:
+            return schemas.DailyFantasyPoints(total_today_points=0.0, player_points_breakdown=[])
+
+    rows = (await db.execute(scoring.team_points_query(current_user.id, target_date))).all()
+
+    return schemas.DailyFantasyPoints(
+        total_today_points=sum(row.fantasy_points for row in rows),
+        player_points_breakdown=[
+            schemas.PlayerDailyPoints(player_name=row.full_name, points=row.fantasy_points)
+            for row in rows
+        ]
+    )
@@ -5,9 +5,16 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
 
-from sqlalchemy.orm import Session
-import models, schemas
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+import async_db, models, schemas, versions
 from models import get_db
 
 # Konfiguracja
@@ -16,9 +23,14 @@ import os  # Add this import at the top
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64"))
 
-# Kontekst do hashowania haseł
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Kontekst do hashowania haseł. Zmiana BCRYPT_ROUNDS powoduje przehashowanie hasła przy następnym logowaniu.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Schemat OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -31,6 +43,84 @@ def get_password_hash(password):
     """Haszuje hasło."""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """Weryfikuje hasło i zwraca (poprawne, nowy_hash), gdzie nowy_hash jest ustawiony, gdy zmienił się koszt bcrypt."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+class PasswordHashPool:
+    """
+    Ograniczona pula wątków dla operacji bcrypt, żeby logowania nie zajmowały
+    puli wątków obsługującej pozostałe endpointy. Przy przepełnionej kolejce
+    zwraca 503 zamiast odkładać kolejne żądania w nieskończoność.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait_seconds = 0.0
+        self._total_run_seconds = 0.0
+
+    def _timed(self, submitted_at, fn, *args):
+        started_at = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            finished_at = time.monotonic()
+            with self._lock:
+                self._completed += 1
+                self._total_wait_seconds += started_at - submitted_at
+                self._total_run_seconds += finished_at - started_at
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.queue_limit:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent login attempts, please retry.",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, time.monotonic(), fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self._in_flight,
+                "queued": max(self._in_flight - self.workers, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": 1000 * self._total_wait_seconds / self._completed if self._completed else 0.0,
+                "avg_run_ms": 1000 * self._total_run_seconds / self._completed if self._completed else 0.0,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+            }
+
+password_pool = PasswordHashPool(workers=PASSWORD_HASH_WORKERS, queue_limit=PASSWORD_HASH_QUEUE_LIMIT)
+
+async def get_password_hash_async(password):
+    """Haszuje hasło w puli password_pool."""
+    return await password_pool.run(get_password_hash, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    """Weryfikuje hasło w puli password_pool."""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    """Weryfikuje (i ewentualnie przehashowuje) hasło w puli password_pool."""
+    return await password_pool.run(verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Tworzy token dostępowy JWT."""
     to_encode = data.copy()
@@ -46,28 +136,138 @@ def get_user(db: Session, email: str):
     """Pobiera użytkownika z bazy danych po emailu."""
     return db.query(models.User).filter(models.User.email == email).first()
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+def create_user_token(user: models.User) -> str:
+    """Tworzy token JWT z id i rolą użytkownika w claimach (pozwala pominąć wyszukiwanie po emailu)."""
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "role": user.role},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+class UserCache:
     """
-    Zależność (dependency) do pobierania aktualnie zalogowanego użytkownika.
-    Dekoduje token, weryfikuje go i zwraca dane użytkownika.
+    Wątkowo bezpieczny cache LRU z TTL dla wierszy użytkowników, kluczowany id użytkownika.
+    Przechowuje odłączone (detached) kopie samych kolumn, które są dołączane do sesji
+    żądania przez Session.merge(load=False) - bez pobierania wiersza z bazy.
+
+    Każdy wpis pamięta wersje danych (versions.py), przy których został zapisany; wpis z innymi
+    wersjami jest chybieniem. Usunięcie użytkownika czy zmiana jego danych w dowolnym procesie
+    podbija wersje, więc pozostałe procesy nie korzystają dłużej ze starej kopii.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, data_versions=None) -> Optional[models.User]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, entry_versions, snapshot = entry
+            if expires_at < time.monotonic() or entry_versions != data_versions:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return snapshot
+
+    def put(self, user: models.User, data_versions=None):
+        snapshot = models.User(**{
+            column.key: getattr(user, column.key) for column in models.User.__table__.columns
+        })
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl_seconds, data_versions, snapshot)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache(max_size=USER_CACHE_MAX_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
+
+def user_cache_versions(user_id: int):
     """
-    credentials_exception = HTTPException(
+    Wersje danych, od których zależy kopia użytkownika w cache: USERS (usunięcia, profile),
+    STATS (suma punktów) i zakres samego użytkownika (hasło). Jedno zapytanie po kluczu głównym.
+    """
+    return versions.current_versions((versions.STATS, versions.USERS, versions.user_scope(user_id)))
+
+async def user_cache_versions_async(user_id: int):
+    return await versions.current_versions_async((versions.STATS, versions.USERS, versions.user_scope(user_id)))
+
+def credentials_error():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_access_token(token: str) -> schemas.TokenData:
+    """Dekoduje i weryfikuje token JWT; przy błędzie zgłasza 401."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-    
-    user = get_user(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception
+        raise credentials_error()
+    email: str = payload.get("sub")
+    if email is None:
+        raise credentials_error()
+    return schemas.TokenData(email=email, user_id=payload.get("uid"), role=payload.get("role"))
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    """
+    Zależność (dependency) do pobierania aktualnie zalogowanego użytkownika.
+    Dekoduje token, weryfikuje go i zwraca dane użytkownika.
+    """
+    token_data = decode_access_token(token)
+
+    if token_data.user_id is None:
+        # Starsze tokeny bez claimu "uid" - wyszukiwanie po emailu
+        user = get_user(db, email=token_data.email)
+        if user is None:
+            raise credentials_error()
+        return user
+
+    data_versions = user_cache_versions(token_data.user_id)
+    cached_user = user_cache.get(token_data.user_id, data_versions)
+    if cached_user is not None:
+        return db.merge(cached_user, load=False)
+
+    user = db.query(models.User).filter(models.User.id == token_data.user_id).first()
+    if user is None or user.email != token_data.email:
+        raise credentials_error()
+    user_cache.put(user, data_versions)
+    return user
+
+async def get_current_user_async(db: AsyncSession = Depends(async_db.get_async_db), token: str = Depends(oauth2_scheme)):
+    """
+    Odpowiednik get_current_user dla endpointów asynchronicznych (async_routes.py).
+    Przy trafieniu w cache zwraca odłączoną kopię wiersza - wystarcza do odczytu kolumn użytkownika.
+    """
+    token_data = decode_access_token(token)
+
+    if token_data.user_id is None:
+        user = await db.scalar(select(models.User).where(models.User.email == token_data.email))
+        if user is None:
+            raise credentials_error()
+        return user
+
+    data_versions = await user_cache_versions_async(token_data.user_id)
+    cached_user = user_cache.get(token_data.user_id, data_versions)
+    if cached_user is not None:
+        return cached_user
+
+    user = await db.get(models.User, token_data.user_id)
+    if user is None or user.email != token_data.email:
+        raise credentials_error()
+    user_cache.put(user, data_versions)
     return user
 
 def get_current_active_admin(current_user: models.User = Depends(get_current_user)):
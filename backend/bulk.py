@@ -0,0 +1,131 @@
+"""
+Zbiorczy zapis danych z ingestu: INSERT ... ON CONFLICT (SQLite i Postgres) w paczkach,
+zamiast pojedynczych db.add() / aktualizacji atrybutów wiersz po wierszu.
+"""
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Player, PlayerGameStats
+
+UPSERT_BATCH_SIZE = 500
+
+PLAYER_UPSERT_COLUMNS = ["full_name", "is_active", "team_name", "position"]
+
+
+def dialect_insert(db: Session, model):
+    """INSERT z obsługą ON CONFLICT dla dialektu sesji; inne dialekty zgłaszają ValueError."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    raise ValueError(f"unsupported dialect: {dialect}")
+
+
+def _batches(records, size=UPSERT_BATCH_SIZE):
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
+
+
+def upsert_players(db: Session, records):
+    """
+    Wstawia lub aktualizuje zawodników (klucz: players.id). Rekordy to słowniki
+    z kluczami id, full_name, is_active, team_name, position.
+    """
+    for batch in _batches(records):
+        stmt = dialect_insert(db, Player).values(batch)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[Player.id],
+            set_={column: stmt.excluded[column] for column in PLAYER_UPSERT_COLUMNS},
+        ))
+
+
+def insert_game_stats(db: Session, records):
+    """
+    Wstawia statystyki meczów, pomijając istniejące (ograniczenie _player_game_uc).
+    Zwraca listę faktycznie wstawionych wierszy (id, player_id, game_id, game_date, fantasy_points).
+    """
+    inserted = []
+    for batch in _batches(records):
+        stmt = dialect_insert(db, PlayerGameStats).values(batch).on_conflict_do_nothing(
+            index_elements=[PlayerGameStats.player_id, PlayerGameStats.game_id]
+        ).returning(
+            PlayerGameStats.id,
+            PlayerGameStats.player_id,
+            PlayerGameStats.game_id,
+            PlayerGameStats.game_date,
+            PlayerGameStats.fantasy_points,
+        )
+        inserted.extend(db.execute(stmt).all())
+    return inserted
+
+
+def apply_new_games(db: Session, new_games):
+    """
+    Aktualizuje agregaty zawodników (liczba meczów, suma i średnia FP, ostatni mecz)
+    na podstawie nowo wstawionych meczów - jedno zapytanie UPDATE (executemany)
+    bez ładowania historii meczów.
+    """
+    per_player = {}
+    for game in new_games:
+        entry = per_player.setdefault(game.player_id, {
+            "b_id": game.player_id, "b_games": 0, "b_points": 0.0,
+            "b_last_date": game.game_date, "b_last_fp": game.fantasy_points,
+        })
+        entry["b_games"] += 1
+        entry["b_points"] += game.fantasy_points
+        if game.game_date >= entry["b_last_date"]:
+            entry["b_last_date"] = game.game_date
+            entry["b_last_fp"] = game.fantasy_points
+    if not per_player:
+        return
+
+    players = Player.__table__
+    is_newer = (players.c.last_game_date.is_(None)) | (players.c.last_game_date <= bindparam("b_last_date"))
+    stmt = (
+        players.update()
+        .where(players.c.id == bindparam("b_id"))
+        .values(
+            games_played=players.c.games_played + bindparam("b_games"),
+            fantasy_points_sum=players.c.fantasy_points_sum + bindparam("b_points"),
+            average_fantasy_points=(players.c.fantasy_points_sum + bindparam("b_points"))
+            / (players.c.games_played + bindparam("b_games")),
+            last_game_fantasy_points=case((is_newer, bindparam("b_last_fp")), else_=players.c.last_game_fantasy_points),
+            last_game_date=case((is_newer, bindparam("b_last_date")), else_=players.c.last_game_date),
+        )
+    )
+    db.connection().execute(stmt, list(per_player.values()))
+
+
+def rebuild_player_aggregates(db: Session):
+    """Odbudowuje games_played / fantasy_points_sum / average_fantasy_points z pełnej historii meczów."""
+    games = select(func.count(PlayerGameStats.id)).where(PlayerGameStats.player_id == Player.id).scalar_subquery()
+    points = select(func.coalesce(func.sum(PlayerGameStats.fantasy_points), 0.0)).where(PlayerGameStats.player_id == Player.id).scalar_subquery()
+    db.execute(update(Player).values(games_played=games, fantasy_points_sum=points).execution_options(synchronize_session=False))
+    db.execute(
+        update(Player).values(
+            average_fantasy_points=case(
+                (Player.games_played > 0, Player.fantasy_points_sum / Player.games_played),
+                else_=0.0,
+            )
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def refresh_last_game_columns(db: Session):
+    """Uzupełnia last_game_fantasy_points / last_game_date z historii meczów (jedno zapytanie UPDATE)."""
+    latest_game = (
+        select(PlayerGameStats.game_date, PlayerGameStats.fantasy_points)
+        .where(PlayerGameStats.player_id == Player.id)
+        .order_by(PlayerGameStats.game_date.desc(), PlayerGameStats.id.desc())
+        .limit(1)
+        .correlate(Player)
+    )
+    result = db.execute(
+        update(Player).values(
+            last_game_date=latest_game.with_only_columns(PlayerGameStats.game_date).scalar_subquery(),
+            last_game_fantasy_points=latest_game.with_only_columns(PlayerGameStats.fantasy_points).scalar_subquery(),
+        ).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,147 @@
+"""
+Kolejka zadań administracyjnych wykonywanych w tle (np. pełna synchronizacja zawodników).
+
+API tylko zapisuje zadanie w tabeli jobs jako 'queued'. Wykonuje je proces harmonogramu
+(worker.py albo scheduler w API przy ENABLE_WEB_SCHEDULER) trzymający blokadę lidera -
+zadania nie giną przy restarcie procesu API i nie biegną równolegle z ingestem ani ze sobą.
+Przejęcie zadania to warunkowy UPDATE ('queued' -> 'running'), więc wykona je tylko jeden proces.
+"""
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+
+from models import Job, SessionLocal
+
+SYNC_PLAYERS = "sync_players"
+RESCORE = "rescore"
+
+
+class JobProgress:
+    """Zapisuje postęp i błędy zadania w jego wierszu w tabeli jobs."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.errors = []
+
+    def increment(self, **counters):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values({name: getattr(Job, name) + value for name, value in counters.items()})
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def error(self, message: str):
+        self.errors.append(message)
+
+
+def _set_status(job_id: str, **values):
+    db = SessionLocal()
+    try:
+        db.execute(update(Job).where(Job.id == job_id).values(**values))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_sync_players(progress: JobProgress):
+    from scripts.fetch_nba_players import sync_all_players_from_api, update_stats_for_active_players
+    # Synchronizacja na żądanie administratora ma pobrać aktualne dane, a nie nagrania z dyskowego cache
+    sync_all_players_from_api(progress=progress, refresh=True)
+    update_stats_for_active_players(progress=progress, refresh=True)
+
+
+def _run_rescore(progress: JobProgress):
+    from scripts.fetch_nba_players import rescore_all_games
+    rescore_all_games(progress=progress)
+
+
+JOB_HANDLERS = {
+    SYNC_PLAYERS: _run_sync_players,
+    RESCORE: _run_rescore,
+}
+
+
+def _run_job(job_id: str, kind: str):
+    progress = JobProgress(job_id)
+    try:
+        JOB_HANDLERS[kind](progress)
+    except Exception as e:
+        progress.error(str(e))
+    _set_status(
+        job_id,
+        status="failed" if progress.errors else "succeeded",
+        error="; ".join(progress.errors) or None,
+        finished_at=datetime.utcnow(),
+    )
+
+
+def enqueue(kind: str) -> str:
+    """Zapisuje nowe zadanie jako 'queued' (wykona je lider harmonogramu). Zwraca id zadania."""
+    job_id = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        db.add(Job(id=job_id, kind=kind, status="queued", created_at=datetime.utcnow()))
+        db.commit()
+    finally:
+        db.close()
+    return job_id
+
+
+def claim_next() -> Optional[Tuple[str, str]]:
+    """Przejmuje najstarsze zadanie 'queued' (ustawia 'running'). Zwraca (id, rodzaj) lub None, gdy kolejka jest pusta."""
+    db = SessionLocal()
+    try:
+        while True:
+            job = db.execute(
+                select(Job.id, Job.kind).where(Job.status == "queued").order_by(Job.created_at).limit(1)
+            ).first()
+            if job is None:
+                return None
+            claimed = db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == "queued")
+                .values(status="running", started_at=datetime.utcnow())
+            )
+            db.commit()
+            if claimed.rowcount == 1:
+                return job.id, job.kind
+            # Zadanie przejął w międzyczasie inny proces - następne w kolejce
+    finally:
+        db.close()
+
+
+def run_queued() -> int:
+    """Wykonuje po kolei wszystkie zadania z kolejki. Zwraca liczbę wykonanych zadań."""
+    count = 0
+    while True:
+        job = claim_next()
+        if job is None:
+            return count
+        _run_job(*job)
+        count += 1
+
+
+def fail_orphaned() -> int:
+    """
+    Oznacza jako 'failed' zadania 'running' - wywoływane przez nowego lidera, gdy poprzedni
+    (jedyny proces wykonujący zadania) przestał działać w trakcie zadania.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(Job)
+            .where(Job.status == "running")
+            .values(status="failed", error="Interrupted: the worker running this job stopped", finished_at=datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
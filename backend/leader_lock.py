@@ -0,0 +1,63 @@
+"""
+Blokada lidera oparta o tabelę scheduler_locks (działa na SQLite i Postgres).
+
+Przejęcie i odnowienie blokady to pojedynczy warunkowy UPDATE, więc spośród wielu
+procesów tylko jeden zostaje liderem; blokada wygasa po `ttl_seconds` bez odnowienia.
+"""
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+from models import SchedulerLock, SessionLocal
+
+
+class LeaderLock:
+    def __init__(self, name: str, ttl_seconds: float, owner: str = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self) -> bool:
+        """Przejmuje lub odnawia blokadę. Zwraca True, jeśli ten proces jest liderem."""
+        db = SessionLocal()
+        try:
+            now = time.time()
+            result = db.execute(
+                update(SchedulerLock)
+                .where(
+                    SchedulerLock.name == self.name,
+                    or_(SchedulerLock.owner == self.owner, SchedulerLock.expires_at < now),
+                )
+                .values(owner=self.owner, expires_at=now + self.ttl_seconds)
+            )
+            if result.rowcount == 1:
+                db.commit()
+                return True
+
+            db.add(SchedulerLock(name=self.name, owner=self.owner, expires_at=now + self.ttl_seconds))
+            try:
+                db.commit()
+                return True
+            except IntegrityError:
+                # Blokada istnieje i należy do innego, aktywnego procesu
+                db.rollback()
+                return False
+        finally:
+            db.close()
+
+    def release(self):
+        """Zwalnia blokadę, jeśli należy do tego procesu."""
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(SchedulerLock)
+                .where(SchedulerLock.name == self.name, SchedulerLock.owner == self.owner)
+                .values(expires_at=0.0)
+            )
+            db.commit()
+        finally:
+            db.close()
@@ -0,0 +1,203 @@
+"""
+Kanał na żywo (Server-Sent Events) z punktami dnia i pozycją w rankingu - zamiast odpytywania
+/users/me/daily_fantasy_points i /leaderboard w czasie meczów.
+
+Każdy proces API ma własnego brokera (pub/sub w pamięci, jedna kolejka na połączenie) i obserwatora,
+który co LIVE_POLL_SECONDS sprawdza liczniki wersji danych (versions.py). Ingest podbija je w dowolnym
+procesie (worker, CLI, zadania w tle), więc po zmianie obserwator jednym zapytaniem na wszystkich
+subskrybentów liczy nowy stan i publikuje różnice:
+- event "points" - punkty drużyny z ostatniego dnia z meczami i zmiana od poprzedniego stanu,
+- event "rank" - nowa pozycja w rankingu ogólnym.
+Po połączeniu klient dostaje event "snapshot" z bieżącym stanem. Bez subskrybentów obserwator nie pyta bazy.
+"""
+import asyncio
+import os
+from collections import defaultdict
+from typing import Dict, Iterable
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+
+import auth, scoring, versions
+from models import PlayerGameStats, SessionLocal, User
+
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "5"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+
+# Zmiana rankingu może wynikać z ingestu (STATS) albo z nowych/usuniętych kont (USERS)
+WATCHED_SCOPES = (versions.STATS, versions.USERS)
+
+# Limit parametrów w klauzuli IN przy liczeniu stanu subskrybentów
+SNAPSHOT_BATCH_SIZE = 500
+
+
+class Broker:
+    """Pub/sub w pamięci procesu. Używany tylko z pętli zdarzeń, więc bez blokad."""
+
+    def __init__(self, queue_size: int = LIVE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def user_ids(self):
+        return list(self._subscribers)
+
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, user_id: int, event: str, data: dict):
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                # Wolny klient: najstarsze zdarzenie wypada, nowsze niesie aktualny stan
+                queue.get_nowait()
+            queue.put_nowait((event, data))
+
+
+def compute_states(user_ids: Iterable[int]) -> Dict[int, dict]:
+    """Stan subskrybentów: punkty z ostatniego dnia z meczami, suma punktów i pozycja w rankingu."""
+    user_ids = list(user_ids)
+    with SessionLocal() as db:
+        game_date = db.scalar(select(func.max(PlayerGameStats.game_date)))
+        ranked = select(
+            User.id,
+            User.total_fantasy_points,
+            func.rank().over(order_by=User.total_fantasy_points.desc()).label("rank"),
+        ).subquery()
+        states = {}
+        for start in range(0, len(user_ids), SNAPSHOT_BATCH_SIZE):
+            batch = user_ids[start:start + SNAPSHOT_BATCH_SIZE]
+            daily = scoring.team_totals_on(db, batch, game_date) if game_date else {}
+            for user_id, total, rank in db.execute(select(ranked).where(ranked.c.id.in_(batch))):
+                states[user_id] = {
+                    "date": game_date,
+                    "points": daily.get(user_id, 0.0),
+                    "total_fantasy_points": total,
+                    "rank": rank,
+                }
+    return states
+
+
+def diff_events(previous: dict, current: dict):
+    """Zdarzenia do wysłania po zmianie stanu użytkownika."""
+    events = []
+    if current["date"] != previous["date"] or current["points"] != previous["points"]:
+        # Nowy dzień z meczami liczy się od zera
+        base = previous["points"] if current["date"] == previous["date"] else 0.0
+        events.append(("points", {
+            "date": current["date"],
+            "points": current["points"],
+            "delta": round(current["points"] - base, 2),
+            "total_fantasy_points": current["total_fantasy_points"],
+        }))
+    if current["rank"] != previous["rank"]:
+        events.append(("rank", {
+            "rank": current["rank"],
+            "previous_rank": previous["rank"],
+            "total_fantasy_points": current["total_fantasy_points"],
+        }))
+    return events
+
+
+class Watcher:
+    """Obserwuje liczniki wersji i publikuje zmiany stanu subskrybentów w brokerze."""
+
+    def __init__(self, broker: Broker, poll_seconds: float = LIVE_POLL_SECONDS):
+        self.broker = broker
+        self.poll_seconds = poll_seconds
+        self.states: Dict[int, dict] = {}
+        self._versions = None
+        self._task = None
+
+    def start(self):
+        """Uruchamia obserwatora przy pierwszej subskrypcji (w pętli zdarzeń bieżącego procesu)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.poll()
+            except Exception as exc:
+                # Błąd bazy nie może zatrzymać kanału - kolejna próba przy następnym odpytaniu
+                print(f"Live feed poll failed: {exc}")
+
+    async def poll(self):
+        user_ids = self.broker.user_ids()
+        # Stany rozłączonych użytkowników nie są już potrzebne
+        for user_id in set(self.states) - set(user_ids):
+            del self.states[user_id]
+        if not user_ids:
+            return
+        current_versions = await versions.current_versions_async(WATCHED_SCOPES)
+        if current_versions == self._versions:
+            return
+        self._versions = current_versions
+        current = await run_in_threadpool(compute_states, user_ids)
+        for user_id, state in current.items():
+            previous = self.states.get(user_id)
+            self.states[user_id] = state
+            if previous is None:
+                continue
+            for event, data in diff_events(previous, state):
+                self.broker.publish(user_id, event, data)
+
+
+broker = Broker()
+watcher = Watcher(broker)
+
+
+def authenticate(token: str) -> int:
+    """Id użytkownika z tokenu (ta sama weryfikacja co auth.get_current_user); przy błędzie 401."""
+    if not token:
+        raise auth.credentials_error()
+    with SessionLocal() as db:
+        return auth.get_current_user(db, token).id
+
+
+def format_event(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def event_stream(request, user_id: int):
+    """Strumień SSE jednego połączenia: snapshot, potem zdarzenia z brokera i komentarze podtrzymujące."""
+    queue = broker.subscribe(user_id)
+    watcher.start()
+    try:
+        state = (await run_in_threadpool(compute_states, [user_id])).get(user_id)
+        if state is not None:
+            # Zmiany od tej chwili liczone są względem stanu wysłanego klientowi
+            watcher.states.setdefault(user_id, state)
+            yield format_event("snapshot", state)
+        while not await request.is_disconnected():
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield format_event(event, data)
+    finally:
+        broker.unsubscribe(user_id, queue)
@@ -1,17 +1,20 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
 from sqlalchemy.orm import Session, joinedload
-from datetime import timedelta, datetime # Added datetime for daily points
-from sqlalchemy import func # Added for func.max in daily fantasy points endpoint
-from typing import List # Added for List type hint
+from datetime import date
+from sqlalchemy import func, or_, and_ # Added for func.max in daily fantasy points endpoint
+from typing import List, Optional # Added for List type hint
+import base64
+import json
 import secrets # Added for invite code generation
 import string # Added for invite code generation
 from apscheduler.schedulers.background import BackgroundScheduler
-from scripts.fetch_nba_players import update_stats_for_active_players
-import atexit
 
-import auth, models, schemas
+import async_db, auth, jobs, live, models, response_cache, schemas, scoring, serialization, standings, versions
 from models import get_db, create_tables
 
 app = FastAPI()
@@ -20,7 +23,43 @@ app = FastAPI()
 def startup_event():
     create_tables()
 
+def token_user_id(request: Request) -> Optional[int]:
+    """Id użytkownika z tokenu Bearer (bez zapytania do bazy); None, gdy tokenu brak lub jest niepoprawny."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return auth.decode_access_token(token).user_id
+    except HTTPException:
+        return None
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """
+    ETag i If-None-Match dla endpointów z versions.ENDPOINT_SCOPES. ETag liczony jest z liczników
+    wersji danych, więc niezmienione dane dają 304 bez uruchamiania endpointu (bez ORM i serializacji).
+    """
+    scopes = versions.ENDPOINT_SCOPES.get(request.url.path)
+    if request.method != "GET" or scopes is None:
+        return await call_next(request)
+    user_id = token_user_id(request)
+    if user_id is None:
+        # Brak poprawnego tokenu (lub starszy token bez "uid") - endpoint sam zwróci błąd autoryzacji
+        return await call_next(request)
+
+    etag = await versions.compute_etag_async(request.url.path, request.url.query, user_id, scopes)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]
+    if etag in if_none_match or "*" in if_none_match:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == status.HTTP_200_OK:
+        response.headers.update(headers)
+    return response
+
 # TODO: Skonfigurować CORS prawidłowo dla frontendu
+# (CORS dodany po conditional_get jest zewnętrzną warstwą, więc nagłówki CORS trafiają też do odpowiedzi 304)
 import os  # Add at top
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -37,52 +76,70 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
 @app.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    """Endpoint do rejestracji nowego użytkownika."""
-    db_user = auth.get_user(db, email=user.email)
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    if user.nickname: # Check only if nickname is provided
-        db_nickname_user = db.query(models.User).filter(models.User.nickname == user.nickname).first()
-        if db_nickname_user:
-            raise HTTPException(status_code=400, detail="Nickname already registered")
-
-    # Check if this is the first user
-    is_first_user = db.query(models.User).count() == 0
-    user_role = "admin" if is_first_user else "user"
-
-    hashed_password = auth.get_password_hash(user.password)
-    db_user = models.User(
-        email=user.email,
-        nickname=user.nickname, # Save the nickname
-        hashed_password=hashed_password,
-        role=user_role
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    """Endpoint do rejestracji nowego użytkownika. Hashowanie hasła odbywa się w puli auth.password_pool."""
+    def validate_and_pick_role():
+        db_user = auth.get_user(db, email=user.email)
+        if db_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+        if user.nickname: # Check only if nickname is provided
+            db_nickname_user = db.query(models.User).filter(models.User.nickname == user.nickname).first()
+            if db_nickname_user:
+                raise HTTPException(status_code=400, detail="Nickname already registered")
+
+        # Check if this is the first user
+        is_first_user = db.query(models.User).count() == 0
+        return "admin" if is_first_user else "user"
+
+    def save_user(hashed_password: str):
+        db_user = models.User(
+            email=user.email,
+            nickname=user.nickname, # Save the nickname
+            hashed_password=hashed_password,
+            role=user_role
+        )
+        db.add(db_user)
+        versions.bump(db, versions.USERS)
+        db.commit()
+        db.refresh(db_user)
+        # Load relationships here so response serialisation doesn't query from the event loop
+        db.refresh(db_user, attribute_names=["players", "leagues"])
+        return db_user
+
+    user_role = await run_in_threadpool(validate_and_pick_role)
+    hashed_password = await auth.get_password_hash_async(user.password)
+    return await run_in_threadpool(save_user, hashed_password)
 
 @app.post("/login", response_model=schemas.Token)
-def login_for_access_token(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    """Endpoint do logowania i uzyskiwania tokena JWT."""
-    user = auth.get_user(db, email=user_credentials.email)
-    if not user or not auth.verify_password(user_credentials.password, user.hashed_password):
+async def login_for_access_token(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+    """Endpoint do logowania i uzyskiwania tokena JWT. Weryfikacja bcrypt odbywa się w puli auth.password_pool."""
+    user = await run_in_threadpool(auth.get_user, db, user_credentials.email)
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await auth.verify_and_update_password_async(user_credentials.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+
+    access_token = auth.create_user_token(user)
+    if new_hash:
+        # Koszt bcrypt zmienił się od czasu zapisania hasła - zapisujemy nowy hash
+        def save_new_hash():
+            user.hashed_password = new_hash
+            versions.bump(db, versions.user_scope(user.id))
+            db.commit()
+
+        await run_in_threadpool(save_new_hash)
+        auth.user_cache.invalidate(user.id)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/")
@@ -116,60 +173,51 @@ def update_user_profile(
             raise HTTPException(status_code=400, detail="Nickname already registered")
         
         current_user.nickname = user_update.nickname
+        versions.bump(db, versions.USERS)
     
     db.commit()
+    auth.user_cache.invalidate(current_user.id)
     db.refresh(current_user)
     return current_user
 
 @app.get("/users/me/daily_fantasy_points", response_model=schemas.DailyFantasyPoints)
 def get_user_daily_fantasy_points(
+    game_date: Optional[date] = Query(None, alias="date"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Pobiera łączne punkty fantasy użytkownika z dzisiaj oraz punkty poszczególnych graczy."""
-    # Find the most recent game date for which data exists for any player in the user's team
-    # This assumes PlayerGameStats are populated by the scheduler for past games
-    most_recent_game_date = db.query(
-        func.max(models.PlayerGameStats.game_date)
-    ).scalar()
-
-    if not most_recent_game_date:
-        # No game stats available yet
-        return schemas.DailyFantasyPoints(
-            total_today_points=0.0,
-            player_points_breakdown=[]
-        )
-
-    total_daily_points = 0.0
-    player_points_breakdown = []
+    """
+    Pobiera łączne punkty fantasy użytkownika z danego dnia (domyślnie z ostatniego dnia z meczami)
+    oraz punkty poszczególnych graczy. Liczą się zawodnicy, którzy byli w drużynie w tym dniu
+    (historia składów) - jedno zapytanie po indeksach roster_memberships i player_game_stats.
+    """
+    if game_date is not None:
+        target_date = game_date.isoformat()
+    else:
+        # Most recent day with any ingested games (index on game_date)
+        target_date = db.query(func.max(models.PlayerGameStats.game_date)).scalar()
+        if not target_date:
+            return schemas.DailyFantasyPoints(total_today_points=0.0, player_points_breakdown=[])
 
-    for player_in_team in current_user.players:
-        player_stats = db.query(models.PlayerGameStats).filter(
-            models.PlayerGameStats.player_id == player_in_team.id,
-            models.PlayerGameStats.game_date == most_recent_game_date
-        ).first()
+    rows = scoring.team_points_on(db, current_user.id, target_date)
 
-        if player_stats:
-            total_daily_points += player_stats.fantasy_points
-            player_points_breakdown.append({
-                "player_name": player_in_team.full_name,
-                "points": player_stats.fantasy_points
-            })
-    
     return schemas.DailyFantasyPoints(
-        total_today_points=total_daily_points,
-        player_points_breakdown=player_points_breakdown
+        total_today_points=sum(row.fantasy_points for row in rows),
+        player_points_breakdown=[
+            schemas.PlayerDailyPoints(player_name=row.full_name, points=row.fantasy_points)
+            for row in rows
+        ]
     )
 
 @app.put("/users/me/change-password", status_code=status.HTTP_204_NO_CONTENT)
-def change_current_user_password(
+async def change_current_user_password(
     passwords: schemas.ChangePassword,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Pozwala zalogowanemu użytkownikowi na zmianę własnego hasła."""
+    """Pozwala zalogowanemu użytkownikowi na zmianę własnego hasła. Operacje bcrypt odbywają się w puli auth.password_pool."""
     # Weryfikacja obecnego hasła
-    if not auth.verify_password(passwords.current_password, current_user.hashed_password):
+    if not await auth.verify_password_async(passwords.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect current password.")
 
     # Sprawdzenie, czy nowe hasła się zgadzają
@@ -181,12 +229,34 @@ def change_current_user_password(
         raise HTTPException(status_code=400, detail="New password must be at least 8 characters long.")
 
     # Hashowanie i aktualizacja hasła
-    current_user.hashed_password = auth.get_password_hash(passwords.new_password)
-    db.commit()
+    hashed_password = await auth.get_password_hash_async(passwords.new_password)
+
+    def save_password():
+        current_user.hashed_password = hashed_password
+        versions.bump(db, versions.user_scope(current_user.id))
+        db.commit()
+
+    await run_in_threadpool(save_password)
+    auth.user_cache.invalidate(current_user.id)
 
     return
 
 # --- League Endpoints ---
+LEADERBOARD_MAX_LIMIT = 100
+
+def ensure_league_member(db: Session, league_id: int, current_user: models.User):
+    """Sprawdza, czy liga istnieje i czy użytkownik (lub administrator) ma do niej dostęp."""
+    if not db.query(models.League.id).filter(models.League.id == league_id).first():
+        raise HTTPException(status_code=404, detail="League not found")
+    if current_user.role == "admin":
+        return
+    is_member = db.query(models.user_league_association.c.user_id).filter(
+        models.user_league_association.c.league_id == league_id,
+        models.user_league_association.c.user_id == current_user.id
+    ).first()
+    if not is_member:
+        raise HTTPException(status_code=403, detail="Not a member of this league")
+
 def generate_invite_code(length=8):
     characters = string.ascii_letters + string.digits
     return ''.join(secrets.choice(characters) for i in range(length))
@@ -219,6 +289,8 @@ def create_league(
 
     # Add current user (owner) as a member of the league
     current_user.leagues.append(db_league)
+    standings.add_member(db, db_league.id, current_user)
+    versions.bump(db, versions.USERS)
     db.commit()
     db.refresh(current_user) # Refresh user to include new league relationship
     
@@ -254,6 +326,42 @@ def get_league_details(
     
     return league
 
+@app.get("/leagues/{league_id}/standings", response_model=schemas.Leaderboard)
+def get_league_standings(
+    league_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Pobiera stronę zmaterializowanej tabeli ligowej (odczyt po indeksie league_id, rank)."""
+    ensure_league_member(db, league_id, current_user)
+
+    total = db.query(func.count(models.LeagueStanding.user_id)).filter(
+        models.LeagueStanding.league_id == league_id
+    ).scalar()
+    rows = db.query(
+        models.LeagueStanding.rank,
+        models.LeagueStanding.user_id,
+        models.LeagueStanding.points,
+        models.User.nickname,
+    ).join(models.User, models.User.id == models.LeagueStanding.user_id).filter(
+        models.LeagueStanding.league_id == league_id
+    ).order_by(models.LeagueStanding.rank, models.LeagueStanding.user_id).offset(offset).limit(limit).all()
+
+    return schemas.Leaderboard(
+        total=total,
+        entries=[
+            schemas.LeaderboardEntry(
+                rank=row.rank,
+                user_id=row.user_id,
+                nickname=row.nickname,
+                total_fantasy_points=row.points,
+            )
+            for row in rows
+        ],
+    )
+
 @app.post("/leagues/join/{invite_code}", response_model=schemas.League)
 def join_league(
     invite_code: str,
@@ -270,6 +378,8 @@ def join_league(
         raise HTTPException(status_code=400, detail="Already a member of this league")
     
     current_user.leagues.append(league)
+    standings.add_member(db, league.id, current_user)
+    versions.bump(db, versions.USERS)
     db.commit()
     db.refresh(current_user) # Refresh user to include new league relationship
     
@@ -290,7 +400,9 @@ def delete_league(
     if league.owner_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to delete this league")
     
+    standings.remove_league(db, league.id)
     db.delete(league)
+    versions.bump(db, versions.USERS)
     db.commit()
     return
 
@@ -308,6 +420,7 @@ def create_player(
     """
     db_player = models.Player(**player.dict())
     db.add(db_player)
+    versions.bump(db, versions.STATS)
     db.commit()
     db.refresh(db_player)
     return db_player
@@ -319,11 +432,124 @@ def get_all_players(
 ):
     """
     Endpoint do pobierania listy wszystkich zawodników.
-    Dostępny dla każdego zalogowanego użytkownika.
+    Dostępny dla każdego zalogowanego użytkownika. Odpowiedź jest taka sama dla wszystkich,
+    więc trafia do response_cache jako gotowy JSON (do następnej zmiany wersji statystyk).
     """
-    
-    players = db.query(models.Player).options(joinedload(models.Player.game_stats)).filter(models.Player.is_active == True).all()
-    return players
+    key, body = response_cache.lookup("players", (versions.STATS,))
+    if body is None:
+        body = serialization.dumps(serialization.active_players(db))
+        response_cache.store(key, body)
+    return response_cache.json_response(body)
+
+PLAYERS_PAGE_MAX_LIMIT = 100
+
+def encode_cursor(sort_by: str, direction: str, sort_value, player_id: int) -> str:
+    """
+    Koduje pozycję ostatniego zwróconego wiersza (wartość sortowania + id) w nieprzezroczysty kursor.
+    Kursor pamięta też sortowanie, z którym powstał - nie da się go użyć z innym.
+    """
+    raw = json.dumps([sort_by, direction, sort_value, player_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str, sort_by: str, direction: str, value_type):
+    """
+    Dekoduje kursor wygenerowany przez encode_cursor dla danego sortowania. Uszkodzony kursor, kursor
+    z innego sortowania albo wartość innego typu niż kolumna sortowania dają 400 (nie błąd zapytania).
+    """
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(decoded, list) or len(decoded) != 4:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    cursor_sort_by, cursor_direction, sort_value, player_id = decoded
+    if cursor_sort_by != sort_by or cursor_direction != direction:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    # bool jest podklasą int, ale nie jest poprawną wartością żadnej kolumny sortowania
+    if isinstance(sort_value, bool) or not isinstance(sort_value, value_type):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if isinstance(player_id, bool) or not isinstance(player_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, player_id
+
+@app.get("/players/catalogue", response_model=schemas.PlayerPage)
+def get_players_page(
+    limit: int = Query(50, ge=1, le=PLAYERS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    position: Optional[str] = None,
+    team: Optional[str] = None,
+    name: Optional[str] = None,
+    sort_by: str = Query("average", pattern="^(average|last_game|name)$"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Stronicowany (keyset) katalog aktywnych zawodników z filtrowaniem i sortowaniem po stronie bazy.
+    Czyta wyłącznie tabelę players - punkty z ostatniego meczu są zdenormalizowaną kolumną.
+    """
+
+    # value_type: typ wartości sortowania, którego decode_cursor wymaga w kursorze
+    if sort_by == "name":
+        sort_key = models.Player.full_name
+        descending = False
+        value_type = str
+    elif sort_by == "last_game":
+        # Zawodnicy bez meczu lądują na końcu listy
+        sort_key = models.PLAYER_LAST_GAME_SORT_KEY
+        descending = True
+        value_type = (int, float)
+    else:
+        sort_key = models.PLAYER_AVERAGE_SORT_KEY
+        descending = True
+        value_type = (int, float)
+    direction = "desc" if descending else "asc"
+
+    query = db.query(
+        models.Player.id,
+        models.Player.full_name,
+        models.Player.position,
+        models.Player.team_name,
+        models.Player.average_fantasy_points,
+        models.Player.last_game_fantasy_points,
+        sort_key.label("sort_value"),
+    ).filter(models.Player.is_active == True)
+
+    if position:
+        query = query.filter(models.Player.position == position)
+    if team:
+        query = query.filter(models.Player.team_name == team)
+    if name:
+        query = query.filter(func.lower(models.Player.full_name).startswith(name.lower(), autoescape=True))
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_by, direction, value_type)
+        if descending:
+            query = query.filter(or_(sort_key < last_value, and_(sort_key == last_value, models.Player.id > last_id)))
+        else:
+            query = query.filter(or_(sort_key > last_value, and_(sort_key == last_value, models.Player.id > last_id)))
+
+    query = query.order_by(sort_key.desc() if descending else sort_key.asc(), models.Player.id.asc())
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_by, direction, rows[-1].sort_value, rows[-1].id)
+
+    return schemas.PlayerPage(
+        items=[
+            schemas.Player(
+                id=row.id,
+                full_name=row.full_name,
+                position=row.position,
+                team_name=row.team_name,
+                average_fantasy_points=row.average_fantasy_points or 0.0,
+                last_game_fantasy_points=row.last_game_fantasy_points,
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
 
 # Endpointy do zarządzania drużyną użytkownika
 
@@ -335,7 +561,10 @@ def get_my_team(
     """
     Pobiera listę zawodników w drużynie aktualnie zalogowanego użytkownika.
     """
-    return db.query(models.User).options(joinedload(models.User.players).joinedload(models.Player.game_stats)).filter(models.User.id == current_user.id).first().players
+    return db.query(models.Player).join(
+        models.user_player_association,
+        models.user_player_association.c.player_id == models.Player.id
+    ).filter(models.user_player_association.c.user_id == current_user.id).all()
 
 MAX_TOTAL_PLAYERS = 10
 MAX_POSITIONS = {
@@ -442,6 +671,8 @@ def add_player_to_team(
 
     # Dodanie zawodnika do drużyny
     current_user.players.append(player)
+    scoring.record_player_added(db, current_user.id, player.id)
+    versions.bump(db, versions.USERS, versions.user_scope(current_user.id))
     db.commit()
     db.refresh(player)
     return player
@@ -470,6 +701,8 @@ def remove_player_from_team(
 
     # Usunięcie zawodnika z drużyny
     current_user.players.remove(player)
+    scoring.record_player_removed(db, current_user.id, player.id)
+    versions.bump(db, versions.USERS, versions.user_scope(current_user.id))
     db.commit()
     return
 
@@ -481,10 +714,92 @@ def get_leaderboard(
 ):
     """
     Returns a list of all users sorted by their total fantasy points in descending order.
-    Accessible to any authenticated user.
+    Accessible to any authenticated user. Served from response_cache until stats or users change.
+    """
+    key, body = response_cache.lookup("leaderboard", (versions.STATS, versions.USERS))
+    if body is None:
+        body = serialization.dumps(serialization.leaderboard(db))
+        response_cache.store(key, body)
+    return response_cache.json_response(body)
+
+@app.get("/leaderboard/ranking", response_model=schemas.Leaderboard)
+def get_leaderboard_ranking(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    league_id: Optional[int] = None,
+    around_me: Optional[int] = Query(None, ge=0, le=LEADERBOARD_MAX_LIMIT // 2),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Lekki ranking: tylko pozycja, nick i punkty. Pozycje liczone funkcją okna w bazie,
+    z opcjonalnym zawężeniem do ligi oraz oknem `around_me` (N pozycji nad i pod użytkownikiem).
+    """
+    # Wszystkie okna w kolejności indeksu ix_users_total_points - puste OVER () wymusiłoby sortowanie tabeli
+    ranking_order = (models.User.total_fantasy_points.desc(), models.User.id)
+    ranked = db.query(
+        models.User.id.label("user_id"),
+        models.User.nickname,
+        models.User.total_fantasy_points,
+        func.rank().over(order_by=models.User.total_fantasy_points.desc()).label("rank"),
+        func.row_number().over(order_by=ranking_order).label("position"),
+        func.count().over(order_by=ranking_order, rows=(None, None)).label("total"),
+    )
+    if league_id is not None:
+        ensure_league_member(db, league_id, current_user)
+        ranked = ranked.join(
+            models.user_league_association,
+            models.user_league_association.c.user_id == models.User.id
+        ).filter(models.user_league_association.c.league_id == league_id)
+    ranked = ranked.subquery()
+
+    query = db.query(ranked)
+    if around_me is not None:
+        my_position = db.query(ranked.c.position).filter(ranked.c.user_id == current_user.id).scalar_subquery()
+        query = query.filter(ranked.c.position.between(my_position - around_me, my_position + around_me))
+    else:
+        query = query.filter(ranked.c.position > offset, ranked.c.position <= offset + limit)
+
+    rows = query.order_by(ranked.c.position).all()
+    # Poza zakresem (np. offset za ostatnią pozycją) wiersz z całkowitą liczbą nie istnieje - osobne zliczenie
+    total = rows[0].total if rows else db.query(func.count()).select_from(ranked).scalar()
+    return schemas.Leaderboard(
+        total=total,
+        entries=[
+            schemas.LeaderboardEntry(
+                rank=row.rank,
+                user_id=row.user_id,
+                nickname=row.nickname,
+                total_fantasy_points=row.total_fantasy_points,
+            )
+            for row in rows
+        ],
+    )
+
+# --- Live Feed ---
+
+@app.get("/live/feed")
+async def live_feed(request: Request, token: Optional[str] = Query(None)):
+    """
+    Kanał Server-Sent Events z punktami dnia i pozycją w rankingu (szczegóły w live.py).
+    EventSource w przeglądarce nie wysyła nagłówków, więc token JWT można podać w parametrze `token`
+    (albo jak zwykle w nagłówku Authorization).
     """
-    users = db.query(models.User).order_by(models.User.total_fantasy_points.desc()).all()
-    return users
+    if token is None:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer":
+            token = None
+    user_id = await run_in_threadpool(live.authenticate, token)
+    return StreamingResponse(
+        live.event_stream(request, user_id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: proxy (nginx) nie może buforować strumienia
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.on_event("shutdown")
+async def stop_live_watcher():
+    await live.watcher.stop()
 
 # --- Admin Endpoints ---
 
@@ -516,65 +831,149 @@ def admin_delete_user(
             detail="User not found."
         )
         
+    standings.remove_user(db, user_to_delete.id)
+    db.query(models.RosterMembership).filter(models.RosterMembership.user_id == user_to_delete.id).delete(synchronize_session=False)
     db.delete(user_to_delete)
+    versions.bump(db, versions.USERS)
     db.commit()
+    auth.user_cache.invalidate(user_id)
     return
 
 @app.put("/admin/users/{user_id}/reset-password", response_model=schemas.User)
-def admin_reset_user_password(
+async def admin_reset_user_password(
     user_id: int,
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(auth.get_current_active_admin)
 ):
-    """[Admin only] Resetuje hasło użytkownika do wartości domyślnej."""
-    user_to_reset = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user_to_reset:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found."
-        )
-    
+    """[Admin only] Resetuje hasło użytkownika do wartości domyślnej. Hashowanie odbywa się w puli auth.password_pool."""
+    def load_user():
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found."
+            )
+        return user
+
+    def save_password(hashed_password: str):
+        user_to_reset.hashed_password = hashed_password
+        versions.bump(db, versions.user_scope(user_to_reset.id))
+        db.commit()
+        # Odpowiedź budowana tutaj, żeby relacje (drużyna, ligi) nie były doładowywane z pętli zdarzeń
+        return schemas.User.model_validate(user_to_reset)
+
+    user_to_reset = await run_in_threadpool(load_user)
     # Ustawienie nowego, zahashowanego hasła. W praktyce można by wygenerować losowe.
     new_password = "newpassword" # Hasło domyślne
-    user_to_reset.hashed_password = auth.get_password_hash(new_password)
-    db.commit()
-    db.refresh(user_to_reset)
-    return user_to_reset
+    response = await run_in_threadpool(save_password, await auth.get_password_hash_async(new_password))
+    auth.user_cache.invalidate(user_to_reset.id)
+    return response
 
 
-@app.post("/admin/sync-players", status_code=status.HTTP_200_OK)
-async def sync_players_data(
+@app.get("/admin/metrics/password-pool")
+def admin_password_pool_metrics(
     current_admin: models.User = Depends(auth.get_current_active_admin)
 ):
-    """[Admin only] Triggers a full sync of NBA players and updates their stats."""
-    print("Manual sync triggered by admin.")
-    from scripts.fetch_nba_players import sync_all_players_from_api
-    sync_all_players_from_api()
-    update_stats_for_active_players()
-    return {"message": "Player data sync initiated. Check server logs for progress."}
+    """[Admin only] Zwraca statystyki kolejki hashowania haseł (głębokość kolejki, czasy oczekiwania)."""
+    return auth.password_pool.stats()
 
+@app.get("/admin/metrics/response-cache")
+def admin_response_cache_metrics(
+    current_admin: models.User = Depends(auth.get_current_active_admin)
+):
+    """[Admin only] Zwraca statystyki cache odpowiedzi (backend, trafienia, chybienia)."""
+    return response_cache.stats.snapshot()
 
-# --- Scheduler Logic ---
+@app.get("/admin/metrics/live-feed")
+def admin_live_feed_metrics(
+    current_admin: models.User = Depends(auth.get_current_active_admin)
+):
+    """[Admin only] Liczba otwartych połączeń kanału na żywo w tym procesie."""
+    return {"connections": live.broker.connection_count(), "users": len(live.broker.user_ids())}
 
-def run_stats_update():
-    """
-    A wrapper function for the scheduled job to ensure logging and error handling.
-    """
-    print("Scheduler: Triggered stats update job...")
+
+@app.post("/admin/sync-players", status_code=status.HTTP_202_ACCEPTED)
+def sync_players_data(
+    current_admin: models.User = Depends(auth.get_current_active_admin)
+):
+    """[Admin only] Queues a full sync of NBA players and their stats (run by the scheduler leader, see jobs.py)."""
+    print("Manual sync triggered by admin.")
+    job_id = jobs.enqueue(jobs.SYNC_PLAYERS)
+    return {"message": "Player data sync queued.", "job_id": job_id}
+
+@app.get("/scoring-rules", response_model=schemas.ScoringRules)
+def get_scoring_rules(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Zwraca aktualne wagi kategorii statystycznych w punktacji fantasy (dla zalogowanych, jak pozostałe dane gry)."""
+    return schemas.ScoringRules(rules=scoring.load_scoring_rules(db))
+
+@app.put("/admin/scoring-rules", status_code=status.HTTP_202_ACCEPTED)
+def update_scoring_rules(
+    rules_update: schemas.ScoringRules,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(auth.get_current_active_admin)
+):
+    """[Admin only] Zmienia wagi kategorii i kolejkuje przeliczenie punktów wszystkich meczów."""
     try:
-        update_stats_for_active_players()
-        print("Scheduler: Stats update job finished successfully.")
-    except Exception as e:
-        print(f"Scheduler: An error occurred during the stats update job: {e}")
+        scoring.save_scoring_rules(db, rules_update.rules)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    job_id = jobs.enqueue(jobs.RESCORE)
+    return {"message": "Scoring rules updated, re-scoring queued.", "job_id": job_id}
 
-# Create a scheduler
-scheduler = BackgroundScheduler()
+@app.get("/admin/jobs/{job_id}", response_model=schemas.Job)
+def admin_get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(auth.get_current_active_admin)
+):
+    """[Admin only] Zwraca status i postęp zadania w tle."""
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# --- Async Read Endpoints ---
+# ASYNC_DB=true zastępuje synchroniczne wersje najczęściej odpytywanych endpointów odczytu
+# wersjami z async_routes.py (aiosqlite / asyncpg), które nie zajmują wątków z puli Starlette.
+if async_db.ASYNC_DB:
+    import async_routes
+    async_endpoints = {
+        (route.path, method) for route in async_routes.router.routes for method in route.methods
+    }
+    app.router.routes = [
+        route for route in app.router.routes
+        if not (isinstance(route, APIRoute) and any((route.path, method) in async_endpoints for method in route.methods))
+    ]
+    app.include_router(async_routes.router)
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_db.dispose()
 
-# Schedule the job to run every day at 3:00 AM
-scheduler.add_job(run_stats_update, 'cron', hour=9, minute=0)
 
-# Start the scheduler
-scheduler.start()
+# --- Scheduler Logic ---
+# Ingest działa domyślnie w osobnym procesie (worker.py). ENABLE_WEB_SCHEDULER=true uruchamia
+# scheduler także w procesach API - blokada lidera gwarantuje, że zadanie wykona tylko jeden z nich.
+ENABLE_WEB_SCHEDULER = os.getenv("ENABLE_WEB_SCHEDULER", "false").lower() in ("1", "true", "yes")
+scheduler = None
 
-# Register a shutdown function to be called when the application exits
-atexit.register(lambda: scheduler.shutdown())
+@app.on_event("startup")
+def start_web_scheduler():
+    global scheduler
+    if not ENABLE_WEB_SCHEDULER:
+        return
+    import worker
+    scheduler = worker.configure_scheduler(BackgroundScheduler())
+    scheduler.start()
+
+@app.on_event("shutdown")
+def stop_web_scheduler():
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+        import worker
+        worker.leader_lock.release()
@@ -0,0 +1,167 @@
+"""
+Wersjonowane migracje schematu.
+
+create_all tworzy tylko brakujące tabele, więc nowe kolumny, indeksy i klucze główne
+w istniejących tabelach dodają migracje z listy MIGRATIONS. Każda migracja jest
+idempotentna (sprawdza stan schematu), dzięki czemu na świeżej bazie, utworzonej już
+w docelowym kształcie, jedynie zapisuje swoją wersję w schema_migrations.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, inspect, insert, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+import bulk
+import scoring
+import standings
+from models import Player, PlayerGameStats, SchemaMigration, User, user_league_association, user_player_association
+
+# Stały klucz blokady doradczej Postgresa - kilka workerów startujących naraz nie wykona migracji dwa razy
+MIGRATION_LOCK_KEY = 7310419
+
+# Migracja, od której historia składów jest kompletna, a sumy sprzed niej są w legacy_fantasy_points
+ROSTER_MEMBERSHIPS_VERSION = 6
+
+
+def _column_names(connection, table_name):
+    return {column["name"] for column in inspect(connection).get_columns(table_name)}
+
+
+def _add_missing_columns(connection, table, column_names):
+    """Dodaje brakujące kolumny modelu (ALTER TABLE ... ADD COLUMN). Zwraca nazwy dodanych kolumn."""
+    existing = _column_names(connection, table.name)
+    added = []
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {name} {column.type.compile(dialect=connection.dialect)}"
+        if column.default is not None and column.default.is_scalar:
+            ddl += f" DEFAULT {column.default.arg!r}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+        connection.execute(text(ddl))
+        added.append(name)
+    return added
+
+
+def _create_missing_indexes(connection, table):
+    # IF NOT EXISTS zamiast checkfirst - refleksja SQLite pomija indeksy na wyrażeniach
+    for index in table.indexes:
+        connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _ensure_primary_key(connection, table):
+    """
+    Nadaje tabeli asocjacyjnej klucz główny z modelu, usuwając wcześniej duplikaty i puste wiersze.
+    SQLite nie obsługuje ALTER TABLE ... ADD PRIMARY KEY, więc tabela jest przebudowywana.
+    """
+    if inspect(connection).get_pk_constraint(table.name)["constrained_columns"]:
+        return
+    key_columns = [column.name for column in table.primary_key.columns]
+    not_null = " AND ".join(f"{name} IS NOT NULL" for name in key_columns)
+
+    if connection.dialect.name == "sqlite":
+        old_name = f"_{table.name}_old"
+        connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+        table.create(connection)
+        columns = ", ".join(key_columns)
+        connection.execute(text(
+            f"INSERT INTO {table.name} ({columns}) SELECT DISTINCT {columns} FROM {old_name} WHERE {not_null}"
+        ))
+        connection.execute(text(f"DROP TABLE {old_name}"))
+        return
+
+    same_key = " AND ".join(f"a.{name} = b.{name}" for name in key_columns)
+    connection.execute(text(f"DELETE FROM {table.name} WHERE NOT ({not_null})"))
+    connection.execute(text(f"DELETE FROM {table.name} a USING {table.name} b WHERE a.ctid < b.ctid AND {same_key}"))
+    connection.execute(text(f"ALTER TABLE {table.name} ADD PRIMARY KEY ({', '.join(key_columns)})"))
+    _create_missing_indexes(connection, table)
+
+
+def player_game_stats_indexes(connection):
+    _create_missing_indexes(connection, PlayerGameStats.__table__)
+
+
+def player_aggregate_columns(connection):
+    added = _add_missing_columns(
+        connection, Player.__table__,
+        ["games_played", "fantasy_points_sum", "last_game_fantasy_points", "last_game_date"],
+    )
+    if added:
+        db = Session(bind=connection)
+        bulk.rebuild_player_aggregates(db)
+        bulk.refresh_last_game_columns(db)
+        db.flush()
+
+
+def box_score_columns(connection):
+    _add_missing_columns(connection, PlayerGameStats.__table__, list(scoring.BOX_SCORE_COLUMNS))
+
+
+def players_catalogue_indexes(connection):
+    _create_missing_indexes(connection, Player.__table__)
+
+
+def association_primary_keys(connection):
+    _ensure_primary_key(connection, user_player_association)
+    _ensure_primary_key(connection, user_league_association)
+
+
+def roster_memberships_backfill(connection):
+    # Punkty z ingestu liczone są tylko z roster_memberships - istniejące składy dostają otwarte członkostwa
+    # (wcześniejsze dodania i usunięcia są nieznane), a dotychczasowe sumy zostają zapamiętane jako punkty
+    # sprzed historii, żeby przeliczenie sum od zera ich nie wyzerowało. Członkostwa liczą się od dnia
+    # ostatniego zapisanego meczu (bez meczów - od dnia migracji), więc mecze pobrane dopiero po migracji,
+    # np. przez catch-up, trafiają do obecnych składów jak przed nią
+    _add_missing_columns(connection, User.__table__, ["legacy_fantasy_points"])
+    db = Session(bind=connection)
+    since = db.scalar(select(func.max(PlayerGameStats.game_date))) or scoring.today()
+    scoring.backfill_memberships(db, since)
+    scoring.store_legacy_points(db)
+    db.flush()
+
+
+def league_standings_backfill(connection):
+    # league_standings jest uzupełniana przyrostowo - istniejące ligi trzeba odbudować raz w całości
+    db = Session(bind=connection)
+    standings.rebuild_all(db)
+    db.flush()
+
+
+def users_ranking_index(connection):
+    _create_missing_indexes(connection, User.__table__)
+
+
+MIGRATIONS = [
+    (1, "player_game_stats_indexes", player_game_stats_indexes),
+    (2, "player_aggregate_columns", player_aggregate_columns),
+    (3, "box_score_columns", box_score_columns),
+    (4, "players_catalogue_indexes", players_catalogue_indexes),
+    (5, "association_primary_keys", association_primary_keys),
+    (6, "roster_memberships_backfill", roster_memberships_backfill),
+    (7, "league_standings_backfill", league_standings_backfill),
+    (8, "users_ranking_index", users_ranking_index),
+]
+
+
+def is_applied(connection, version: int) -> bool:
+    """Czy migracja została zastosowana (connection albo Session)."""
+    return connection.scalar(select(SchemaMigration.version).where(SchemaMigration.version == version)) is not None
+
+
+def run(engine):
+    """Wykonuje niezastosowane migracje, każdą w osobnej transakcji. Zwraca listę wykonanych wersji."""
+    applied_now = []
+    for version, name, migrate in MIGRATIONS:
+        with engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            if is_applied(connection, version):
+                continue
+            migrate(connection)
+            connection.execute(insert(SchemaMigration).values(version=version, name=name, applied_at=datetime.utcnow()))
+            applied_now.append(version)
+            print(f"Applied migration {version}: {name}")
+    return applied_now
@@ -1,8 +1,7 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Table, Boolean, Float, UniqueConstraint
+from sqlalchemy import create_engine, event, Column, Integer, String, ForeignKey, Table, Boolean, Float, UniqueConstraint, Index, DateTime, func, literal_column
 from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Optional
 
 # Absolutna ścieżka do katalogu, w którym znajduje się ten plik
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -21,15 +20,17 @@ Base = declarative_base()
 # Tabela asocjacyjna dla relacji wiele-do-wielu między User a Player
 user_player_association = Table(
     'user_player_association', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('player_id', Integer, ForeignKey('players.id'))
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('player_id', Integer, ForeignKey('players.id'), primary_key=True),
+    Index('ix_user_player_association_player', 'player_id'),
 )
 
 # Tabela asocjacyjna dla relacji wiele-do-wielu między User a League
 user_league_association = Table(
     'user_league_association', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('league_id', Integer, ForeignKey('leagues.id'))
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('league_id', Integer, ForeignKey('leagues.id'), primary_key=True),
+    Index('ix_user_league_association_league', 'league_id'),
 )
 
 class User(Base):
@@ -41,6 +42,9 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="user", nullable=False)  # Role: 'user' or 'admin'
     total_fantasy_points = Column(Float, default=0.0, nullable=False)
+    # Punkty zdobyte przed zapisem historii składów (roster_memberships) - przeliczenie sum od zera
+    # nie może ich odtworzyć, więc są doliczane do punktów z historii
+    legacy_fantasy_points = Column(Float, default=0.0, nullable=False)
 
     # Relacja do zawodników w drużynie użytkownika
     players = relationship(
@@ -56,6 +60,9 @@ class User(Base):
         back_populates="users"
     )
 
+# Ranking i /leaderboard czytają użytkowników malejąco po punktach (remisy po id) - bez sortowania całej tabeli
+Index('ix_users_total_points', User.total_fantasy_points.desc(), User.id)
+
 class League(Base):
     __tablename__ = "leagues"
 
@@ -82,6 +89,13 @@ class Player(Base):
     
     # To pole będzie przechowywać średnią punktów fantasy
     average_fantasy_points = Column(Float, default=0.0)
+    # Bieżące agregaty, z których liczona jest średnia (aktualizowane w O(1) na każdy nowy mecz)
+    games_played = Column(Integer, default=0, nullable=False)
+    fantasy_points_sum = Column(Float, default=0.0, nullable=False)
+
+    # Zdenormalizowane dane z ostatniego meczu, utrzymywane przez skrypt pobierający statystyki
+    last_game_fantasy_points = Column(Float, nullable=True)
+    last_game_date = Column(String, nullable=True)
 
     # Relacja zwrotna do użytkowników, którzy mają tego gracza w drużynie
     users = relationship(
@@ -93,13 +107,18 @@ class Player(Base):
     # Relacja do statystyk z poszczególnych meczy
     game_stats = relationship("PlayerGameStats", back_populates="player", cascade="all, delete-orphan")
 
-    @property
-    def last_game_fantasy_points(self) -> Optional[float]:
-        if not self.game_stats:
-            return None
-        # Sort by game_date (assuming YYYY-MM-DD format for string comparison)
-        latest_game = max(self.game_stats, key=lambda stat: stat.game_date)
-        return latest_game.fantasy_points
+    __table_args__ = (
+        Index('ix_players_active_name', 'is_active', 'full_name', 'id'),
+        Index('ix_players_team_name', 'team_name'),
+        Index('ix_players_position', 'position'),
+    )
+
+# Sortowanie katalogu zawodników (/players/catalogue) - indeksy na tych samych wyrażeniach co ORDER BY,
+# z wartościami domyślnymi jako literały, żeby planer dopasował wyrażenie
+PLAYER_AVERAGE_SORT_KEY = func.coalesce(Player.average_fantasy_points, literal_column("0.0"))
+PLAYER_LAST_GAME_SORT_KEY = func.coalesce(Player.last_game_fantasy_points, literal_column("-1.0"))
+Index('ix_players_active_average', Player.is_active, PLAYER_AVERAGE_SORT_KEY.desc(), Player.id)
+Index('ix_players_active_last_game', Player.is_active, PLAYER_LAST_GAME_SORT_KEY.desc(), Player.id)
 
 class PlayerGameStats(Base):
     __tablename__ = "player_game_stats"
@@ -112,18 +131,168 @@ class PlayerGameStats(Base):
     points = Column(Integer, default=0)
     rebounds = Column(Integer, default=0)
     assists = Column(Integer, default=0)
+    # Pełny box score - punktacja fantasy liczona jest z reguł w scoring_rules
+    steals = Column(Integer, default=0)
+    blocks = Column(Integer, default=0)
+    turnovers = Column(Integer, default=0)
+    three_pointers_made = Column(Integer, default=0)
+    field_goals_made = Column(Integer, default=0)
+    field_goals_attempted = Column(Integer, default=0)
+    free_throws_made = Column(Integer, default=0)
+    free_throws_attempted = Column(Integer, default=0)
+    offensive_rebounds = Column(Integer, default=0)
+    defensive_rebounds = Column(Integer, default=0)
+    personal_fouls = Column(Integer, default=0)
+    minutes = Column(Integer, default=0)
     fantasy_points = Column(Float, default=0.0)
     
     player = relationship("Player", back_populates="game_stats")
 
     __table_args__ = (
         UniqueConstraint('player_id', 'game_id', name='_player_game_uc'),
+        Index('ix_player_game_stats_player_date', 'player_id', 'game_date'),
+        Index('ix_player_game_stats_game_date', 'game_date'),
+    )
+
+
+class ScoringRule(Base):
+    __tablename__ = "scoring_rules"
+
+    # Waga kategorii statystycznej w punktacji fantasy (globalna dla całej gry)
+    stat = Column(String, primary_key=True)  # nazwa kolumny box score w player_game_stats
+    weight = Column(Float, nullable=False)
+
+
+class RosterMembership(Base):
+    __tablename__ = "roster_memberships"
+
+    # Historia składów: mecz zawodnika liczy się użytkownikowi, jeśli added_on <= game_date < removed_on
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    player_id = Column(Integer, ForeignKey('players.id'), nullable=False)
+    added_on = Column(String, nullable=False)  # YYYY-MM-DD, jak player_game_stats.game_date
+    removed_on = Column(String, nullable=True)  # NULL = zawodnik nadal w drużynie
+
+    __table_args__ = (
+        Index('ix_roster_memberships_player_added', 'player_id', 'added_on'),
+        Index('ix_roster_memberships_user_removed', 'user_id', 'removed_on'),
+    )
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    # Zastosowane migracje schematu (migrations.py)
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False)
+
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    # Licznik wersji danych danego zakresu (versions.py) - podstawa ETagów
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+
+class LeagueStanding(Base):
+    __tablename__ = "league_standings"
+
+    # Zmaterializowana tabela ligowa, aktualizowana przy zmianach punktów lub składu ligi
+    league_id = Column(Integer, ForeignKey('leagues.id'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    points = Column(Float, default=0.0, nullable=False)
+    rank = Column(Integer, default=1, nullable=False)
+
+    __table_args__ = (
+        Index('ix_league_standings_league_rank', 'league_id', 'rank'),
+        Index('ix_league_standings_user', 'user_id'),
     )
 
 
-# Konfiguracja silnika bazy danych
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+class SchedulerLock(Base):
+    __tablename__ = "scheduler_locks"
+
+    # Blokada lidera: tylko proces, który ją trzyma, uruchamia zadania cykliczne
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(Float, nullable=False)  # Unix timestamp
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    # Zadania administracyjne (np. synchronizacja zawodników) wykonywane w tle
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, default="queued", nullable=False)  # queued, running, succeeded, failed
+    teams_fetched = Column(Integer, default=0, nullable=False)
+    players_upserted = Column(Integer, default=0, nullable=False)
+    games_ingested = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+# Konfiguracja silnika bazy danych (zmienne środowiskowe)
+# SQLite: WAL pozwala czytać w trakcie nocnego zapisu ingestu, busy_timeout czeka na blokadę zamiast zwracać błąd
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # przy WAL bezpieczne i dużo szybsze niż FULL
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE_BYTES = int(os.getenv("SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024)))
+
+# Postgres: pula połączeń na proces. Domyślnie limit połączeń bazy (DB_MAX_CONNECTIONS, zostawiając
+# zapas na worker i połączenia administracyjne) dzielony jest między procesy API (WEB_CONCURRENCY).
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "90"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+_connections_per_process = max(2, (DB_MAX_CONNECTIONS - 10) // max(1, WEB_CONCURRENCY))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(min(10, _connections_per_process // 2))))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(max(0, min(20, _connections_per_process - DB_POOL_SIZE)))))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Listener 'connect' - ustawienia każdego nowego połączenia SQLite (także aiosqlite, patrz async_db.py)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")  # ujemna wartość = KiB
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_BYTES}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def pool_settings():
+    """Ustawienia puli połączeń Postgresa (wspólne dla silnika synchronicznego i asynchronicznego)."""
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def make_engine(database_url: str = DATABASE_URL):
+    """Tworzy silnik z ustawieniami wydajnościowymi właściwymi dla dialektu."""
+    if database_url.startswith("sqlite"):
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        )
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        return engine
+
+    return create_engine(database_url, **pool_settings())
+
+
+engine = make_engine()
 
 # Sesja bazy danych
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -141,6 +310,9 @@ def create_tables():
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
     Base.metadata.create_all(bind=engine)
+    # Nowe kolumny i indeksy w istniejących tabelach (create_all tworzy tylko brakujące tabele)
+    import migrations
+    migrations.run(engine)
 
 if __name__ == "__main__":
     # Ten blok zostanie wykonany, gdy skrypt będzie uruchamiany bezpośrednio
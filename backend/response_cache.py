@@ -0,0 +1,187 @@
+"""
+Współdzielony cache gotowych odpowiedzi JSON dla publicznych endpointów odczytu (/players, /leaderboard).
+
+Odpowiedzi są identyczne dla wszystkich użytkowników między ingestami, więc przechowujemy
+je już zserializowane. Klucz zawiera wersje danych (versions.py), dlatego commit ingestu,
+synchronizacji zawodników czy zmiany składu - w dowolnym procesie - automatycznie
+unieważnia wpisy; stare wpisy wypadają przez LRU/TTL.
+
+Backend wybiera RESPONSE_CACHE_BACKEND:
+- memory (domyślnie) - LRU w pamięci procesu,
+- redis - wspólny cache dla wszystkich procesów API (REDIS_URL, wymaga pakietu redis),
+- fake-redis - scripts/fake_redis.py w miejsce serwera Redis (lokalnie i w testach),
+- off - bez cache.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+
+import versions
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX = os.getenv("RESPONSE_CACHE_REDIS_PREFIX", "nba-fantasy:response:")
+
+
+class MemoryResponseCache:
+    """Wątkowo bezpieczny cache LRU z TTL w pamięci procesu."""
+
+    # Operacje nie czekają na I/O, więc endpointy async wołają je wprost z pętli zdarzeń
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisResponseCache:
+    """Cache w Redisie (lub zgodnym kliencie, np. scripts/fake_redis.FakeRedis), wspólny dla procesów API."""
+
+    # Synchroniczny klient sieciowy - endpointy async wołają go w puli wątków
+    blocking = True
+
+    def __init__(self, client, ttl_seconds: int, prefix: str = REDIS_KEY_PREFIX):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, body: bytes):
+        self.client.set(self.prefix + key, body, ex=self.ttl_seconds)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def make_backend(name: str = RESPONSE_CACHE_BACKEND):
+    if name == "off":
+        return None
+    if name == "memory":
+        return MemoryResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+    if name == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        return RedisResponseCache(redis.Redis.from_url(REDIS_URL), RESPONSE_CACHE_TTL_SECONDS)
+    if name == "fake-redis":
+        from scripts.fake_redis import FakeRedis
+        return RedisResponseCache(FakeRedis(), RESPONSE_CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND '{name}'")
+
+
+backend = make_backend()
+
+
+class ResponseCacheStats:
+    """Liczniki trafień - zwiększane z wątków puli Starlette i z pętli zdarzeń, więc pod blokadą."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "backend": RESPONSE_CACHE_BACKEND,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+
+stats = ResponseCacheStats()
+
+
+def cache_key(name: str, current) -> str:
+    """Klucz wpisu: nazwa odpowiedzi i aktualne wersje danych, od których zależy."""
+    return name + "|" + "|".join(f"{scope}={version}" for scope, version in sorted(current.items()))
+
+
+def lookup(name: str, scopes: Iterable[str]) -> Tuple[str, Optional[bytes]]:
+    """Zwraca (klucz, zapisana odpowiedź lub None). Przy wyłączonym cache klucz i odpowiedź to None."""
+    if backend is None:
+        return None, None
+    key = cache_key(name, versions.current_versions(scopes))
+    body = backend.get(key)
+    stats.record(body is not None)
+    return key, body
+
+
+async def lookup_async(name: str, scopes: Iterable[str]) -> Tuple[str, Optional[bytes]]:
+    """Odpowiednik lookup dla endpointów async - pula wątków tylko dla backendu blokującego (redis)."""
+    if backend is None:
+        return None, None
+    key = cache_key(name, await versions.current_versions_async(scopes))
+    body = await run_in_threadpool(backend.get, key) if backend.blocking else backend.get(key)
+    stats.record(body is not None)
+    return key, body
+
+
+def store(key: Optional[str], body: bytes):
+    if backend is not None and key is not None:
+        backend.set(key, body)
+
+
+async def store_async(key: Optional[str], body: bytes):
+    if backend is None or key is None:
+        return
+    if backend.blocking:
+        await run_in_threadpool(backend.set, key, body)
+    else:
+        backend.set(key, body)
+
+
+def clear():
+    if backend is not None:
+        backend.clear()
+
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
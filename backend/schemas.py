@@ -1,6 +1,7 @@
 from __future__ import annotations # Required for Pydantic forward references
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
+from datetime import datetime
 
 # Schematy dla Zawodnika (Player)
 class PlayerBase(BaseModel):
@@ -19,6 +20,11 @@ class Player(PlayerBase):
     class Config:
         from_attributes = True
 
+# Strona katalogu zawodników (stronicowanie kursorem)
+class PlayerPage(BaseModel):
+    items: List[Player]
+    next_cursor: Optional[str] = None
+
 # Schematy dla Użytkownika (User)
 class UserBase(BaseModel):
     email: str
@@ -69,6 +75,17 @@ class DailyFantasyPoints(BaseModel):
     total_today_points: float
     player_points_breakdown: List[PlayerDailyPoints]
 
+# Lekki ranking (bez zagnieżdżonych zawodników i lig)
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    nickname: Optional[str] = None
+    total_fantasy_points: float
+
+class Leaderboard(BaseModel):
+    total: int
+    entries: List[LeaderboardEntry]
+
 # Schematy dla Lig (League)
 class LeagueBase(BaseModel):
     name: str
@@ -94,6 +111,27 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
+    role: Optional[str] = None
+
+# Schemat zadania w tle (np. synchronizacji zawodników)
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str
+    teams_fetched: int
+    players_upserted: int
+    games_ingested: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ScoringRules(BaseModel):
+    rules: Dict[str, float]  # kategoria box score -> waga
 
 # Schemat do aktualizacji drużyny użytkownika
 class UserTeamUpdate(BaseModel):
@@ -0,0 +1,275 @@
+"""
+Silnik punktacji fantasy.
+
+Punkty meczu to suma ważona box score według reguł z tabeli scoring_rules - liczona
+wektorowo (NumPy) przy ingeście i jednym UPDATE przy zmianie reguł.
+
+Punktacja drużyn w czasie: użytkownikowi liczą się tylko mecze rozegrane przez zawodnika
+w okresie, gdy był w jego drużynie (tabela roster_memberships).
+Wszystkie obliczenia to jedno złączenie zakresowe memberships x player_game_stats,
+więc pełne przeliczenie sum wszystkich użytkowników to pojedynczy UPDATE. Punkty sprzed
+historii składów (users.legacy_fantasy_points) są do tych sum doliczane.
+"""
+import os
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+import bulk
+import standings
+from models import Player, PlayerGameStats, RosterMembership, ScoringRule, User, user_player_association
+
+# Strefa czasowa dat meczów w game logach NBA (GAME_DATE to lokalna data w USA). W niej liczone są też
+# daty dodania i usunięcia zawodnika, żeby wieczorna zmiana składu trafiła na mecze tego samego wieczoru
+GAME_DATE_TIMEZONE = ZoneInfo(os.getenv("GAME_DATE_TIMEZONE", "America/New_York"))
+
+# Kategorie box score: kolumna w player_game_stats -> kolumna w game logu nba_api
+BOX_SCORE_COLUMNS = {
+    "points": "PTS",
+    "rebounds": "REB",
+    "assists": "AST",
+    "steals": "STL",
+    "blocks": "BLK",
+    "turnovers": "TOV",
+    "three_pointers_made": "FG3M",
+    "field_goals_made": "FGM",
+    "field_goals_attempted": "FGA",
+    "free_throws_made": "FTM",
+    "free_throws_attempted": "FTA",
+    "offensive_rebounds": "OREB",
+    "defensive_rebounds": "DREB",
+    "personal_fouls": "PF",
+    "minutes": "MIN",
+}
+
+# Domyślne reguły (PTS + 1.2*REB + 1.5*AST); pozostałe kategorie mają wagę 0
+DEFAULT_SCORING_RULES = {"points": 1.0, "rebounds": 1.2, "assists": 1.5}
+
+
+def load_scoring_rules(db: Session):
+    """Zwraca wagi wszystkich kategorii: domyślne nadpisane wierszami z scoring_rules."""
+    rules = {stat: DEFAULT_SCORING_RULES.get(stat, 0.0) for stat in BOX_SCORE_COLUMNS}
+    for stat, weight in db.execute(select(ScoringRule.stat, ScoringRule.weight)):
+        if stat in rules:
+            rules[stat] = weight
+    return rules
+
+
+def save_scoring_rules(db: Session, rules):
+    """Zapisuje wagi podanych kategorii (nieznane kategorie zgłaszają ValueError)."""
+    unknown = set(rules) - set(BOX_SCORE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown stat categories: {', '.join(sorted(unknown))}")
+    for stat, weight in rules.items():
+        db.merge(ScoringRule(stat=stat, weight=float(weight)))
+
+
+def build_game_records(game_logs, rules):
+    """
+    Zamienia rekordy game logu (kolumny nba_api) na wiersze player_game_stats z pełnym
+    box score i punktami fantasy policzonymi wektorowo (macierz box score x wektor wag).
+    Brakujące kategorie traktowane są jako 0.
+    """
+    games = pd.DataFrame(game_logs)
+    if games.empty:
+        return []
+
+    box = games.reindex(columns=list(BOX_SCORE_COLUMNS.values()), fill_value=0)
+    box = box.apply(pd.to_numeric, errors="coerce").fillna(0).astype(int)
+    weights = np.array([rules.get(stat, 0.0) for stat in BOX_SCORE_COLUMNS], dtype=float)
+
+    records = pd.DataFrame({
+        "player_id": games["PLAYER_ID"].astype(int),
+        "game_id": games["GAME_ID"],
+        "game_date": games["GAME_DATE"],
+    })
+    for stat, column in BOX_SCORE_COLUMNS.items():
+        records[stat] = box[column].to_numpy()
+    records["fantasy_points"] = box.to_numpy(dtype=float) @ weights
+    return records.to_dict("records")
+
+
+def fantasy_points_expression(rules):
+    """Wyrażenie SQL liczące punkty fantasy wiersza player_game_stats według reguł."""
+    expression = literal(0.0)
+    for stat, weight in rules.items():
+        if weight:
+            expression = expression + func.coalesce(getattr(PlayerGameStats, stat), 0) * weight
+    return expression
+
+
+def rescore_all(db: Session, rules=None):
+    """
+    Przelicza punkty fantasy wszystkich meczów według reguł (jeden UPDATE), a następnie
+    agregaty i ostatni mecz zawodników, sumy użytkowników i tabele ligowe.
+    Nowe reguły zmieniają sumy tylko o mecze z historii składów - punkty sprzed niej
+    (legacy_fantasy_points) zostają bez zmian.
+    """
+    rules = rules or load_scoring_rules(db)
+    result = db.execute(
+        update(PlayerGameStats)
+        .values(fantasy_points=fantasy_points_expression(rules))
+        .execution_options(synchronize_session=False)
+    )
+    bulk.rebuild_player_aggregates(db)
+    bulk.refresh_last_game_columns(db)
+    recompute_user_totals(db)
+    standings.rebuild_all(db)
+    return result.rowcount
+
+
+def game_day() -> date:
+    """Bieżąca data w strefie dat meczów (GAME_DATE_TIMEZONE)."""
+    return datetime.now(GAME_DATE_TIMEZONE).date()
+
+
+def today() -> str:
+    return game_day().isoformat()
+
+
+def credited_game_condition():
+    """Warunek złączenia: mecz zawodnika rozegrany w czasie członkostwa w drużynie."""
+    return and_(
+        PlayerGameStats.player_id == RosterMembership.player_id,
+        PlayerGameStats.game_date >= RosterMembership.added_on,
+        or_(RosterMembership.removed_on.is_(None), PlayerGameStats.game_date < RosterMembership.removed_on),
+    )
+
+
+def record_player_added(db: Session, user_id: int, player_id: int):
+    db.add(RosterMembership(user_id=user_id, player_id=player_id, added_on=today()))
+
+
+def record_player_removed(db: Session, user_id: int, player_id: int):
+    db.execute(
+        update(RosterMembership)
+        .where(
+            RosterMembership.user_id == user_id,
+            RosterMembership.player_id == player_id,
+            RosterMembership.removed_on.is_(None),
+        )
+        .values(removed_on=today())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def add_new_game_points(db: Session, new_games, batch_size: int = 500):
+    """
+    Dodaje punkty nowo wstawionych meczów do sum użytkowników, którzy mieli zawodnika
+    w drużynie w dniu meczu - jeden UPDATE na paczkę meczów. Zwraca zbiór id zmienionych użytkowników.
+    """
+    changed_user_ids = set()
+    for start in range(0, len(new_games), batch_size):
+        game_ids = [game.id for game in new_games[start:start + batch_size]]
+        credited = (
+            select(RosterMembership.user_id, PlayerGameStats.fantasy_points)
+            .join(PlayerGameStats, credited_game_condition())
+            .where(PlayerGameStats.id.in_(game_ids))
+            .subquery()
+        )
+        gained_points = (
+            select(func.coalesce(func.sum(credited.c.fantasy_points), 0.0))
+            .where(credited.c.user_id == User.id)
+            .scalar_subquery()
+        )
+        owners = select(credited.c.user_id)
+        db.execute(
+            update(User)
+            .where(User.id.in_(owners))
+            .values(total_fantasy_points=User.total_fantasy_points + gained_points)
+            .execution_options(synchronize_session=False)
+        )
+        changed_user_ids.update(db.scalars(owners.distinct()))
+    return changed_user_ids
+
+
+def credited_points():
+    """Skorelowane podzapytanie: suma punktów meczów zaliczonych użytkownikowi z historii składów."""
+    return (
+        select(func.coalesce(func.sum(PlayerGameStats.fantasy_points), 0.0))
+        .select_from(RosterMembership)
+        .join(PlayerGameStats, credited_game_condition())
+        .where(RosterMembership.user_id == User.id)
+        .scalar_subquery()
+    )
+
+
+def recompute_user_totals(db: Session):
+    """Przelicza od zera sumy punktów wszystkich użytkowników (punkty sprzed historii + mecze z historii) jednym UPDATE."""
+    import migrations  # migrations importuje scoring
+    # Przed migracją historia składów jest niepełna, a legacy_fantasy_points puste - sumy zostałyby wyzerowane
+    if not migrations.is_applied(db, migrations.ROSTER_MEMBERSHIPS_VERSION):
+        raise RuntimeError("Roster history is not complete yet: apply migrations before recomputing user totals")
+    db.execute(
+        update(User)
+        .values(total_fantasy_points=User.legacy_fantasy_points + credited_points())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def store_legacy_points(db: Session):
+    """
+    Zapisuje jako legacy_fantasy_points część obecnych sum, której historia składów nie odtworzy
+    (suma minus punkty zaliczone z roster_memberships) - recompute_user_totals zwraca wtedy te same sumy.
+    """
+    db.execute(
+        update(User)
+        .values(legacy_fantasy_points=User.total_fantasy_points - credited_points())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def team_points_query(user_id: int, game_date: str):
+    return (
+        select(Player.full_name, PlayerGameStats.fantasy_points)
+        .select_from(RosterMembership)
+        .join(PlayerGameStats, credited_game_condition())
+        .join(Player, Player.id == RosterMembership.player_id)
+        .where(RosterMembership.user_id == user_id, PlayerGameStats.game_date == game_date)
+    )
+
+
+def team_points_on(db: Session, user_id: int, game_date: str):
+    """Zwraca (nazwa zawodnika, punkty) meczów z danego dnia zawodników, którzy byli wtedy w drużynie."""
+    return db.execute(team_points_query(user_id, game_date)).all()
+
+
+def team_totals_on(db: Session, user_ids, game_date: str):
+    """Suma punktów drużyn podanych użytkowników z danego dnia (jak team_points_on, jednym zapytaniem)."""
+    rows = db.execute(
+        select(RosterMembership.user_id, func.sum(PlayerGameStats.fantasy_points))
+        .select_from(RosterMembership)
+        .join(PlayerGameStats, credited_game_condition())
+        .where(RosterMembership.user_id.in_(list(user_ids)), PlayerGameStats.game_date == game_date)
+        .group_by(RosterMembership.user_id)
+    ).all()
+    return dict(rows)
+
+
+def backfill_memberships(db: Session, added_on: str):
+    """
+    Tworzy otwarte członkostwa od added_on dla obecnych składów (user_player_association), które nie
+    mają jeszcze historii. Wcześniejsze mecze nie są zaliczane - punkty z nich są w legacy_fantasy_points.
+    """
+    has_open_membership = (
+        select(RosterMembership.id)
+        .where(
+            RosterMembership.user_id == user_player_association.c.user_id,
+            RosterMembership.player_id == user_player_association.c.player_id,
+            RosterMembership.removed_on.is_(None),
+        )
+        .exists()
+    )
+    result = db.execute(
+        insert(RosterMembership).from_select(
+            ["user_id", "player_id", "added_on"],
+            select(user_player_association.c.user_id, user_player_association.c.player_id, literal(added_on))
+            .where(~has_open_membership)
+            .distinct()
+        )
+    )
+    return result.rowcount
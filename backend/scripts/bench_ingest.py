@@ -0,0 +1,103 @@
+"""
+Benchmark przetwarzania LeagueGameLog w ingeście: dawna pętla iterrows vs wersja wektorowa.
+
+    python scripts/bench_ingest.py [--days 170] [--repeat 5]
+
+Dane to pełny sezon wygenerowany przez scripts/fake_nba_stats_server.py (bez sieci).
+Mierzony jest koszt ingestu dzień po dniu przez cały sezon, jednorazowe przetworzenie logu
+całego sezonu (tryb stats-range / catch-up) oraz łączenie CommonAllPlayers ze składami drużyn.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.fake_nba_stats_server import FakeNBAStats, PLAYER_GAME_LOG_HEADERS, SEASON_START
+from scripts.fetch_nba_players import build_player_records, select_game_records
+
+
+def legacy_latest_games(df, player_ids):
+    """Poprzednia implementacja: iterrows + wyszukiwanie w liście."""
+    player_latest_game = {}
+    for _, row in df.iterrows():
+        pid = row["PLAYER_ID"]
+        if pid in player_ids:
+            if pid not in player_latest_game:
+                player_latest_game[pid] = row
+    return player_latest_game
+
+
+def legacy_player_records(all_players_df, rosters):
+    """Poprzednia implementacja: iterrows po składach i po CommonAllPlayers."""
+    roster_data = {}
+    for roster in rosters:
+        for _, row in roster.iterrows():
+            roster_data[row["PLAYER_ID"]] = row.get("POSITION")
+    records = []
+    for _, p_row in all_players_df.iterrows():
+        records.append({
+            "id": p_row["PERSON_ID"],
+            "full_name": p_row["DISPLAY_FIRST_LAST"],
+            "is_active": p_row["ROSTERSTATUS"] == 1,
+            "team_name": p_row["TEAM_ABBREVIATION"],
+            "position": roster_data.get(p_row["PERSON_ID"], "N/A"),
+        })
+    return records
+
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=170, help="Length of the generated season in days")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fake = FakeNBAStats()
+    rows = []
+    for offset in range(args.days, -1, -1):
+        rows.extend(fake.game_log_rows(SEASON_START + timedelta(days=offset)))
+    season_log = pd.DataFrame(rows, columns=PLAYER_GAME_LOG_HEADERS)
+
+    all_players = fake.common_all_players({})["resultSets"][0]
+    all_players_df = pd.DataFrame(all_players["rowSet"], columns=all_players["headers"])
+    player_ids = all_players_df["PERSON_ID"].tolist()
+    rosters = []
+    for team in fake.teams:
+        roster = fake.common_team_roster({"TeamID": team["id"]})["resultSets"][0]
+        rosters.append(pd.DataFrame(roster["rowSet"], columns=roster["headers"]))
+    rosters_df = pd.concat(rosters, ignore_index=True)[["PLAYER_ID", "POSITION"]]
+
+    print(f"Season log: {len(season_log)} rows, {len(player_ids)} players, best of {args.repeat}")
+
+    days = [day_log for _, day_log in season_log.groupby("GAME_DATE")]
+    legacy = best_of(args.repeat, lambda: [legacy_latest_games(day_log, player_ids) for day_log in days])
+    vectorised = best_of(args.repeat, lambda: [select_game_records(day_log, player_ids) for day_log in days])
+    print(f"daily ingest   legacy {legacy * 1000:9.1f} ms   vectorised {vectorised * 1000:7.1f} ms   x{legacy / vectorised:.0f}"
+          f"   ({len(days)} days, {legacy / len(days) * 1000:.2f} vs {vectorised / len(days) * 1000:.2f} ms per day)")
+
+    for day_log in days:
+        assert {(pid, row["GAME_ID"]) for pid, row in legacy_latest_games(day_log, player_ids).items()} == \
+            {(row["PLAYER_ID"], row["GAME_ID"]) for row in select_game_records(day_log, player_ids)}
+
+    whole_season = best_of(args.repeat, select_game_records, season_log, player_ids)
+    print(f"season range   vectorised {whole_season * 1000:7.1f} ms for {len(season_log)} rows in one pass")
+
+    legacy = best_of(args.repeat, legacy_player_records, all_players_df, rosters)
+    vectorised = best_of(args.repeat, build_player_records, all_players_df, rosters_df)
+    print(f"player records legacy {legacy * 1000:9.1f} ms   vectorised {vectorised * 1000:7.1f} ms   x{legacy / vectorised:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Mikrobenchmark serializacji /players i /leaderboard: ORM + schemas (from_attributes) kontra serialization.py.
+
+    python scripts/bench_serialization.py [--users 200] [--players 450] [--repeat 20]
+
+Na tymczasowej bazie SQLite z danymi jak w scripts/load_test.py sprawdza najpierw, że obie ścieżki
+dają ten sam JSON (kolejność zagnieżdżonych list nie jest określona w ścieżce ORM, więc porównywane
+są listy posortowane po id), a potem wypisuje czasy zapytań razem z serializacją.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import seed_database
+
+
+def canonical(value):
+    """Sortuje listy obiektów po id (kolejność relacji ORM nie jest określona)."""
+    if isinstance(value, dict):
+        return {key: canonical(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [canonical(item) for item in value]
+        if items and all(isinstance(item, dict) and "id" in item for item in items):
+            items.sort(key=lambda item: item["id"])
+        return items
+    return value
+
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, sum(timings) / len(timings) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--players", type=int, default=450)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = f"sqlite:///{os.path.join(tmp_dir, 'bench_serialization.db')}"
+        print(f"Seeding {database_url}...")
+        seed_database(database_url, users=args.users, players=args.players)
+
+        import models
+        import schemas
+        import serialization
+
+        # Serializacja całych list przez schematy - ścieżka porównawcza dla serialization.py
+        player_list = TypeAdapter(List[schemas.Player])
+        user_list = TypeAdapter(List[schemas.User])
+
+        def schemas_players():
+            with models.SessionLocal() as db:
+                players = db.query(models.Player).filter(models.Player.is_active == True).all()
+                return player_list.dump_json(player_list.validate_python(players, from_attributes=True))
+
+        def schemas_leaderboard():
+            with models.SessionLocal() as db:
+                users = db.query(models.User).order_by(models.User.total_fantasy_points.desc()).all()
+                return user_list.dump_json(user_list.validate_python(users, from_attributes=True))
+
+        def fast_players():
+            with models.SessionLocal() as db:
+                return serialization.dumps(serialization.active_players(db))
+
+        def fast_leaderboard():
+            with models.SessionLocal() as db:
+                return serialization.dumps(serialization.leaderboard(db))
+
+        cases = [
+            ("/players", schemas_players, fast_players),
+            ("/leaderboard", schemas_leaderboard, fast_leaderboard),
+        ]
+
+        failed = False
+        for name, reference, fast in cases:
+            if canonical(json.loads(reference())) != canonical(json.loads(fast())):
+                print(f"MISMATCH {name}: serialization.py output differs from schemas")
+                failed = True
+        if failed:
+            sys.exit(1)
+
+        print()
+        print(f"{'endpoint':<14} {'path':<10} {'best ms':>9} {'mean ms':>9} {'bytes':>10}")
+        for name, reference, fast in cases:
+            for label, function in (("schemas", reference), ("orjson", fast)):
+                best, mean, size = best_of(function, args.repeat)
+                print(f"{name:<14} {label:<10} {best:>9.1f} {mean:>9.1f} {size:>10}")
+        models.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
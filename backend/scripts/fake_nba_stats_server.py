@@ -0,0 +1,228 @@
+"""
+Lokalny, deterministyczny serwer udający stats.nba.com - do testów i benchmarków ingestu bez sieci.
+
+    python scripts/fake_nba_stats_server.py --port 8765 --latency 0.2 --failure-rate 0.1
+    NBA_STATS_BASE_URL="http://127.0.0.1:8765/stats/{endpoint}" python scripts/fetch_nba_players.py sync
+
+Obsługuje endpointy commonallplayers, commonteamroster i leaguegamelog z nagłówkami kolumn
+zgodnymi z nba_api. Opcjonalnie symuluje opóźnienia, losowe błędy
+oraz limit zapytań (odpowiedź 429 po przekroczeniu --max-rps).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from nba_api.stats.endpoints import commonallplayers, commonteamroster, leaguegamelog
+from nba_api.stats.static import teams
+
+PLAYERS_PER_TEAM = 15
+POSITIONS = ["G", "G", "F", "F", "C", "G-F", "F-C", "G", "F", "C", "G", "F", "G-F", "F", "C"]
+SEASON_START = date(2025, 10, 21)
+
+# nba_api.expected_data opisuje wariant drużynowy; wariant zawodników (PlayerOrTeam=P) ma dodatkowe kolumny
+PLAYER_GAME_LOG_HEADERS = [
+    "SEASON_ID", "PLAYER_ID", "PLAYER_NAME", "TEAM_ID", "TEAM_ABBREVIATION", "TEAM_NAME", "GAME_ID",
+    "GAME_DATE", "MATCHUP", "WL", "MIN", "FGM", "FGA", "FG_PCT", "FG3M", "FG3A", "FG3_PCT", "FTM", "FTA",
+    "FT_PCT", "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PTS", "PLUS_MINUS", "FANTASY_PTS",
+    "VIDEO_AVAILABLE",
+]
+
+
+def player_id(team_index: int, slot: int) -> int:
+    return 1_000_000 + team_index * 100 + slot
+
+
+def result_set(name, headers, rows):
+    return {"name": name, "headers": headers, "rowSet": rows}
+
+
+def build_row(headers, values):
+    return [values.get(header) for header in headers]
+
+
+class FakeNBAStats:
+    """Generuje deterministyczne dane ligi: 30 drużyn, PLAYERS_PER_TEAM zawodników, mecze co drugi dzień."""
+
+    def __init__(self):
+        self.teams = sorted(teams.get_teams(), key=lambda t: t["id"])
+
+    def common_all_players(self, params):
+        headers = commonallplayers.CommonAllPlayers.expected_data["CommonAllPlayers"]
+        rows = []
+        for team_index, team in enumerate(self.teams):
+            for slot in range(PLAYERS_PER_TEAM):
+                rows.append(build_row(headers, {
+                    "PERSON_ID": player_id(team_index, slot),
+                    "DISPLAY_FIRST_LAST": f"{team['nickname']} Player {slot + 1}",
+                    "DISPLAY_LAST_COMMA_FIRST": f"Player {slot + 1}, {team['nickname']}",
+                    "ROSTERSTATUS": 1,
+                    "TEAM_ID": team["id"],
+                    "TEAM_CITY": team["city"],
+                    "TEAM_NAME": team["nickname"],
+                    "TEAM_ABBREVIATION": team["abbreviation"],
+                }))
+        return {"resultSets": [result_set("CommonAllPlayers", headers, rows)]}
+
+    def common_team_roster(self, params):
+        team_id = int(params.get("TeamID", 0))
+        team_index = next(i for i, t in enumerate(self.teams) if t["id"] == team_id)
+        headers = commonteamroster.CommonTeamRoster.expected_data["CommonTeamRoster"]
+        rows = [
+            build_row(headers, {
+                "TeamID": team_id,
+                "SEASON": params.get("Season"),
+                "PLAYER": f"{self.teams[team_index]['nickname']} Player {slot + 1}",
+                "POSITION": POSITIONS[slot % len(POSITIONS)],
+                "PLAYER_ID": player_id(team_index, slot),
+            })
+            for slot in range(PLAYERS_PER_TEAM)
+        ]
+        coaches = commonteamroster.CommonTeamRoster.expected_data["Coaches"]
+        return {"resultSets": [result_set("CommonTeamRoster", headers, rows), result_set("Coaches", coaches, [])]}
+
+    def game_log_rows(self, day: date):
+        """Wiersze box score dla jednego dnia: drużyny o parzystym/nieparzystym indeksie grają na zmianę."""
+        headers = PLAYER_GAME_LOG_HEADERS
+        day_number = (day - SEASON_START).days
+        if day_number < 0:
+            return []
+        rows = []
+        playing = [i for i in range(len(self.teams)) if i % 2 == day_number % 2]
+        for game_index, (home, away) in enumerate(zip(playing[::2], playing[1::2])):
+            game_id = f"00225{day_number:03d}{game_index:02d}"
+            for team_index in (home, away):
+                for slot in range(PLAYERS_PER_TEAM - 3):
+                    pid = player_id(team_index, slot)
+                    rng = random.Random(zlib.crc32(f"{pid}-{game_id}".encode()))
+                    rebounds = rng.randint(0, 14)
+                    rows.append(build_row(headers, {
+                        "SEASON_ID": "22025",
+                        "PLAYER_ID": pid,
+                        "PLAYER_NAME": f"{self.teams[team_index]['nickname']} Player {slot + 1}",
+                        "TEAM_ID": self.teams[team_index]["id"],
+                        "TEAM_ABBREVIATION": self.teams[team_index]["abbreviation"],
+                        "GAME_ID": game_id,
+                        "GAME_DATE": day.isoformat(),
+                        "MIN": rng.randint(5, 40),
+                        "FGM": rng.randint(0, 12),
+                        "FGA": rng.randint(12, 22),
+                        "FG3M": rng.randint(0, 5),
+                        "FTM": rng.randint(0, 8),
+                        "FTA": rng.randint(8, 10),
+                        "OREB": rebounds // 3,
+                        "DREB": rebounds - rebounds // 3,
+                        "REB": rebounds,
+                        "AST": rng.randint(0, 12),
+                        "STL": rng.randint(0, 4),
+                        "BLK": rng.randint(0, 4),
+                        "TOV": rng.randint(0, 6),
+                        "PF": rng.randint(0, 6),
+                        "PTS": rng.randint(0, 40),
+                    }))
+        return rows
+
+    def league_game_log(self, params):
+        headers = PLAYER_GAME_LOG_HEADERS if params.get("PlayerOrTeam") == "P" else leaguegamelog.LeagueGameLog.expected_data["LeagueGameLog"]
+        date_from = parse_date(params.get("DateFrom")) or SEASON_START
+        date_to = parse_date(params.get("DateTo")) or date.today()
+        rows = []
+        day = date_to
+        # Jak w prawdziwym API: najnowsze mecze pierwsze
+        while day >= date_from:
+            rows.extend(self.game_log_rows(day))
+            day -= timedelta(days=1)
+        return {"resultSets": [result_set("LeagueGameLog", headers, rows)]}
+
+
+def parse_date(value):
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    return None
+
+
+def make_handler(data: FakeNBAStats, latency: float, failure_rate: float, max_rps: float, request_log=None):
+    routes = {
+        "commonallplayers": data.common_all_players,
+        "commonteamroster": data.common_team_roster,
+        "leaguegamelog": data.league_game_log,
+    }
+    lock = threading.Lock()
+    recent_requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            endpoint = url.path.rstrip("/").split("/")[-1].lower()
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+            if max_rps:
+                with lock:
+                    now = time.monotonic()
+                    recent_requests[:] = [t for t in recent_requests if now - t < 1.0]
+                    throttled = len(recent_requests) >= max_rps
+                    recent_requests.append(now)
+                if throttled:
+                    return self.reply(429, {"Message": "Too many requests"})
+            if latency:
+                time.sleep(latency)
+            if failure_rate and random.random() < failure_rate:
+                return self.reply(500, {"Message": "An error has occurred."})
+            if endpoint not in routes:
+                return self.reply(404, {"Message": f"Unknown endpoint {endpoint}"})
+            self.reply(200, routes[endpoint](params))
+
+        def reply(self, status_code, payload):
+            if request_log is not None:
+                with lock:
+                    request_log.append((time.monotonic(), urlparse(self.path).path, status_code))
+            body = json.dumps(payload).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 8765, latency: float = 0.0, failure_rate: float = 0.0, max_rps: float = 0.0):
+    """
+    Tworzy serwer (nieuruchomiony); wywołaj serve_forever() lub uruchom w wątku.
+    server.request_log to lista (czas monotonic, ścieżka, status) wszystkich odpowiedzi - do asercji w testach.
+    Port 0 wybiera wolny port (server.server_address).
+    """
+    request_log = []
+    handler = make_handler(FakeNBAStats(), latency, failure_rate, max_rps, request_log)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.request_log = request_log
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake stats.nba.com server for offline ingest runs.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of a 500 response")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Return 429 above this many requests per second")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.failure_rate, args.max_rps)
+    print(f"Fake NBA stats server listening on http://127.0.0.1:{args.port}/stats/{{endpoint}}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
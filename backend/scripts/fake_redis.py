@@ -0,0 +1,46 @@
+"""
+Minimalny odpowiednik klienta redis-py w pamięci procesu (get / set z ex / delete / scan_iter).
+
+Pozwala uruchomić RedisResponseCache (response_cache.py) bez serwera Redis:
+
+    RESPONSE_CACHE_BACKEND=fake-redis uvicorn main:app
+"""
+import fnmatch
+import threading
+import time
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, name):
+        with self._lock:
+            return self._alive(name)
+
+    def set(self, name, value, ex=None):
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    def scan_iter(self, match=None):
+        with self._lock:
+            keys = [key for key in list(self._data) if self._alive(key) is not None]
+        return iter(key for key in keys if match is None or fnmatch.fnmatchcase(key, match))
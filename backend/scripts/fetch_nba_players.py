@@ -1,177 +1,421 @@
 from nba_api.stats.endpoints import commonallplayers, commonteamroster, leaguegamelog
+from nba_api.stats.library.http import NBAStatsHTTP
 from nba_api.stats.static import teams
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+import pandas as pd
+import random
+import threading
 import time
 import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import Player, PlayerGameStats, User, SessionLocal, create_tables
+import bulk
+import scoring
+import standings
+import versions
+from scripts.nba_cache import fetch_endpoint
 
 MAX_WORKERS = 5
 BATCH_SIZE = 20  # liczba graczy na batch
 SEASON = "2025-26"
 
+ROSTER_COLUMNS = ["PLAYER_ID", "POSITION"]
+GAME_LOG_COLUMNS = ["PLAYER_ID", "GAME_ID", "GAME_DATE"] + list(scoring.BOX_SCORE_COLUMNS.values())
+
+# Limit zapytań do stats.nba.com (wspólny dla wszystkich wątków) i ponawianie z wykładniczym backoffem
+REQUESTS_PER_SECOND = float(os.getenv("NBA_API_REQUESTS_PER_SECOND", "2"))
+MAX_RETRIES = int(os.getenv("NBA_API_MAX_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = float(os.getenv("NBA_API_BACKOFF_BASE_SECONDS", "1.0"))
+REQUEST_TIMEOUT = int(os.getenv("NBA_API_TIMEOUT", "30"))
+CATCH_UP_MAX_DAYS = int(os.getenv("CATCH_UP_MAX_DAYS", "14"))
+
+# Czas ważności odpowiedzi w dyskowym cache (scripts/nba_cache.py)
+PLAYERS_CACHE_TTL = int(os.getenv("NBA_CACHE_PLAYERS_TTL", str(12 * 3600)))
+GAME_LOG_CACHE_TTL = int(os.getenv("NBA_CACHE_GAME_LOG_TTL", "3600"))
+
+# Pozwala skierować nba_api na lokalny serwer (np. scripts/fake_nba_stats_server.py)
+if os.getenv("NBA_STATS_BASE_URL"):
+    NBAStatsHTTP.base_url = os.getenv("NBA_STATS_BASE_URL")
+
+
+class TokenBucket:
+    """Prosty, wątkowo bezpieczny token bucket: średnio `rate` zapytań/s, maksymalnie `capacity` naraz."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+rate_limiter = TokenBucket(rate=REQUESTS_PER_SECOND, capacity=MAX_WORKERS)
+
+
+def call_with_retries(fetch, description):
+    """Wywołuje `fetch()`, ponawiając błędy z wykładniczym backoffem (z jitterem)."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return fetch()
+        except Exception as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = BACKOFF_BASE_SECONDS * (2 ** attempt) * (1 + random.random() / 2)
+            print(f"Request for {description} failed ({e}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+def fetch_team_roster(team, refresh=False):
+    """Pobiera skład jednej drużyny (z cache, limitem zapytań i ponawianiem; refresh=True z pominięciem cache)."""
+    return call_with_retries(
+        lambda: fetch_endpoint(
+            commonteamroster.CommonTeamRoster, PLAYERS_CACHE_TTL, rate_limiter.acquire, refresh=refresh,
+            team_id=team["id"], timeout=REQUEST_TIMEOUT
+        ).get_data_frames()[0],
+        f"roster of {team['full_name']}",
+    )
+
+
+def fetch_all_rosters(team_list, progress=None, refresh=False):
+    """
+    Pobiera składy wszystkich drużyn równolegle (MAX_WORKERS wątków, wspólny rate_limiter).
+    Zwraca DataFrame z kolumnami PLAYER_ID, POSITION.
+    """
+    rosters = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="roster") as pool:
+        futures = {pool.submit(fetch_team_roster, t, refresh): t for t in team_list}
+        for future in as_completed(futures):
+            t = futures[future]
+            try:
+                roster = future.result()
+            except Exception as e:
+                print(f"Could not fetch roster for team {t['full_name']}: {e}")
+                if progress:
+                    progress.error(f"Could not fetch roster for team {t['full_name']}: {e}")
+                continue
+            rosters.append(roster[ROSTER_COLUMNS])
+            if progress:
+                progress.increment(teams_fetched=1)
+    if not rosters:
+        return pd.DataFrame(columns=ROSTER_COLUMNS)
+    return pd.concat(rosters, ignore_index=True)
+
+
+def select_game_records(df, player_ids):
+    """
+    Wybiera z LeagueGameLog wiersze podanych zawodników, po jednym na parę (zawodnik, mecz).
+    Zwraca listę rekordów (słowników) z kolumnami GAME_LOG_COLUMNS.
+    """
+    df = df[df["PLAYER_ID"].isin(player_ids)].drop_duplicates(subset=["PLAYER_ID", "GAME_ID"], keep="first")
+    return df[GAME_LOG_COLUMNS].to_dict("records")
+
 
-def fetch_latest_game_logs(player_ids, target_date):
+def build_player_records(all_players_df, rosters_df):
     """
-    Pobiera statystyki wszystkich graczy dla konkretnego dnia jednym zapytaniem.
-    Zwraca dict {player_id: row} z ostatniego meczu danego dnia.
+    Łączy CommonAllPlayers ze składami drużyn (pozycje) i zwraca listę słowników
+    gotowych do zapisu w tabeli players.
+    """
+    rosters_df = rosters_df.drop_duplicates(subset="PLAYER_ID", keep="last")
+    merged = all_players_df[["PERSON_ID", "DISPLAY_FIRST_LAST", "ROSTERSTATUS", "TEAM_ABBREVIATION"]].merge(
+        rosters_df, how="left", left_on="PERSON_ID", right_on="PLAYER_ID"
+    )
+    players = pd.DataFrame({
+        "id": merged["PERSON_ID"],
+        "full_name": merged["DISPLAY_FIRST_LAST"],
+        "is_active": merged["ROSTERSTATUS"] == 1,
+        "team_name": merged["TEAM_ABBREVIATION"],
+        "position": merged["POSITION"].fillna("N/A"),
+    })
+    return players.to_dict("records")
+
+
+def fetch_game_logs(player_ids, date_from, date_to, progress=None, refresh=False):
+    """
+    Pobiera statystyki wszystkich graczy z zakresu dat (YYYY-MM-DD) jednym zapytaniem.
+    Zwraca listę rekordów meczów (patrz select_game_records).
     """
     try:
-        df = leaguegamelog.LeagueGameLog(
-            player_or_team_abbreviation="P",
-            date_from_nullable=target_date,
-            date_to_nullable=target_date,
-            season=SEASON,
-            timeout=60
-        ).get_data_frames()[0]
-
-        player_latest_game = {}
-        for _, row in df.iterrows():
-            pid = row["PLAYER_ID"]
-            if pid in player_ids:
-                # zostawiamy tylko ostatni mecz danego dnia
-                if pid not in player_latest_game:
-                    player_latest_game[pid] = row
-        return player_latest_game
+        df = call_with_retries(
+            lambda: fetch_endpoint(
+                leaguegamelog.LeagueGameLog,
+                GAME_LOG_CACHE_TTL,
+                rate_limiter.acquire,
+                refresh=refresh,
+                player_or_team_abbreviation="P",
+                date_from_nullable=date_from,
+                date_to_nullable=date_to,
+                season=SEASON,
+                timeout=60
+            ).get_data_frames()[0],
+            f"game log for {date_from}..{date_to}",
+        )
+
+        return select_game_records(df, player_ids)
 
     except Exception as e:
         print(f"Failed to fetch game logs: {e}")
-        return {}
+        if progress:
+            progress.error(f"Failed to fetch game logs: {e}")
+        return []
 
 
-def sync_all_players_from_api():
+def sync_all_players_from_api(progress=None, refresh=False):
     """
-    Sync wszystkich aktywnych zawodników z API
+    Sync wszystkich aktywnych zawodników z API.
+    `progress` (opcjonalnie, np. jobs.JobProgress) otrzymuje liczniki postępu i błędy.
+    `refresh=True` pobiera składy z API z pominięciem dyskowego cache (synchronizacja na żądanie).
     """
     print("Syncing all players from NBA API...")
     db = SessionLocal()
     try:
-        all_players_df = commonallplayers.CommonAllPlayers(is_only_current_season=1).get_data_frames()[0]
+        all_players_df = call_with_retries(
+            lambda: fetch_endpoint(
+                commonallplayers.CommonAllPlayers, PLAYERS_CACHE_TTL, rate_limiter.acquire, refresh=refresh,
+                is_only_current_season=1, timeout=REQUEST_TIMEOUT
+            ).get_data_frames()[0],
+            "all players",
+        )
 
         team_list = teams.get_teams()
-        roster_data = {}
         print("Fetching team rosters to get player positions...")
-        for t in team_list:
-            try:
-                roster = commonteamroster.CommonTeamRoster(team_id=t["id"]).get_data_frames()[0]
-                for _, row in roster.iterrows():
-                    roster_data[row["PLAYER_ID"]] = row.get("POSITION")
-                time.sleep(1.0)
-            except Exception as e:
-                print(f"Could not fetch roster for team {t['full_name']}: {e}")
+        rosters_df = fetch_all_rosters(team_list, progress=progress, refresh=refresh)
+        player_records = build_player_records(all_players_df, rosters_df)
 
         print("Updating database with player info...")
-        added_count = 0
-        updated_count = 0
-        db_players = {p.id: p for p in db.query(Player).all()}
-
-        for _, p_row in all_players_df.iterrows():
-            player_id = p_row["PERSON_ID"]
-            position = roster_data.get(player_id, "N/A")
-
-            if player_id in db_players:
-                player = db_players[player_id]
-                player.full_name = p_row["DISPLAY_FIRST_LAST"]
-                player.is_active = p_row["ROSTERSTATUS"] == 1
-                player.team_name = p_row["TEAM_ABBREVIATION"]
-                player.position = position
-                updated_count += 1
-            else:
-                new_player = Player(
-                    id=player_id,
-                    full_name=p_row["DISPLAY_FIRST_LAST"],
-                    is_active=p_row["ROSTERSTATUS"] == 1,
-                    team_name=p_row["TEAM_ABBREVIATION"],
-                    position=position,
-                )
-                db.add(new_player)
-                added_count += 1
+        existing_ids = set(db.scalars(select(Player.id)))
+        added_count = sum(1 for record in player_records if record["id"] not in existing_ids)
+        updated_count = len(player_records) - added_count
+        bulk.upsert_players(db, player_records)
+        versions.bump(db, versions.STATS)
         
         db.commit()
+        if progress:
+            progress.increment(players_upserted=added_count + updated_count)
         print(f"Sync completed. Added: {added_count}, Updated: {updated_count}")
 
     except Exception as e:
         print(f"An error occurred during player sync: {e}")
+        if progress:
+            progress.error(f"Player sync failed: {e}")
         db.rollback()
     finally:
         db.close()
 
 
-def update_stats_for_active_players():
+def update_stats_for_active_players(progress=None, date_from=None, date_to=None, refresh=False):
     """
     Aktualizacja fantasy points dla aktywnych zawodników.
-    Pobiera statystyki wszystkich graczy z ostatniego dnia jednym zapytaniem.
+    Pobiera statystyki wszystkich graczy z podanego zakresu dat (domyślnie: wczoraj w strefie dat meczów)
+    jednym zapytaniem i zapisuje brakujące mecze w jednej transakcji. `refresh=True` pomija dyskowy cache.
     """
-    print("Updating stats using single daily query...")
+    print("Updating stats using single game log query...")
     db = SessionLocal()
     try:
-        active_players = db.query(Player).options(joinedload(Player.game_stats), joinedload(Player.users)).filter(Player.is_active == True).all()
-        if not active_players:
+        # Tylko id - historia meczów nie jest potrzebna, średnie liczone są z agregatów na wierszu players
+        player_ids = db.scalars(select(Player.id).where(Player.is_active == True)).all()
+        if not player_ids:
             print("No active players found.")
             return
 
-        player_map = {p.id: p for p in active_players}
-        player_ids = list(player_map.keys())
         total_players = len(player_ids)
         print(f"Active players: {total_players}")
 
-        # Ustalamy datę ostatniego dnia (UTC)
-        target_date = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
-        print(f"Fetching games for {target_date}...")
+        # Domyślnie ostatni dzień (w strefie dat meczów, jak daty członkostw w składach)
+        yesterday = (scoring.game_day() - timedelta(days=1)).isoformat()
+        date_from = date_from or yesterday
+        date_to = date_to or max(date_from, yesterday)
+        print(f"Fetching games for {date_from}..{date_to}...")
 
-        latest_games = fetch_latest_game_logs(player_ids, target_date)
+        game_logs = fetch_game_logs(player_ids, date_from, date_to, progress=progress, refresh=refresh)
 
-        updated_count = 0
+        # Pełny box score i punkty fantasy według aktualnych reguł punktacji
+        game_records = scoring.build_game_records(game_logs, scoring.load_scoring_rules(db))
 
-        for pid, latest_game in latest_games.items():
-            if latest_game is None:
-                continue
+        # Jeden INSERT ... ON CONFLICT DO NOTHING na paczkę; zwraca tylko nowe mecze
+        new_games = bulk.insert_game_stats(db, game_records)
+        updated_count = len(new_games)
 
-            player = player_map[pid]
-            game_id = latest_game["GAME_ID"]
+        # aktualizacja średnich FP i danych z ostatniego meczu - O(1) na mecz
+        bulk.apply_new_games(db, new_games)
 
-            # sprawdzamy czy gra już jest w DB
-            existing_game = next((g for g in player.game_stats if g.game_id == game_id), None)
-            if existing_game:
-                continue
+        # aktualizacja punktów fantasy użytkowników, którzy mieli zawodnika w drużynie w dniu meczu
+        changed_user_ids = scoring.add_new_game_points(db, new_games)
+        print(f"Updated totals of {len(changed_user_ids)} users.")
+
+        db.flush()
+        standings.refresh_standings_for_users(db, changed_user_ids)
+        if new_games:
+            # nowe dane dla /players, /leaderboard itd. - unieważnia ETagi klientów
+            versions.bump(db, versions.STATS)
+        db.commit()
+        if progress:
+            progress.increment(games_ingested=updated_count)
+        print(f"\nUpdated stats for {updated_count} games.")
 
-            points = int(latest_game["PTS"])
-            rebounds = int(latest_game["REB"])
-            assists = int(latest_game["AST"])
-            fp = points + 1.2 * rebounds + 1.5 * assists
-
-            new_game = PlayerGameStats(
-                player_id=player.id,
-                game_id=game_id,
-                game_date=latest_game["GAME_DATE"],
-                points=points,
-                rebounds=rebounds,
-                assists=assists,
-                fantasy_points=fp
+    except Exception as e:
+        print(f"Error during stats update: {e}")
+        if progress:
+            progress.error(f"Stats update failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def catch_up_stats(progress=None):
+    """
+    Tryb nadrabiania: pobiera mecze od ostatniej zapisanej daty (włącznie, duplikaty są pomijane)
+    do wczoraj, maksymalnie CATCH_UP_MAX_DAYS dni wstecz.
+    """
+    db = SessionLocal()
+    try:
+        last_ingested = db.scalar(select(func.max(PlayerGameStats.game_date)))
+    finally:
+        db.close()
+
+    yesterday = scoring.game_day() - timedelta(days=1)
+    earliest = yesterday - timedelta(days=CATCH_UP_MAX_DAYS - 1)
+    date_from = earliest
+    if last_ingested:
+        date_from = max(earliest, min(yesterday, datetime.strptime(last_ingested, "%Y-%m-%d").date()))
+    print(f"Catching up stats since {date_from} (last ingested game date: {last_ingested or 'none'})")
+    update_stats_for_active_players(progress=progress, date_from=date_from.isoformat(), date_to=yesterday.isoformat())
+
+
+def backfill_last_game_columns():
+    """
+    Jednorazowe uzupełnienie kolumn last_game_fantasy_points / last_game_date
+    na podstawie historii w player_game_stats (jedno zapytanie UPDATE).
+    """
+    print("Backfilling last game columns...")
+    db = SessionLocal()
+    try:
+        updated = bulk.refresh_last_game_columns(db)
+        versions.bump(db, versions.STATS)
+        db.commit()
+        print(f"Backfill completed. Players updated: {updated}")
+    except Exception as e:
+        print(f"Error during last game backfill: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def rebuild_player_aggregates(verify_only=False):
+    """
+    Weryfikuje (i opcjonalnie odbudowuje) agregaty games_played / fantasy_points_sum /
+    average_fantasy_points na podstawie pełnej historii w player_game_stats.
+    """
+    print("Verifying player aggregates..." if verify_only else "Rebuilding player aggregates...")
+    db = SessionLocal()
+    try:
+        totals = (
+            select(
+                PlayerGameStats.player_id,
+                func.count(PlayerGameStats.id).label("games"),
+                func.coalesce(func.sum(PlayerGameStats.fantasy_points), 0.0).label("points"),
+            )
+            .group_by(PlayerGameStats.player_id)
+            .subquery()
+        )
+        mismatches = db.execute(
+            select(Player.id, Player.full_name, Player.games_played, totals.c.games, Player.fantasy_points_sum, totals.c.points)
+            .outerjoin(totals, totals.c.player_id == Player.id)
+            .where(
+                (Player.games_played != func.coalesce(totals.c.games, 0))
+                | (func.abs(Player.fantasy_points_sum - func.coalesce(totals.c.points, 0.0)) > 1e-6)
             )
-            db.add(new_game)
-            player.game_stats.append(new_game)
+        ).all()
+        for row in mismatches[:20]:
+            print(f"  - {row.full_name} ({row.id}): stored {row.games_played} games / {row.fantasy_points_sum:.2f} FP, "
+                  f"history {row.games or 0} games / {row.points or 0.0:.2f} FP")
+        print(f"Players with mismatched aggregates: {len(mismatches)}")
+        if verify_only:
+            return len(mismatches)
+
+        bulk.rebuild_player_aggregates(db)
+        versions.bump(db, versions.STATS)
+        db.commit()
+        print("Player aggregates rebuilt.")
+        return len(mismatches)
+    except Exception as e:
+        print(f"Error during aggregate rebuild: {e}")
+        db.rollback()
+    finally:
+        db.close()
 
-            # aktualizacja średnich FP
-            total_fp = sum(stat.fantasy_points for stat in player.game_stats)
-            player.average_fantasy_points = total_fp / len(player.game_stats)
 
-            # aktualizacja punktów fantasy użytkowników
-            for user in player.users:
-                user.total_fantasy_points += fp
-                print(f"      - Updating user {user.email}, new total FP: {user.total_fantasy_points:.2f}")
+def recompute_user_totals():
+    """
+    Przelicza sumy punktów wszystkich użytkowników z historii składów (uzupełniając
+    najpierw brakujące członkostwa) i odbudowuje tabele ligowe.
+    """
+    print("Recomputing user totals from roster history...")
+    db = SessionLocal()
+    try:
+        created = scoring.backfill_memberships(db, scoring.today())
+        print(f"Roster memberships created for current rosters without history: {created}")
+        scoring.recompute_user_totals(db)
+        standings.rebuild_all(db)
+        versions.bump(db, versions.STATS)
+        db.commit()
+        print("User totals recomputed.")
+    except Exception as e:
+        print(f"Error during user totals recomputation: {e}")
+        db.rollback()
+    finally:
+        db.close()
 
-            updated_count += 1
-            print(f"Updated {player.full_name} ({game_id}), avg FP: {player.average_fantasy_points:.2f}")
 
+def rescore_all_games(progress=None):
+    """
+    Przelicza punkty fantasy wszystkich zapisanych meczów według aktualnych reguł punktacji
+    (scoring_rules) oraz wszystkie pochodne: średnie zawodników, sumy użytkowników i tabele ligowe.
+    """
+    print("Re-scoring all games with current scoring rules...")
+    db = SessionLocal()
+    try:
+        rules = scoring.load_scoring_rules(db)
+        print("Scoring rules: " + ", ".join(f"{stat}={weight:g}" for stat, weight in rules.items() if weight))
+        started = time.perf_counter()
+        rescored = scoring.rescore_all(db, rules)
+        versions.bump(db, versions.STATS)
         db.commit()
-        print(f"\nUpdated stats for {updated_count} games.")
+        print(f"Re-scored {rescored} games in {time.perf_counter() - started:.2f}s.")
+    except Exception as e:
+        print(f"Error during re-scoring: {e}")
+        if progress:
+            progress.error(f"Re-scoring failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
 
+
+def rebuild_league_standings():
+    """Odbudowuje tabelę league_standings z członkostw w ligach i sum punktów użytkowników."""
+    print("Rebuilding league standings...")
+    db = SessionLocal()
+    try:
+        standings.rebuild_all(db)
+        db.commit()
+        print("League standings rebuilt.")
     except Exception as e:
-        print(f"Error during stats update: {e}")
+        print(f"Error during league standings rebuild: {e}")
         db.rollback()
     finally:
         db.close()
@@ -193,8 +437,37 @@ if __name__ == "__main__":
     elif "stats" in args:
         print("\n--- Running Stats Update Only ---")
         update_stats_for_active_players()
+    elif "stats-range" in args:
+        # python fetch_nba_players.py stats-range 2025-11-01 [2025-11-07]
+        range_args = args[args.index("stats-range") + 1:]
+        if not range_args:
+            print("Usage: python fetch_nba_players.py stats-range FROM [TO]  (dates as YYYY-MM-DD)")
+        else:
+            print(f"\n--- Running Stats Backfill {' .. '.join(range_args[:2])} ---")
+            update_stats_for_active_players(date_from=range_args[0], date_to=range_args[1] if len(range_args) > 1 else range_args[0])
+    elif "catch-up" in args:
+        print("\n--- Catching Up Missed Stats ---")
+        catch_up_stats()
+    elif "backfill" in args:
+        print("\n--- Running Last Game Backfill ---")
+        backfill_last_game_columns()
+    elif "verify-aggregates" in args:
+        print("\n--- Verifying Player Aggregates ---")
+        rebuild_player_aggregates(verify_only=True)
+    elif "aggregates" in args:
+        print("\n--- Rebuilding Player Aggregates ---")
+        rebuild_player_aggregates()
+    elif "recompute-totals" in args:
+        print("\n--- Recomputing User Totals ---")
+        recompute_user_totals()
+    elif "rescore" in args:
+        print("\n--- Re-scoring All Games ---")
+        rescore_all_games()
+    elif "standings" in args:
+        print("\n--- Rebuilding League Standings ---")
+        rebuild_league_standings()
     else:
         print(f"Invalid argument: {args[0]}")
-        print("Usage: python fetch_nba_players.py [sync|stats]")
+        print("Usage: python fetch_nba_players.py [sync|stats|stats-range FROM [TO]|catch-up|backfill|aggregates|verify-aggregates|recompute-totals|rescore|standings]")
 
     print("\nScript finished.")
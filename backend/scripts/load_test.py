@@ -0,0 +1,211 @@
+"""
+Test obciążeniowy endpointów odczytu: porównanie trybu synchronicznego i ASYNC_DB=true.
+
+    python scripts/load_test.py --compare [--concurrency 500] [--duration 15]
+    python scripts/load_test.py --url http://localhost:8000 --email user@example.com --password ...
+
+--compare uruchamia dwa razy uvicorn (jeden proces, bez --reload) na tymczasowej bazie SQLite
+z danymi testowymi i wypisuje przepustowość oraz opóźnienia (p50/p95/p99) obu trybów.
+Bez --compare obciąża już działający serwer podanymi danymi logowania.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Odczyty wykonywane przez frontend w czasie meczów
+ENDPOINTS = [
+    "/players",
+    "/me/team",
+    "/leaderboard",
+    "/leagues",
+    "/users/me/daily_fantasy_points",
+]
+
+LOAD_TEST_EMAIL = "loadtest@example.com"
+LOAD_TEST_PASSWORD = "loadtest-password"
+LEAGUE_SIZE = 10
+
+
+def seed_database(database_url, users=200, players=450, days=30):
+    """Wypełnia pustą bazę: zawodnicy z historią meczów, użytkownicy z drużynami i ligami po LEAGUE_SIZE osób."""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.append(BACKEND_DIR)
+    import auth
+    import bulk
+    import models
+    import scoring
+    import standings
+
+    models.create_tables()
+    db = models.SessionLocal()
+    try:
+        db.execute(models.Player.__table__.insert(), [
+            {"id": player_id, "full_name": f"Player {player_id}", "is_active": True, "position": "G",
+             "team_name": f"T{player_id % 30}", "average_fantasy_points": 0.0}
+            for player_id in range(1, players + 1)
+        ])
+        db.execute(models.PlayerGameStats.__table__.insert(), [
+            {"player_id": player_id, "game_id": f"G{day}", "game_date": f"2025-11-{day + 1:02d}",
+             "points": (player_id + day) % 35, "rebounds": day % 12, "assists": player_id % 9,
+             "fantasy_points": (player_id + day) % 35 + 1.2 * (day % 12) + 1.5 * (player_id % 9)}
+            for player_id in range(1, players + 1) for day in range(days)
+        ])
+        hashed_password = auth.get_password_hash(LOAD_TEST_PASSWORD)
+        db.execute(models.User.__table__.insert(), [
+            {"id": user_id, "email": LOAD_TEST_EMAIL if user_id == 1 else f"user{user_id}@example.com",
+             "nickname": f"user{user_id}", "hashed_password": hashed_password, "role": "user",
+             "total_fantasy_points": 0.0}
+            for user_id in range(1, users + 1)
+        ])
+        rosters = [
+            {"user_id": user_id, "player_id": (user_id * 7 + slot * 37) % players + 1}
+            for user_id in range(1, users + 1) for slot in range(10)
+        ]
+        db.execute(models.user_player_association.insert(), rosters)
+        db.execute(models.RosterMembership.__table__.insert(), [dict(row, added_on="2025-11-01") for row in rosters])
+        db.execute(models.League.__table__.insert(), [
+            {"id": league_id, "name": f"League {league_id}", "owner_id": league_id * LEAGUE_SIZE + 1,
+             "invite_code": f"LOAD{league_id:04d}"}
+            for league_id in range(users // LEAGUE_SIZE)
+        ])
+        db.execute(models.user_league_association.insert(), [
+            {"user_id": user_id, "league_id": (user_id - 1) // LEAGUE_SIZE} for user_id in range(1, users + 1)
+        ])
+        bulk.rebuild_player_aggregates(db)
+        bulk.refresh_last_game_columns(db)
+        scoring.recompute_user_totals(db)
+        standings.rebuild_all(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url, async_db):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, ASYNC_DB="true" if async_db else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(url + "/").status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start")
+
+
+async def login(client, email, password):
+    response = await client.post("/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_load(url, email, password, concurrency, duration):
+    """Każdy z `concurrency` klientów odpytuje kolejno ENDPOINTS aż do upływu `duration` sekund."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        headers = await login(client, email, password)
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def poll(worker_id):
+            nonlocal errors
+            request_number = worker_id
+            while time.perf_counter() < deadline:
+                path = ENDPOINTS[request_number % len(ENDPOINTS)]
+                request_number += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(poll(worker_id) for worker_id in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "errors": errors,
+    }
+
+
+def print_result(label, result):
+    print(f"{label:<8} {result['requests']:>9} {result['rps']:>9.1f} {result['p50']:>9.1f} "
+          f"{result['p95']:>9.1f} {result['p99']:>9.1f} {result['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compare", action="store_true", help="start the API in sync and async mode and compare")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", default=LOAD_TEST_EMAIL)
+    parser.add_argument("--password", default=LOAD_TEST_PASSWORD)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    header = f"{'mode':<8} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    if not args.compare:
+        result = asyncio.run(run_load(args.url, args.email, args.password, args.concurrency, args.duration))
+        print(header)
+        print_result("server", result)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = f"sqlite:///{os.path.join(tmp_dir, 'load_test.db')}"
+        print(f"Seeding {database_url}...")
+        seed_database(database_url)
+        results = {}
+        for label, async_db in (("sync", False), ("async", True)):
+            process, url = start_server(database_url, async_db)
+            try:
+                print(f"Running {label} mode: {args.concurrency} clients for {args.duration:.0f}s...")
+                results[label] = asyncio.run(
+                    run_load(url, LOAD_TEST_EMAIL, LOAD_TEST_PASSWORD, args.concurrency, args.duration)
+                )
+            finally:
+                process.terminate()
+                process.wait()
+
+    print()
+    print(header)
+    for label, result in results.items():
+        print_result(label, result)
+
+
+if __name__ == "__main__":
+    main()
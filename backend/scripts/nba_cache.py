@@ -0,0 +1,111 @@
+"""
+Dyskowy cache odpowiedzi nba_api (klucz: nazwa endpointu + parametry) z trybem odtwarzania.
+
+Tryby (zmienna NBA_CACHE_MODE):
+    cache  - (domyślny) świeży wpis jest zwracany bez zapytania; po upływie TTL odpowiedź jest
+             pobierana ponownie w całości (stats.nba.com nie obsługuje zapytań warunkowych),
+             a przy błędzie API zwracany jest nieaktualny wpis
+    record - zawsze pobiera z API i nadpisuje nagranie
+    replay - tylko nagrane odpowiedzi, bez sieci (brak wpisu = NBACacheMiss)
+    off    - cache wyłączony
+
+Wywołanie z refresh=True (np. synchronizacja zlecona przez administratora) działa w trybie cache
+jak record: pomija nagrane wpisy i nie wraca do nieaktualnych przy błędzie.
+
+Wpisy to pliki JSON w NBA_CACHE_DIR (domyślnie backend/data/nba_cache) z surową odpowiedzią,
+więc odtworzony endpoint przechodzi przez to samo parsowanie nba_api co odpowiedź z sieci.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from nba_api.stats.library.http import NBAStatsResponse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("NBA_CACHE_DIR", os.path.join(BASE_DIR, "data", "nba_cache"))
+CACHE_MODE = os.getenv("NBA_CACHE_MODE", "cache").lower()
+
+# Parametry, które nie wpływają na treść odpowiedzi
+NON_KEY_PARAMS = {"timeout", "proxy", "headers", "get_request"}
+
+
+class NBACacheMiss(Exception):
+    pass
+
+
+def cache_key(endpoint_cls, params) -> str:
+    key_params = {name: value for name, value in params.items() if name not in NON_KEY_PARAMS}
+    raw = json.dumps({"endpoint": endpoint_cls.endpoint, "params": key_params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+
+def _read_entry(key: str):
+    try:
+        with open(_entry_path(key), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_entry(key: str, endpoint_cls, params, response_text: str):
+    path = _entry_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        "endpoint": endpoint_cls.endpoint,
+        "params": {name: value for name, value in params.items() if name not in NON_KEY_PARAMS},
+        "fetched_at": time.time(),
+        "response": response_text,
+    }
+    # Zapis atomowy - równoległe wątki (np. pobieranie składów) nie zobaczą połowy pliku
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entry, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def _endpoint_from_entry(endpoint_cls, params, entry):
+    endpoint = endpoint_cls(**{**params, "get_request": False})
+    endpoint.nba_response = NBAStatsResponse(response=entry["response"], status_code=200, url=None)
+    endpoint.load_response()
+    return endpoint
+
+
+def fetch_endpoint(endpoint_cls, ttl_seconds: float, before_request=None, refresh: bool = False, **params):
+    """
+    Zwraca obiekt endpointu nba_api (np. commonteamroster.CommonTeamRoster) dla podanych parametrów,
+    korzystając z cache zgodnie z NBA_CACHE_MODE. `before_request` (np. limiter zapytań)
+    jest wywoływane tylko przed faktycznym zapytaniem do API. `refresh` wymusza pobranie z API.
+    """
+    def request():
+        if before_request:
+            before_request()
+        return endpoint_cls(**params)
+
+    mode = "record" if refresh and CACHE_MODE == "cache" else CACHE_MODE
+    if mode == "off":
+        return request()
+
+    key = cache_key(endpoint_cls, params)
+    entry = _read_entry(key) if mode != "record" else None
+
+    if entry is not None and (mode == "replay" or time.time() - entry["fetched_at"] < ttl_seconds):
+        return _endpoint_from_entry(endpoint_cls, params, entry)
+    if mode == "replay":
+        raise NBACacheMiss(f"No recorded response for {endpoint_cls.endpoint} {params}")
+
+    try:
+        endpoint = request()
+    except Exception as e:
+        if entry is None:
+            raise
+        print(f"Refreshing {endpoint_cls.endpoint} failed ({e}), serving cached response")
+        return _endpoint_from_entry(endpoint_cls, params, entry)
+
+    _write_entry(key, endpoint_cls, params, endpoint.nba_response.get_response())
+    return endpoint
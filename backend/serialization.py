@@ -0,0 +1,105 @@
+"""
+Szybka serializacja dużych list (/players, /leaderboard) prosto z krotek SQL do JSON (orjson).
+
+Ścieżka przez schemas (from_attributes na każdym obiekcie ORM, a potem kodowanie przez FastAPI)
+dominuje w czasie CPU tych endpointów. Tutaj kolumny są wybierane w kolejności pól schematów,
+a wiersze składane w słowniki bez ORM i bez walidacji - wynikowy JSON ma ten sam kształt co
+schemas.Player / schemas.User (porównanie: scripts/bench_serialization.py).
+"""
+from collections import defaultdict
+
+import orjson
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from models import League, Player, User, user_league_association, user_player_association
+
+# Kolumny w kolejności pól schemas.Player. Floaty rzutowane w SQL, bo SQLite zwraca liczby całkowite
+# zapisane w kolumnach Float jako int (Pydantic zamieniłby je na float)
+PLAYER_COLUMNS = (
+    ("full_name", Player.full_name),
+    ("position", Player.position),
+    ("team_name", Player.team_name),
+    ("average_fantasy_points", cast(func.coalesce(Player.average_fantasy_points, 0.0), Float)),
+    ("id", Player.id),
+    ("last_game_fantasy_points", cast(Player.last_game_fantasy_points, Float)),
+)
+
+# Kolumny w kolejności pól schemas.UserInLeague (początek schemas.User)
+USER_COLUMNS = (
+    ("email", User.email),
+    ("nickname", User.nickname),
+    ("id", User.id),
+    ("role", User.role),
+    ("total_fantasy_points", cast(User.total_fantasy_points, Float)),
+)
+
+LEAGUE_COLUMNS = (
+    ("name", League.name),
+    ("id", League.id),
+    ("owner_id", League.owner_id),
+    ("invite_code", League.invite_code),
+)
+
+PLAYER_FIELDS = tuple(name for name, _ in PLAYER_COLUMNS)
+USER_FIELDS = tuple(name for name, _ in USER_COLUMNS)
+LEAGUE_FIELDS = tuple(name for name, _ in LEAGUE_COLUMNS)
+
+
+def _columns(columns):
+    return [column for _, column in columns]
+
+
+def active_players(db: Session) -> list:
+    """Aktywni zawodnicy jako słowniki w kształcie schemas.Player."""
+    rows = db.execute(select(*_columns(PLAYER_COLUMNS)).where(Player.is_active == True))
+    return [dict(zip(PLAYER_FIELDS, row)) for row in rows]
+
+
+def leaderboard(db: Session) -> list:
+    """
+    Użytkownicy malejąco po punktach, w kształcie schemas.User (ze składami i ligami z członkami).
+    Cztery zapytania niezależnie od liczby użytkowników; słowniki lig są współdzielone między członkami.
+    """
+    users = [
+        dict(zip(USER_FIELDS, row))
+        for row in db.execute(select(*_columns(USER_COLUMNS)).order_by(User.total_fantasy_points.desc(), User.id))
+    ]
+    users_by_id = {user["id"]: user for user in users}
+
+    players_by_user = defaultdict(list)
+    rosters = db.execute(
+        select(user_player_association.c.user_id, *_columns(PLAYER_COLUMNS))
+        .join(Player, Player.id == user_player_association.c.player_id)
+        .order_by(user_player_association.c.user_id, Player.id)
+    )
+    for user_id, *player in rosters:
+        players_by_user[user_id].append(dict(zip(PLAYER_FIELDS, player)))
+
+    leagues = {
+        row[1]: dict(zip(LEAGUE_FIELDS, row), users=[])
+        for row in db.execute(select(*_columns(LEAGUE_COLUMNS)))
+    }
+    leagues_by_user = defaultdict(list)
+    memberships = db.execute(
+        select(user_league_association.c.user_id, user_league_association.c.league_id)
+        .order_by(user_league_association.c.league_id, user_league_association.c.user_id)
+    )
+    for user_id, league_id in memberships:
+        league = leagues.get(league_id)
+        member = users_by_id.get(user_id)
+        if league is None or member is None:
+            continue
+        league["users"].append(member)
+        leagues_by_user[user_id].append(league)
+
+    # Członkowie lig to płaskie słowniki użytkowników (schemas.UserInLeague), więc zagnieżdżone
+    # listy dokładamy dopiero do kopii na najwyższym poziomie
+    return [
+        dict(user, players=players_by_user[user["id"]], leagues=leagues_by_user[user["id"]])
+        for user in users
+    ]
+
+
+def dumps(rows) -> bytes:
+    return orjson.dumps(rows)
@@ -0,0 +1,108 @@
+"""
+Utrzymanie zmaterializowanej tabeli league_standings.
+
+Punkty w tabeli ligowej są kopią users.total_fantasy_points, a pozycje liczone są
+funkcją okna tylko dla lig, których dotyczy zmiana - odczyt strony tabeli ligowej
+to zwykły odczyt po indeksie (league_id, rank).
+"""
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models import LeagueStanding, User, user_league_association
+
+
+def rerank_leagues(db: Session, league_ids: Iterable[int]):
+    """Przelicza pozycje w podanych ligach jednym zapytaniem UPDATE ... FROM."""
+    league_ids = list(set(league_ids))
+    if not league_ids:
+        return
+    ranked = (
+        select(
+            LeagueStanding.league_id,
+            LeagueStanding.user_id,
+            func.rank().over(
+                partition_by=LeagueStanding.league_id,
+                order_by=LeagueStanding.points.desc()
+            ).label("new_rank"),
+        )
+        .where(LeagueStanding.league_id.in_(league_ids))
+        .subquery()
+    )
+    db.execute(
+        update(LeagueStanding)
+        .where(
+            LeagueStanding.league_id == ranked.c.league_id,
+            LeagueStanding.user_id == ranked.c.user_id,
+        )
+        .values(rank=ranked.c.new_rank)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_standings_for_users(db: Session, user_ids: Iterable[int]):
+    """
+    Kopiuje aktualne sumy punktów podanych użytkowników do tabel ligowych
+    i przelicza pozycje tylko w ligach, do których należą.
+    """
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return
+    user_points = (
+        select(User.total_fantasy_points)
+        .where(User.id == LeagueStanding.user_id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(LeagueStanding)
+        .where(LeagueStanding.user_id.in_(user_ids))
+        .values(points=user_points)
+        .execution_options(synchronize_session=False)
+    )
+    affected_leagues = db.execute(
+        select(LeagueStanding.league_id).where(LeagueStanding.user_id.in_(user_ids)).distinct()
+    ).scalars().all()
+    rerank_leagues(db, affected_leagues)
+
+
+def add_member(db: Session, league_id: int, user: User):
+    """Dodaje wiersz nowego członka ligi i przelicza pozycje w tej lidze."""
+    db.add(LeagueStanding(league_id=league_id, user_id=user.id, points=user.total_fantasy_points or 0.0))
+    db.flush()
+    rerank_leagues(db, [league_id])
+
+
+def remove_league(db: Session, league_id: int):
+    """Usuwa tabelę ligową usuwanej ligi."""
+    db.execute(delete(LeagueStanding).where(LeagueStanding.league_id == league_id))
+
+
+def remove_user(db: Session, user_id: int):
+    """Usuwa użytkownika ze wszystkich tabel ligowych i przelicza pozycje w jego ligach."""
+    league_ids = db.execute(
+        select(LeagueStanding.league_id).where(LeagueStanding.user_id == user_id)
+    ).scalars().all()
+    db.execute(delete(LeagueStanding).where(LeagueStanding.user_id == user_id))
+    rerank_leagues(db, league_ids)
+
+
+def rebuild_all(db: Session):
+    """Odbudowuje całą tabelę league_standings z członkostw w ligach (np. po migracji)."""
+    db.execute(delete(LeagueStanding))
+    db.execute(
+        insert(LeagueStanding).from_select(
+            ["league_id", "user_id", "points", "rank"],
+            select(
+                user_league_association.c.league_id,
+                user_league_association.c.user_id,
+                User.total_fantasy_points,
+                func.rank().over(
+                    partition_by=user_league_association.c.league_id,
+                    order_by=User.total_fantasy_points.desc()
+                ),
+            )
+            .join(User, User.id == user_league_association.c.user_id)
+            .distinct()
+        )
+    )
@@ -0,0 +1,62 @@
+"""
+Wspólna konfiguracja testów: moduły backendu na ścieżce importu i tymczasowa baza SQLite
+zamiast DATABASE_URL z otoczenia - testy nigdy nie dotykają prawdziwej bazy.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Ustawiane przed pierwszym importem models (silnik tworzony jest przy imporcie)
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="nba-fantasy-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'default.db')}"
+# Najmniejszy koszt bcrypt - testy API tworzą i logują użytkowników
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+@pytest.fixture
+def api_db():
+    """Pusta baza testowa (models.engine) po wszystkich migracjach i wyczyszczone cache procesu."""
+    import auth, migrations, models, response_cache, versions
+    models.Base.metadata.drop_all(models.engine)
+    models.Base.metadata.create_all(models.engine)
+    migrations.run(models.engine)
+    versions.version_cache.clear()
+    auth.user_cache.clear()
+    response_cache.clear()
+    yield models.engine
+    versions.version_cache.clear()
+    auth.user_cache.clear()
+    response_cache.clear()
+
+
+@pytest.fixture
+def client(api_db):
+    """Klient HTTP aplikacji (bez zdarzeń startowych - baza jest już przygotowana przez api_db)."""
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def make_user(api_db):
+    """Tworzy użytkownika i zwraca (id, nagłówki z tokenem Bearer)."""
+    import auth, models
+
+    def make(email, role="user", total_fantasy_points=0.0, password="secret"):
+        with models.SessionLocal() as db:
+            user = models.User(
+                email=email,
+                hashed_password=auth.get_password_hash(password),
+                role=role,
+                total_fantasy_points=total_fantasy_points,
+            )
+            db.add(user)
+            db.commit()
+            return user.id, {"Authorization": f"Bearer {auth.create_user_token(user)}"}
+
+    return make
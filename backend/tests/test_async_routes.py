@@ -0,0 +1,69 @@
+"""
+Ścieżka asynchroniczna (ASYNC_DB=true): endpointy z async_routes.py, zależność auth.get_current_user_async
+i liczniki wersji czytane bez puli wątków - z version_cache albo silnikiem asynchronicznym.
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import async_db
+import models
+import response_cache
+import versions
+
+
+def no_threadpool(*args, **kwargs):
+    raise AssertionError("the async path must not use the threadpool")
+
+
+@pytest.fixture
+def async_path(api_db, monkeypatch):
+    monkeypatch.setattr(async_db, "ASYNC_DB", True)
+    monkeypatch.setattr(versions, "run_in_threadpool", no_threadpool)
+    monkeypatch.setattr(response_cache, "run_in_threadpool", no_threadpool)
+    monkeypatch.setattr(async_db, "_engine", None)
+    monkeypatch.setattr(async_db, "_sessionmaker", None)
+    yield
+
+
+def test_version_lookup_uses_the_async_engine(async_path):
+    with models.SessionLocal() as db:
+        versions.bump(db, versions.STATS)
+        db.commit()
+
+    async def lookup():
+        try:
+            return await versions.current_versions_async((versions.STATS, versions.USERS))
+        finally:
+            await async_db.dispose()
+
+    assert asyncio.run(lookup()) == {versions.STATS: 1, versions.USERS: 0}
+    # Trafienie w version_cache nie pyta już bazy
+    assert versions.version_cache.get((versions.STATS, versions.USERS)) == {versions.STATS: 1, versions.USERS: 0}
+
+
+def test_async_players_endpoint_serves_and_caches_the_player_list(async_path, make_user):
+    import async_routes
+
+    app = FastAPI()
+    app.include_router(async_routes.router)
+    # Silnik async jest zamykany w pętli klienta testowego, zanim ta zostanie zamknięta
+    app.add_event_handler("shutdown", async_db.dispose)
+    with TestClient(app) as client:
+        with models.engine.begin() as connection:
+            connection.execute(insert(models.Player), [
+                {"id": 1, "full_name": "Ada", "is_active": True, "average_fantasy_points": 12.5},
+                {"id": 2, "full_name": "Bo", "is_active": False, "average_fantasy_points": 0.0},
+            ])
+        _, headers = make_user("async@example.com")
+
+        response = client.get("/players", headers=headers)
+        assert response.status_code == 200
+        assert [player["id"] for player in response.json()] == [1]
+        hits = response_cache.stats.hits
+        assert client.get("/players", headers=headers).json() == response.json()
+        assert response_cache.stats.hits == hits + 1
+
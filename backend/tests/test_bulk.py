@@ -0,0 +1,73 @@
+"""
+Zbiorczy zapis ingestu (bulk.py): upsert zawodników, wstawianie meczów z pominięciem duplikatów
+i agregaty zawodników liczone przyrostowo tak samo jak przy pełnej odbudowie.
+"""
+import pytest
+from sqlalchemy import create_engine, create_mock_engine, select
+from sqlalchemy.orm import Session
+
+import bulk
+from models import Base, Player, PlayerGameStats
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def game(player_id, game_id, game_date, fantasy_points):
+    return {"player_id": player_id, "game_id": game_id, "game_date": game_date, "fantasy_points": fantasy_points}
+
+
+def test_upsert_players_inserts_new_and_updates_existing_rows(db):
+    bulk.upsert_players(db, [
+        {"id": 1, "full_name": "Ada", "is_active": True, "team_name": "A", "position": "G"},
+        {"id": 2, "full_name": "Bo", "is_active": True, "team_name": "B", "position": "F"},
+    ])
+    bulk.upsert_players(db, [{"id": 2, "full_name": "Bo Jr", "is_active": False, "team_name": "C", "position": "C"}])
+
+    rows = db.execute(select(Player.id, Player.full_name, Player.is_active, Player.team_name).order_by(Player.id)).all()
+    assert rows == [(1, "Ada", True, "A"), (2, "Bo Jr", False, "C")]
+
+
+def test_insert_game_stats_returns_only_new_games(db):
+    bulk.upsert_players(db, [{"id": 1, "full_name": "Ada", "is_active": True, "team_name": "A", "position": "G"}])
+    first = bulk.insert_game_stats(db, [game(1, "G1", "2025-01-01", 10.0), game(1, "G2", "2025-01-02", 20.0)])
+    second = bulk.insert_game_stats(db, [game(1, "G2", "2025-01-02", 99.0), game(1, "G3", "2025-01-03", 30.0)])
+
+    assert sorted(row.game_id for row in first) == ["G1", "G2"]
+    assert [row.game_id for row in second] == ["G3"]
+    # Istniejący mecz nie jest nadpisywany
+    assert db.scalar(select(PlayerGameStats.fantasy_points).where(PlayerGameStats.game_id == "G2")) == 20.0
+
+
+def test_incremental_aggregates_match_a_full_rebuild(db):
+    bulk.upsert_players(db, [
+        {"id": player_id, "full_name": f"P{player_id}", "is_active": True, "team_name": "A", "position": "G"}
+        for player_id in (1, 2)
+    ])
+    for batch in (
+        [game(1, "G2", "2025-01-02", 20.0), game(2, "G1", "2025-01-01", 5.0)],
+        # Zaległy mecz z wcześniejszego dnia nie zmienia danych ostatniego meczu
+        [game(1, "G1", "2025-01-01", 10.0), game(1, "G3", "2025-01-03", 30.0)],
+    ):
+        bulk.apply_new_games(db, bulk.insert_game_stats(db, batch))
+
+    columns = (Player.id, Player.games_played, Player.fantasy_points_sum, Player.average_fantasy_points,
+               Player.last_game_date, Player.last_game_fantasy_points)
+    incremental = db.execute(select(*columns).order_by(Player.id)).all()
+    assert incremental == [(1, 3, 60.0, 20.0, "2025-01-03", 30.0), (2, 1, 5.0, 5.0, "2025-01-01", 5.0)]
+
+    bulk.rebuild_player_aggregates(db)
+    bulk.refresh_last_game_columns(db)
+    assert db.execute(select(*columns).order_by(Player.id)).all() == incremental
+
+
+def test_dialect_insert_rejects_unsupported_dialects():
+    session = Session(bind=create_mock_engine("mysql://", lambda *args, **kwargs: None))
+    with pytest.raises(ValueError, match="unsupported dialect: mysql"):
+        bulk.dialect_insert(session, Player)
@@ -0,0 +1,62 @@
+"""
+ETag i warunkowe GET (versions.py, middleware conditional_get): 304 przy niezmienionych danych,
+nowy ETag po zmianie danych, od których zależy endpoint, i osobne ETagi użytkowników.
+"""
+import pytest
+from sqlalchemy import insert
+
+import models
+
+
+@pytest.fixture
+def users(client, make_user):
+    with models.engine.begin() as connection:
+        connection.execute(insert(models.Player), [
+            {"id": player_id, "full_name": f"Player {player_id}", "is_active": True, "position": "G",
+             "average_fantasy_points": 0.0}
+            for player_id in (1, 2)
+        ])
+    return make_user("one@example.com")[1], make_user("two@example.com")[1]
+
+
+def etag(client, path, headers):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    return response.headers["ETag"]
+
+
+def revalidate(client, path, headers, tag):
+    return client.get(path, headers={**headers, "If-None-Match": tag}).status_code
+
+
+def test_unchanged_data_is_not_modified(client, users):
+    one, _ = users
+    tag = etag(client, "/players", one)
+    assert revalidate(client, "/players", one, tag) == 304
+    assert revalidate(client, "/players", one, 'W/"other"') == 200
+    # Inne parametry zapytania to inny ETag
+    assert etag(client, "/players/catalogue", one) != etag(client, "/players/catalogue?sort_by=name", one)
+
+
+def test_roster_change_invalidates_only_the_affected_responses(client, users):
+    one, two = users
+    team_one, team_two = etag(client, "/me/team", one), etag(client, "/me/team", two)
+    players = etag(client, "/players", one)
+
+    assert client.post("/me/team/players/1", headers=one).status_code == 200
+
+    assert revalidate(client, "/me/team", one, team_one) == 200
+    assert revalidate(client, "/me/team", two, team_two) == 304
+    assert revalidate(client, "/players", one, players) == 304
+    assert [player["id"] for player in client.get("/me/team", headers=one).json()] == [1]
+
+
+def test_etag_is_per_user(client, users):
+    one, two = users
+    assert etag(client, "/me/team", one) != etag(client, "/me/team", two)
+    assert revalidate(client, "/me/team", two, etag(client, "/me/team", one)) == 200
+
+
+def test_requests_without_a_valid_token_are_not_answered_from_etags(client, users):
+    assert client.get("/players", headers={"If-None-Match": "*"}).status_code == 401
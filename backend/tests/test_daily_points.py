@@ -0,0 +1,54 @@
+"""
+Punkty dnia (/users/me/daily_fantasy_points): liczą się mecze zawodników, którzy byli w drużynie w dniu meczu.
+"""
+import pytest
+from sqlalchemy import insert
+
+import models
+import scoring
+
+
+@pytest.fixture
+def headers(client, make_user, monkeypatch):
+    with models.engine.begin() as connection:
+        connection.execute(insert(models.Player), [
+            {"id": 1, "full_name": "Ada", "is_active": True, "position": "G", "average_fantasy_points": 0.0},
+            {"id": 2, "full_name": "Bo", "is_active": True, "position": "F", "average_fantasy_points": 0.0},
+        ])
+        connection.execute(insert(models.PlayerGameStats), [
+            {"player_id": 1, "game_id": "G1", "game_date": "2025-01-01", "fantasy_points": 10.0},
+            {"player_id": 1, "game_id": "G2", "game_date": "2025-01-02", "fantasy_points": 20.0},
+            {"player_id": 1, "game_id": "G3", "game_date": "2025-01-03", "fantasy_points": 30.0},
+            {"player_id": 2, "game_id": "G2", "game_date": "2025-01-02", "fantasy_points": 5.0},
+            {"player_id": 2, "game_id": "G3", "game_date": "2025-01-03", "fantasy_points": 7.0},
+        ])
+    _, headers = make_user("me@example.com")
+
+    # Obaj zawodnicy dodani 2025-01-02, zawodnik 2 usunięty 2025-01-03
+    monkeypatch.setattr(scoring, "today", lambda: "2025-01-02")
+    for player_id in (1, 2):
+        assert client.post(f"/me/team/players/{player_id}", headers=headers).status_code == 200
+    monkeypatch.setattr(scoring, "today", lambda: "2025-01-03")
+    assert client.delete("/me/team/players/2", headers=headers).status_code == 204
+    return headers
+
+
+def daily(client, headers, **params):
+    body = client.get("/users/me/daily_fantasy_points", params=params, headers=headers).json()
+    breakdown = sorted((entry["player_name"], entry["points"]) for entry in body["player_points_breakdown"])
+    return body["total_today_points"], breakdown
+
+
+def test_points_count_only_while_the_player_was_rostered(client, headers):
+    assert daily(client, headers, date="2025-01-01") == (0.0, [])
+    assert daily(client, headers, date="2025-01-02") == (25.0, [("Ada", 20.0), ("Bo", 5.0)])
+    assert daily(client, headers, date="2025-01-03") == (30.0, [("Ada", 30.0)])
+
+
+def test_default_date_is_the_last_day_with_games(client, headers):
+    assert daily(client, headers) == (30.0, [("Ada", 30.0)])
+
+
+def test_no_games_yet(client, make_user):
+    _, headers = make_user("new@example.com")
+    assert daily(client, headers) == (0.0, [])
@@ -0,0 +1,55 @@
+"""
+Skrypt fetch_lebron_stats.py: nowy mecz trafia do sum użytkowników i podbija wersję STATS
+w tej samej transakcji (ETagi i cache odpowiedzi przestają być aktualne).
+"""
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import insert, select
+
+import models
+import versions
+
+LEBRON_ID = 2544
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "fetch_lebron_stats.py")
+
+
+@pytest.fixture
+def lebron_script(api_db, monkeypatch):
+    spec = importlib.util.spec_from_file_location("fetch_lebron_stats", SCRIPT_PATH)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+
+    game_log = pd.DataFrame([{"Game_ID": "G1", "GAME_DATE": "2025-01-02", "PTS": 30, "REB": 10, "AST": 10}])
+
+    class Endpoint:
+        def get_data_frames(self):
+            return [game_log]
+
+    monkeypatch.setattr(script, "fetch_endpoint", lambda *args, **kwargs: Endpoint())
+
+    with api_db.begin() as connection:
+        connection.execute(insert(models.Player).values(id=LEBRON_ID, full_name="LeBron James", is_active=True))
+        connection.execute(insert(models.User).values(id=1, email="fan@example.com", hashed_password="x"))
+        connection.execute(insert(models.RosterMembership).values(user_id=1, player_id=LEBRON_ID, added_on="2025-01-01"))
+    return script
+
+
+def stats_version():
+    return versions.current_versions((versions.STATS,))[versions.STATS]
+
+
+def test_new_game_credits_users_and_bumps_stats_version(lebron_script):
+    before = stats_version()
+    lebron_script.fetch_and_store_lebron_stats()
+
+    assert stats_version() == before + 1
+    with models.SessionLocal() as db:
+        assert db.scalar(select(models.User.total_fantasy_points).where(models.User.id == 1)) == 30 + 12 + 15
+        assert db.scalar(select(models.Player.games_played).where(models.Player.id == LEBRON_ID)) == 1
+
+    # Ten sam mecz drugi raz niczego nie zmienia
+    lebron_script.fetch_and_store_lebron_stats()
+    assert stats_version() == before + 1
@@ -0,0 +1,183 @@
+"""
+Plany zapytań (EXPLAIN QUERY PLAN) najczęstszych zapytań API i ingestu na tymczasowej bazie SQLite
+ze schematem po migracjach - każde zapytanie musi korzystać z przeznaczonego dla niego indeksu.
+"""
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+import migrations
+import scoring
+import standings
+from models import (
+    PLAYER_AVERAGE_SORT_KEY, PLAYER_LAST_GAME_SORT_KEY, Base, League, LeagueStanding, Player, PlayerGameStats,
+    RosterMembership, User, make_engine, user_league_association, user_player_association,
+)
+
+PAGE_SIZE = 51
+
+# Podzapytanie rankingu z /leaderboard/ranking
+RANKING_ORDER = (User.total_fantasy_points.desc(), User.id)
+RANKING = select(
+    User.id.label("user_id"),
+    User.nickname,
+    User.total_fantasy_points,
+    func.rank().over(order_by=User.total_fantasy_points.desc()).label("rank"),
+    func.row_number().over(order_by=RANKING_ORDER).label("position"),
+    func.count().over(order_by=RANKING_ORDER, rows=(None, None)).label("total"),
+).subquery()
+
+# (opis, zapytanie, akceptowane nazwy indeksów) - odpowiedniki zapytań z main.py i ingestu
+HOT_QUERIES = [
+    (
+        "players catalogue sorted by average",
+        select(Player.id).where(Player.is_active == True)
+        .order_by(PLAYER_AVERAGE_SORT_KEY.desc(), Player.id.asc()).limit(PAGE_SIZE),
+        ["ix_players_active_average"],
+    ),
+    (
+        "players catalogue sorted by last game",
+        select(Player.id).where(Player.is_active == True)
+        .order_by(PLAYER_LAST_GAME_SORT_KEY.desc(), Player.id.asc()).limit(PAGE_SIZE),
+        ["ix_players_active_last_game"],
+    ),
+    (
+        "players catalogue sorted by name",
+        select(Player.id).where(Player.is_active == True)
+        .order_by(Player.full_name.asc(), Player.id.asc()).limit(PAGE_SIZE),
+        ["ix_players_active_name"],
+    ),
+    (
+        "players catalogue filtered by team",
+        select(Player.id).where(Player.team_name == "LAL"),
+        ["ix_players_team_name"],
+    ),
+    (
+        "players catalogue filtered by position",
+        select(Player.id).where(Player.position == "G"),
+        ["ix_players_position"],
+    ),
+    (
+        "active player ids for ingest",
+        select(Player.id).where(Player.is_active == True),
+        ["ix_players_active_average", "ix_players_active_last_game", "ix_players_active_name"],
+    ),
+    (
+        "latest ingested game date",
+        select(func.max(PlayerGameStats.game_date)),
+        ["ix_player_game_stats_game_date"],
+    ),
+    (
+        "daily points: roster on the day",
+        scoring.team_points_query(1, "2025-11-01"),
+        ["ix_roster_memberships_user_removed"],
+    ),
+    (
+        "daily points: games of rostered players",
+        scoring.team_points_query(1, "2025-11-01"),
+        ["ix_player_game_stats_player_date"],
+    ),
+    (
+        "owners of players with new games",
+        select(RosterMembership.user_id).where(RosterMembership.player_id == 1, RosterMembership.added_on <= "2025-11-01"),
+        ["ix_roster_memberships_player_added"],
+    ),
+    (
+        "player game history",
+        select(PlayerGameStats.fantasy_points).where(PlayerGameStats.player_id == 1)
+        .order_by(PlayerGameStats.game_date.desc()),
+        ["ix_player_game_stats_player_date"],
+    ),
+    (
+        "user's team",
+        select(user_player_association.c.player_id).where(user_player_association.c.user_id == 1),
+        ["sqlite_autoindex_user_player_association_1"],
+    ),
+    (
+        "owners of a player",
+        select(user_player_association.c.user_id).where(user_player_association.c.player_id == 1),
+        ["ix_user_player_association_player"],
+    ),
+    (
+        "league members",
+        select(user_league_association.c.user_id).where(user_league_association.c.league_id == 1),
+        ["ix_user_league_association_league"],
+    ),
+    (
+        "leaderboard ranking page",
+        select(RANKING).where(RANKING.c.position > 0, RANKING.c.position <= PAGE_SIZE).order_by(RANKING.c.position),
+        ["ix_users_total_points"],
+    ),
+    (
+        "full leaderboard (serialization.leaderboard)",
+        select(User.id, User.email, User.nickname, User.role, User.total_fantasy_points)
+        .order_by(User.total_fantasy_points.desc(), User.id),
+        ["ix_users_total_points"],
+    ),
+    (
+        "league standings page",
+        select(LeagueStanding.user_id).where(LeagueStanding.league_id == 1)
+        .order_by(LeagueStanding.rank).limit(PAGE_SIZE),
+        ["ix_league_standings_league_rank"],
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    """Baza ze schematem po migracjach i danymi: zawodnicy z historią meczów, składy i ligi."""
+    engine = make_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    Base.metadata.create_all(engine)
+    migrations.run(engine)
+    with Session(engine) as db:
+        db.execute(insert(Player), [
+            {"id": player_id, "full_name": f"Player {player_id}", "is_active": player_id % 10 != 0,
+             "position": "GFC"[player_id % 3], "team_name": f"T{player_id % 30}"}
+            for player_id in range(1, 201)
+        ])
+        db.execute(insert(PlayerGameStats), [
+            {"player_id": player_id, "game_id": f"G{day}", "game_date": f"2025-11-{day + 1:02d}",
+             "points": player_id % 30, "fantasy_points": float(player_id % 30)}
+            for player_id in range(1, 201) for day in range(10)
+        ])
+        db.execute(insert(User), [
+            {"id": user_id, "email": f"user{user_id}@example.com", "hashed_password": "x", "role": "user",
+             "total_fantasy_points": float(user_id % 7)}
+            for user_id in range(1, 41)
+        ])
+        rosters = [
+            {"user_id": user_id, "player_id": (user_id * 7 + slot * 13) % 200 + 1}
+            for user_id in range(1, 41) for slot in range(5)
+        ]
+        db.execute(user_player_association.insert(), rosters)
+        db.execute(insert(RosterMembership), [dict(row, added_on="2025-11-01") for row in rosters])
+        db.execute(insert(League), [
+            {"id": league_id, "name": f"League {league_id}", "owner_id": league_id, "invite_code": f"CODE{league_id}"}
+            for league_id in range(1, 5)
+        ])
+        db.execute(user_league_association.insert(), [
+            {"user_id": user_id, "league_id": user_id % 4 + 1} for user_id in range(1, 41)
+        ])
+        standings.rebuild_all(db)
+        db.commit()
+    yield engine
+    engine.dispose()
+
+
+def explain(connection, statement):
+    """Zwraca plan zapytania (EXPLAIN QUERY PLAN) jako tekst."""
+    compiled = statement.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+@pytest.mark.parametrize(
+    "statement, indexes",
+    [(statement, indexes) for _, statement, indexes in HOT_QUERIES],
+    ids=[description for description, _, _ in HOT_QUERIES],
+)
+def test_hot_query_uses_index(engine, statement, indexes):
+    with engine.connect() as connection:
+        plan = explain(connection, statement)
+    assert any(index in plan for index in indexes), f"expected {' / '.join(indexes)}, plan:\n{plan}"
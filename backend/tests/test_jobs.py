@@ -0,0 +1,70 @@
+"""
+Kolejka zadań administracyjnych (jobs.py): API zapisuje zadanie, lider harmonogramu przejmuje
+je warunkowym UPDATE i zapisuje wynik, a nowy lider oznacza przerwane zadania jako 'failed'.
+"""
+import pytest
+
+import jobs
+import models
+
+
+@pytest.fixture
+def handlers(api_db, monkeypatch):
+    """Zastępuje synchronizację z NBA API zadaniem, które tylko zapisuje postęp (lub zgłasza błąd)."""
+    calls = []
+
+    def sync_players(progress):
+        calls.append(progress.job_id)
+        progress.increment(teams_fetched=30, players_upserted=450)
+
+    def rescore(progress):
+        calls.append(progress.job_id)
+        raise RuntimeError("rescore failed")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, jobs.SYNC_PLAYERS, sync_players)
+    monkeypatch.setitem(jobs.JOB_HANDLERS, jobs.RESCORE, rescore)
+    return calls
+
+
+def job_row(job_id):
+    with models.SessionLocal() as db:
+        return db.get(models.Job, job_id)
+
+
+def test_queued_job_runs_once_and_reports_progress(client, make_user, handlers):
+    _, admin = make_user("admin@example.com", role="admin")
+    job_id = client.post("/admin/sync-players", headers=admin).json()["job_id"]
+    assert client.get(f"/admin/jobs/{job_id}", headers=admin).json()["status"] == "queued"
+
+    assert jobs.run_queued() == 1
+    assert jobs.run_queued() == 0
+    assert handlers == [job_id]
+
+    job = client.get(f"/admin/jobs/{job_id}", headers=admin).json()
+    assert (job["status"], job["teams_fetched"], job["players_upserted"], job["error"]) == ("succeeded", 30, 450, None)
+    assert job["started_at"] is not None and job["finished_at"] is not None
+    assert client.get("/admin/jobs/missing", headers=admin).status_code == 404
+
+
+def test_jobs_are_claimed_oldest_first_and_failures_are_recorded(handlers):
+    first = jobs.enqueue(jobs.RESCORE)
+    second = jobs.enqueue(jobs.SYNC_PLAYERS)
+
+    assert jobs.claim_next() == (first, jobs.RESCORE)
+    assert job_row(first).status == "running"
+    jobs._run_job(first, jobs.RESCORE)
+    assert (job_row(first).status, job_row(first).error) == ("failed", "rescore failed")
+
+    assert jobs.claim_next() == (second, jobs.SYNC_PLAYERS)
+    assert jobs.claim_next() is None
+
+
+def test_new_leader_fails_jobs_left_running(handlers):
+    job_id = jobs.enqueue(jobs.SYNC_PLAYERS)
+    assert jobs.claim_next() == (job_id, jobs.SYNC_PLAYERS)
+
+    assert jobs.fail_orphaned() == 1
+    job = job_row(job_id)
+    assert job.status == "failed" and job.error.startswith("Interrupted")
+    # Przerwane zadanie nie wraca do kolejki
+    assert jobs.run_queued() == 0
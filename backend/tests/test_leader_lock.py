@@ -0,0 +1,62 @@
+"""
+Blokada lidera harmonogramu (leader_lock.py, worker.py): w danej chwili liderem jest jeden proces,
+blokada wygasa bez odnowienia, a nowy lider oznacza przerwane zadania jako 'failed'.
+"""
+import time
+
+import pytest
+
+import jobs
+import models
+import worker
+from leader_lock import LeaderLock
+
+
+@pytest.fixture
+def locks(api_db):
+    return LeaderLock("test-lock", ttl_seconds=60, owner="a"), LeaderLock("test-lock", ttl_seconds=60, owner="b")
+
+
+def test_only_one_owner_holds_the_lock(locks):
+    first, second = locks
+    assert first.acquire()
+    assert not second.acquire()
+    # Odnowienie przez właściciela
+    assert first.acquire()
+    assert not second.acquire()
+
+    first.release()
+    assert second.acquire()
+    assert not first.acquire()
+
+
+def test_expired_lock_is_taken_over(locks):
+    first, second = locks
+    first.ttl_seconds = 0.01
+    assert first.acquire()
+    time.sleep(0.02)
+    assert second.acquire()
+    assert not first.acquire()
+
+
+def test_only_the_leader_runs_queued_jobs_and_a_new_leader_fails_orphans(api_db, monkeypatch):
+    ran = []
+    monkeypatch.setitem(jobs.JOB_HANDLERS, jobs.SYNC_PLAYERS, lambda progress: ran.append(progress.job_id))
+    monkeypatch.setattr(worker, "_is_leader", False)
+    other_process = LeaderLock("stats-scheduler", ttl_seconds=60, owner="other")
+    monkeypatch.setattr(worker, "leader_lock", LeaderLock("stats-scheduler", ttl_seconds=60, owner="this"))
+
+    assert other_process.acquire()
+    orphan = jobs.enqueue(jobs.SYNC_PLAYERS)
+    assert jobs.claim_next() == (orphan, jobs.SYNC_PLAYERS)
+    queued = jobs.enqueue(jobs.SYNC_PLAYERS)
+    worker.run_queued_jobs()
+    assert ran == []
+
+    # Poprzedni lider przestał działać w trakcie zadania
+    other_process.release()
+    worker.run_queued_jobs()
+    assert ran == [queued]
+    with models.SessionLocal() as db:
+        assert db.get(models.Job, orphan).status == "failed"
+        assert db.get(models.Job, queued).status == "succeeded"
@@ -0,0 +1,45 @@
+"""
+Ranking (/leaderboard/ranking): pozycje z remisami, stronicowanie, okno around_me i ranking ligi.
+"""
+import pytest
+from sqlalchemy import insert
+
+import models
+
+# Punkty użytkowników 1..6 - remis na drugim miejscu
+POINTS = {1: 50.0, 2: 40.0, 3: 40.0, 4: 30.0, 5: 20.0, 6: 10.0}
+
+
+@pytest.fixture
+def users(api_db, make_user):
+    headers = {user_id: make_user(f"user{user_id}@example.com", total_fantasy_points=points)[1]
+               for user_id, points in POINTS.items()}
+    with api_db.begin() as connection:
+        connection.execute(insert(models.League).values(id=1, name="League", owner_id=2, invite_code="CODE"))
+        connection.execute(models.user_league_association.insert(), [
+            {"user_id": user_id, "league_id": 1} for user_id in (2, 4, 6)
+        ])
+    return headers
+
+
+def ranking(client, headers, **params):
+    response = client.get("/leaderboard/ranking", params=params, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    return body["total"], [(entry["rank"], entry["user_id"]) for entry in body["entries"]]
+
+
+def test_pages_rank_ties_equally_and_report_the_total(client, users):
+    assert ranking(client, users[1], limit=3) == (6, [(1, 1), (2, 2), (2, 3)])
+    assert ranking(client, users[1], offset=3, limit=3) == (6, [(4, 4), (5, 5), (6, 6)])
+    assert ranking(client, users[1], offset=10) == (6, [])
+
+
+def test_around_me_returns_neighbours(client, users):
+    assert ranking(client, users[4], around_me=1) == (6, [(2, 3), (4, 4), (5, 5)])
+
+
+def test_league_ranking_is_limited_to_members(client, users):
+    assert ranking(client, users[4], league_id=1) == (3, [(1, 2), (2, 4), (3, 6)])
+    assert client.get("/leaderboard/ranking", params={"league_id": 1}, headers=users[1]).status_code == 403
+    assert client.get("/leaderboard/ranking", params={"league_id": 2}, headers=users[4]).status_code == 404
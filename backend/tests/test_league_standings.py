@@ -0,0 +1,67 @@
+"""
+Zmaterializowane tabele ligowe (league_standings): członkowie dochodzą przez API, ingest
+aktualizuje punkty i pozycje przyrostowo, a wynik zgadza się z pełną odbudową.
+"""
+import pytest
+from sqlalchemy import select, update
+
+import models
+import standings
+
+
+@pytest.fixture
+def league(client, make_user):
+    owner_id, owner = make_user("owner@example.com", total_fantasy_points=10.0)
+    rival_id, rival = make_user("rival@example.com", total_fantasy_points=30.0)
+    third_id, third = make_user("third@example.com", total_fantasy_points=20.0)
+    created = client.post("/leagues", json={"name": "Friends"}, headers=owner).json()
+    for headers in (rival, third):
+        assert client.post(f"/leagues/join/{created['invite_code']}", headers=headers).status_code == 200
+    return created["id"], {owner_id: owner, rival_id: rival, third_id: third}
+
+
+def table(client, league_id, headers, **params):
+    response = client.get(f"/leagues/{league_id}/standings", params=params, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    return body["total"], [(entry["rank"], entry["user_id"], entry["total_fantasy_points"]) for entry in body["entries"]]
+
+
+def all_standings(db):
+    return db.execute(
+        select(models.LeagueStanding.league_id, models.LeagueStanding.user_id,
+               models.LeagueStanding.points, models.LeagueStanding.rank)
+        .order_by(models.LeagueStanding.league_id, models.LeagueStanding.user_id)
+    ).all()
+
+
+def test_members_are_ranked_by_points(client, league):
+    league_id, members = league
+    owner, rival, third = members
+    assert table(client, league_id, members[owner]) == (3, [(1, rival, 30.0), (2, third, 20.0), (3, owner, 10.0)])
+    assert table(client, league_id, members[owner], offset=1, limit=1) == (3, [(2, third, 20.0)])
+
+
+def test_ingest_refresh_reranks_only_changed_users_and_matches_a_rebuild(client, league):
+    league_id, members = league
+    owner, rival, third = members
+    with models.SessionLocal() as db:
+        db.execute(update(models.User).where(models.User.id.in_([owner, third])).values(total_fantasy_points=30.0))
+        standings.refresh_standings_for_users(db, [owner, third])
+        db.commit()
+        incremental = all_standings(db)
+        standings.rebuild_all(db)
+        db.flush()
+        assert all_standings(db) == incremental
+        db.rollback()
+
+    # Remis - wszyscy na pierwszym miejscu, kolejność po id
+    assert table(client, league_id, members[rival])[1] == [(1, owner, 30.0), (1, rival, 30.0), (1, third, 30.0)]
+
+
+def test_deleted_user_leaves_the_table(client, league, make_user):
+    league_id, members = league
+    owner, rival, third = members
+    _, admin = make_user("admin@example.com", role="admin")
+    assert client.delete(f"/admin/users/{rival}", headers=admin).status_code == 204
+    assert table(client, league_id, members[owner]) == (2, [(1, third, 20.0), (2, owner, 10.0)])
@@ -0,0 +1,82 @@
+"""
+Kanał na żywo (live.py): obserwator wykrywa zmianę liczników wersji i publikuje subskrybentom
+zmiany punktów dnia i pozycji w rankingu.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert, update
+
+import live
+import models
+import versions
+
+
+@pytest.fixture
+def league_day(api_db):
+    with api_db.begin() as connection:
+        connection.execute(insert(models.Player).values(id=1, full_name="Ada", is_active=True, average_fantasy_points=0.0))
+        connection.execute(insert(models.User), [
+            {"id": 1, "email": "one@example.com", "hashed_password": "x", "total_fantasy_points": 10.0},
+            {"id": 2, "email": "two@example.com", "hashed_password": "x", "total_fantasy_points": 20.0},
+        ])
+        connection.execute(insert(models.RosterMembership).values(user_id=1, player_id=1, added_on="2025-01-01"))
+        connection.execute(insert(models.PlayerGameStats).values(
+            player_id=1, game_id="G1", game_date="2025-01-02", fantasy_points=4.0
+        ))
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_watcher_publishes_points_and_rank_changes(league_day):
+    async def scenario():
+        broker = live.Broker()
+        watcher = live.Watcher(broker)
+        queue = broker.subscribe(1)
+
+        await watcher.poll()
+        assert watcher.states[1] == {"date": "2025-01-02", "points": 4.0, "total_fantasy_points": 10.0, "rank": 2}
+        assert drain(queue) == []
+
+        # Bez zmiany wersji obserwator nie pyta bazy o stan
+        with models.SessionLocal() as db:
+            db.execute(update(models.User).where(models.User.id == 1).values(total_fantasy_points=99.0))
+            db.commit()
+        await watcher.poll()
+        assert drain(queue) == []
+
+        with models.SessionLocal() as db:
+            db.execute(update(models.PlayerGameStats).values(fantasy_points=30.0))
+            db.execute(update(models.User).where(models.User.id == 1).values(total_fantasy_points=36.0))
+            versions.bump(db, versions.STATS)
+            db.commit()
+        await watcher.poll()
+        return drain(queue)
+
+    assert asyncio.run(scenario()) == [
+        ("points", {"date": "2025-01-02", "points": 30.0, "delta": 26.0, "total_fantasy_points": 36.0}),
+        ("rank", {"rank": 1, "previous_rank": 2, "total_fantasy_points": 36.0}),
+    ]
+
+
+def test_new_game_day_counts_points_from_zero():
+    previous = {"date": "2025-01-02", "points": 30.0, "total_fantasy_points": 36.0, "rank": 1}
+    current = {"date": "2025-01-03", "points": 5.0, "total_fantasy_points": 41.0, "rank": 1}
+    assert live.diff_events(previous, current) == [
+        ("points", {"date": "2025-01-03", "points": 5.0, "delta": 5.0, "total_fantasy_points": 41.0}),
+    ]
+
+
+def test_slow_subscriber_keeps_the_newest_events():
+    broker = live.Broker(queue_size=2)
+    queue = broker.subscribe(1)
+    for rank in (3, 2, 1):
+        broker.publish(1, "rank", {"rank": rank})
+    assert [data["rank"] for _, data in drain(queue)] == [2, 1]
+    broker.unsubscribe(1, queue)
+    assert broker.connection_count() == 0
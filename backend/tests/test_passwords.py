@@ -0,0 +1,95 @@
+"""
+Rejestracja, logowanie i zmiany haseł: bcrypt w puli auth.password_pool, a zmiana hasła
+unieważnia kopię użytkownika w cache.
+"""
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+import auth
+import models
+
+
+def login(client, email, password):
+    return client.post("/login", json={"email": email, "password": password})
+
+
+def bearer(response):
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def counted_pool(monkeypatch):
+    """Liczy operacje wykonane w puli password_pool."""
+    calls = []
+    run = auth.password_pool.run
+
+    async def counting_run(fn, *args):
+        calls.append(fn.__name__)
+        return await run(fn, *args)
+
+    monkeypatch.setattr(auth.password_pool, "run", counting_run)
+    return calls
+
+
+def test_first_registered_user_is_admin_and_can_log_in(client, counted_pool):
+    first = client.post("/register", json={"email": "first@example.com", "password": "password1"})
+    second = client.post("/register", json={"email": "second@example.com", "password": "password2"})
+    assert (first.json()["role"], second.json()["role"]) == ("admin", "user")
+    assert client.post("/register", json={"email": "first@example.com", "password": "x"}).status_code == 400
+
+    assert login(client, "second@example.com", "password2").status_code == 200
+    assert login(client, "second@example.com", "wrong").status_code == 401
+    assert login(client, "nobody@example.com", "password2").status_code == 401
+    assert counted_pool.count("get_password_hash") == 2
+
+
+def test_login_rehashes_passwords_stored_with_another_cost(client, make_user):
+    user_id, _ = make_user("old@example.com")
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=auth.BCRYPT_ROUNDS + 1).hash("password")
+    with models.SessionLocal() as db:
+        db.get(models.User, user_id).hashed_password = old_hash
+        db.commit()
+
+    assert login(client, "old@example.com", "password").status_code == 200
+    with models.SessionLocal() as db:
+        new_hash = db.scalar(select(models.User.hashed_password).where(models.User.id == user_id))
+    assert new_hash != old_hash
+    assert auth.verify_password("password", new_hash)
+
+
+def test_change_password(client, make_user, counted_pool):
+    _, headers = make_user("me@example.com", password="old-password")
+    # Kopia użytkownika trafia do cache - zmiana hasła musi ją unieważnić
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    def change(current, new, confirm=None):
+        return client.put("/users/me/change-password", headers=headers, json={
+            "current_password": current, "new_password": new, "confirm_new_password": confirm or new,
+        })
+
+    assert change("wrong-password", "new-password").status_code == 400
+    assert change("old-password", "new-password", "other-password").status_code == 400
+    assert change("old-password", "short").status_code == 400
+    assert change("old-password", "new-password").status_code == 204
+    assert counted_pool.count("get_password_hash") == 1
+    assert counted_pool.count("verify_password") == 4
+
+    assert login(client, "me@example.com", "old-password").status_code == 401
+    assert login(client, "me@example.com", "new-password").status_code == 200
+    assert change("old-password", "other-password").status_code == 400
+
+
+def test_admin_resets_password(client, make_user, counted_pool):
+    _, admin_headers = make_user("admin@example.com", role="admin")
+    user_id, user_headers = make_user("user@example.com", password="password")
+
+    assert client.put(f"/admin/users/{user_id}/reset-password", headers=user_headers).status_code == 403
+    assert client.put("/admin/users/999/reset-password", headers=admin_headers).status_code == 404
+
+    response = client.put(f"/admin/users/{user_id}/reset-password", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "user@example.com"
+    assert counted_pool == ["get_password_hash"]
+    assert login(client, "user@example.com", "password").status_code == 401
+    assert login(client, "user@example.com", "newpassword").status_code == 200
@@ -0,0 +1,79 @@
+"""
+Katalog zawodników (/players/catalogue): stronicowanie kursorem (keyset) i walidacja kursora.
+"""
+import base64
+import json
+
+import pytest
+from sqlalchemy import insert
+
+import models
+
+# Remisy średnich i zawodnik bez meczu sprawdzają rozstrzyganie po id i koniec listy
+PLAYERS = [
+    {"id": 1, "full_name": "Ada", "average_fantasy_points": 30.0, "last_game_fantasy_points": 10.0},
+    {"id": 2, "full_name": "Cyd", "average_fantasy_points": 20.0, "last_game_fantasy_points": None},
+    {"id": 3, "full_name": "Bo", "average_fantasy_points": 30.0, "last_game_fantasy_points": 40.0},
+    {"id": 4, "full_name": "Eve", "average_fantasy_points": 20.0, "last_game_fantasy_points": 5.0},
+    {"id": 5, "full_name": "Dee", "average_fantasy_points": 10.0, "last_game_fantasy_points": 25.0},
+]
+
+
+@pytest.fixture
+def headers(api_db, make_user):
+    with api_db.begin() as connection:
+        connection.execute(insert(models.Player), [
+            {**player, "is_active": True, "position": "G", "team_name": "Team"} for player in PLAYERS
+        ])
+        connection.execute(insert(models.Player).values(id=6, full_name="Retired", is_active=False))
+    return make_user("reader@example.com")[1]
+
+
+def fetch_all(client, headers, **params):
+    ids, cursor = [], None
+    while True:
+        query = {**params, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/players/catalogue", params=query, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        ids += [player["id"] for player in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort_by, expected", [
+    ("average", [1, 3, 2, 4, 5]),
+    ("last_game", [3, 5, 1, 4, 2]),
+    ("name", [1, 3, 2, 5, 4]),
+])
+def test_cursor_pages_cover_every_active_player_once(client, headers, sort_by, expected):
+    assert fetch_all(client, headers, sort_by=sort_by) == expected
+
+
+def test_cursor_from_another_sort_order_is_rejected(client, headers):
+    page = client.get("/players/catalogue", params={"limit": 2, "sort_by": "name"}, headers=headers).json()
+    response = client.get(
+        "/players/catalogue", params={"limit": 2, "sort_by": "average", "cursor": page["next_cursor"]}, headers=headers
+    )
+    assert response.status_code == 400
+
+
+def encoded(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    encoded({"a": 1}),
+    encoded([{"a": 1}, 1]),
+    encoded(["average", "desc", {"a": 1}, 1]),
+    encoded(["average", "desc", "thirty", 1]),
+    encoded(["average", "desc", True, 1]),
+    encoded(["average", "desc", 30.0, "1"]),
+    encoded(["average", "asc", 30.0, 1]),
+])
+def test_garbage_cursor_is_a_bad_request(client, headers, cursor):
+    response = client.get("/players/catalogue", params={"sort_by": "average", "cursor": cursor}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,76 @@
+"""
+Cache odpowiedzi (response_cache.py): /players i /leaderboard z cache do zmiany wersji danych,
+liczniki trafień pod blokadą i backend zgodny z Redisem.
+"""
+import threading
+
+import pytest
+from sqlalchemy import insert
+
+import models
+import response_cache
+import versions
+
+
+@pytest.fixture
+def headers(api_db, make_user):
+    with api_db.begin() as connection:
+        connection.execute(insert(models.Player).values(id=1, full_name="Ada", is_active=True, average_fantasy_points=5.0))
+    return make_user("admin@example.com", role="admin")[1]
+
+
+def player_ids(client, headers):
+    return [player["id"] for player in client.get("/players", headers=headers).json()]
+
+
+def test_players_are_served_from_cache_until_stats_change(client, headers):
+    before = response_cache.stats.snapshot()
+    assert player_ids(client, headers) == [1]
+
+    # Zmiana bez podbicia wersji nie jest widoczna - odpowiedź pochodzi z cache
+    with models.SessionLocal() as db:
+        db.add(models.Player(id=2, full_name="Bo", is_active=True))
+        db.commit()
+    assert player_ids(client, headers) == [1]
+
+    with models.SessionLocal() as db:
+        versions.bump(db, versions.STATS)
+        db.commit()
+    assert sorted(player_ids(client, headers)) == [1, 2]
+
+    after = client.get("/admin/metrics/response-cache", headers=headers).json()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (1, 2)
+
+
+def test_leaderboard_changes_with_the_users_version(client, headers, make_user):
+    assert len(client.get("/leaderboard", headers=headers).json()) == 1
+    # Nowe konto podbija USERS (jak /register)
+    make_user("second@example.com")
+    with models.SessionLocal() as db:
+        versions.bump(db, versions.USERS)
+        db.commit()
+    assert len(client.get("/leaderboard", headers=headers).json()) == 2
+
+
+def test_stats_counters_are_exact_under_concurrency():
+    stats = response_cache.ResponseCacheStats()
+
+    def record():
+        for index in range(5000):
+            stats.record(index % 2 == 0)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (stats.hits, stats.misses) == (20000, 20000)
+
+
+def test_redis_backend_round_trip():
+    backend = response_cache.make_backend("fake-redis")
+    backend.set("players|stats=1", b"[]")
+    assert backend.get("players|stats=1") == b"[]"
+    assert backend.get("players|stats=2") is None
+    backend.clear()
+    assert backend.get("players|stats=1") is None
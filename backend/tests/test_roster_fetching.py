@@ -0,0 +1,97 @@
+"""
+Pobieranie składów przez nba_api z lokalnym serwerem scripts/fake_nba_stats_server.py:
+ponawianie błędów 500 i 429, komplet składów oraz tempo zapytań wyznaczane przez TokenBucket.
+"""
+import threading
+import time
+
+import pytest
+from nba_api.stats.library.http import NBAStatsHTTP
+from nba_api.stats.static import teams
+
+from scripts import fake_nba_stats_server, fetch_nba_players, nba_cache
+
+TEAM_COUNT = 30
+ROSTER_SIZE = TEAM_COUNT * fake_nba_stats_server.PLAYERS_PER_TEAM
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Uruchamia fałszywy serwer z podanymi parametrami i kieruje na niego nba_api (bez dyskowego cache)."""
+    servers = []
+
+    def start(**options):
+        server = fake_nba_stats_server.serve(port=0, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        port = server.server_address[1]
+        monkeypatch.setattr(NBAStatsHTTP, "base_url", f"http://127.0.0.1:{port}/stats/{{endpoint}}")
+        return server
+
+    monkeypatch.setattr(nba_cache, "CACHE_MODE", "off")
+    monkeypatch.setattr(fetch_nba_players, "BACKOFF_BASE_SECONDS", 0.02)
+    monkeypatch.setattr(fetch_nba_players, "MAX_RETRIES", 8)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def roster_requests(server, status_code=None):
+    return [
+        entry for entry in server.request_log
+        if entry[1].endswith("commonteamroster") and (status_code is None or entry[2] == status_code)
+    ]
+
+
+def test_fetch_all_rosters_retries_server_errors(fake_server, monkeypatch):
+    monkeypatch.setattr(fetch_nba_players, "rate_limiter", fetch_nba_players.TokenBucket(rate=200, capacity=5))
+    server = fake_server(failure_rate=0.3)
+
+    rosters = fetch_nba_players.fetch_all_rosters(teams.get_teams())
+
+    assert len(rosters) == ROSTER_SIZE
+    assert rosters["PLAYER_ID"].is_unique
+    failed = len(roster_requests(server, 500))
+    assert failed > 0
+    # Każdy błąd to jedno dodatkowe zapytanie, a każda drużyna kończy się sukcesem
+    assert len(roster_requests(server, 200)) == TEAM_COUNT
+    assert len(roster_requests(server)) == TEAM_COUNT + failed
+
+
+def test_fetch_all_rosters_backs_off_after_429(fake_server, monkeypatch):
+    # Klient szybszy niż limit serwera - część zapytań dostaje 429 i jest ponawiana z backoffem
+    monkeypatch.setattr(fetch_nba_players, "rate_limiter", fetch_nba_players.TokenBucket(rate=40, capacity=5))
+    server = fake_server(max_rps=20)
+
+    rosters = fetch_nba_players.fetch_all_rosters(teams.get_teams())
+
+    assert len(rosters) == ROSTER_SIZE
+    assert roster_requests(server, 429)
+    assert len(roster_requests(server, 200)) == TEAM_COUNT
+
+
+def test_fetch_all_rosters_is_paced_by_the_rate_limiter(fake_server, monkeypatch):
+    rate, capacity = 20.0, 5
+    monkeypatch.setattr(fetch_nba_players, "rate_limiter", fetch_nba_players.TokenBucket(rate=rate, capacity=capacity))
+    server = fake_server()
+
+    started = time.monotonic()
+    rosters = fetch_nba_players.fetch_all_rosters(teams.get_teams())
+    elapsed = time.monotonic() - started
+
+    assert len(rosters) == ROSTER_SIZE
+    # Po wyczerpaniu początkowych `capacity` tokenów zapytania idą w tempie `rate` na sekundę
+    assert elapsed >= (TEAM_COUNT - capacity) / rate * 0.9
+    times = sorted(entry[0] for entry in roster_requests(server))
+    for index, request_time in enumerate(times):
+        in_window = sum(1 for other in times[index:] if other - request_time < 1.0)
+        assert in_window <= rate + capacity
+
+
+def test_token_bucket_limits_average_rate():
+    bucket = fetch_nba_players.TokenBucket(rate=50, capacity=5)
+    started = time.monotonic()
+    for _ in range(30):
+        bucket.acquire()
+    assert time.monotonic() - started >= (30 - 5) / 50 * 0.9
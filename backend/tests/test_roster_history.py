@@ -0,0 +1,106 @@
+"""
+Historia składów (roster_memberships) na bazie sprzed jej wprowadzenia: migracja zapamiętuje dotychczasowe
+sumy jako punkty sprzed historii, więc przeliczenie sum od zera (re-score, recompute-totals) ich nie zmienia.
+"""
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+
+import migrations
+import scoring
+from models import Base, Player, PlayerGameStats, RosterMembership, User, make_engine, user_player_association
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """
+    Baza w stanie sprzed historii składów: sumy użytkowników z dotychczasowego ingestu, składy
+    bez roster_memberships i bez kolumny legacy_fantasy_points, żadnej zastosowanej migracji.
+    Użytkownik 2 zdobył punkty zawodnikiem 2, którego usunął ze składu przed aktualizacją.
+    """
+    engine = make_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE users DROP COLUMN legacy_fantasy_points"))
+        connection.execute(insert(Player), [
+            {"id": player_id, "full_name": f"Player {player_id}", "is_active": True}
+            for player_id in (1, 2, 3)
+        ])
+        connection.execute(insert(PlayerGameStats), [
+            {"player_id": 1, "game_id": "G1", "game_date": "2025-01-02", "points": 30, "fantasy_points": 30.0},
+            {"player_id": 1, "game_id": "G2", "game_date": "2025-01-03", "points": 20, "fantasy_points": 20.0},
+            {"player_id": 2, "game_id": "G1", "game_date": "2025-01-02", "points": 10, "fantasy_points": 10.0},
+        ])
+        connection.execute(text(
+            "INSERT INTO users (id, email, hashed_password, role, total_fantasy_points) VALUES "
+            "(1, 'one@example.com', 'x', 'user', 50.0), (2, 'two@example.com', 'x', 'user', 10.0)"
+        ))
+        connection.execute(user_player_association.insert(), [
+            {"user_id": 1, "player_id": 1},
+            {"user_id": 2, "player_id": 3},
+        ])
+    yield engine
+    engine.dispose()
+
+
+def totals(db):
+    return dict(db.execute(select(User.id, User.total_fantasy_points).order_by(User.id)).all())
+
+
+def test_upgrade_starts_memberships_at_the_last_ingested_game(legacy_engine):
+    migrations.run(legacy_engine)
+
+    with Session(legacy_engine) as db:
+        memberships = db.execute(select(RosterMembership.user_id, RosterMembership.player_id, RosterMembership.added_on)).all()
+        assert sorted(memberships) == [(1, 1, "2025-01-03"), (2, 3, "2025-01-03")]
+        # Mecz z 2025-01-03 jest zaliczany z historii, więc nie wchodzi do punktów sprzed niej
+        assert dict(db.execute(select(User.id, User.legacy_fantasy_points)).all()) == {1: 30.0, 2: 10.0}
+
+
+def test_rescore_after_upgrade_keeps_legacy_totals(legacy_engine):
+    migrations.run(legacy_engine)
+
+    with Session(legacy_engine) as db:
+        scoring.rescore_all(db)
+        db.commit()
+        assert totals(db) == {1: 50.0, 2: 10.0}
+
+        scoring.recompute_user_totals(db)
+        db.commit()
+        assert totals(db) == {1: 50.0, 2: 10.0}
+
+
+def test_games_ingested_after_upgrade_add_to_legacy_totals(legacy_engine):
+    migrations.run(legacy_engine)
+
+    with Session(legacy_engine) as db:
+        # Mecz z dnia po ostatnim ingeście, pobrany już po migracji (np. przez catch-up)
+        game = PlayerGameStats(player_id=1, game_id="G3", game_date="2025-01-04", points=7, fantasy_points=7.0)
+        db.add(game)
+        db.flush()
+        assert scoring.add_new_game_points(db, [game]) == {1}
+        db.commit()
+        assert totals(db) == {1: 57.0, 2: 10.0}
+
+        # Pełne przeliczenie daje to samo co przyrostowe dodawanie punktów
+        scoring.recompute_user_totals(db)
+        db.commit()
+        assert totals(db) == {1: 57.0, 2: 10.0}
+
+
+def test_rescore_applies_new_rules_only_to_games_from_the_roster_history(legacy_engine):
+    migrations.run(legacy_engine)
+
+    with Session(legacy_engine) as db:
+        scoring.rescore_all(db, rules={"points": 2.0})
+        db.commit()
+        # Mecz z 2025-01-03 (20 pkt) liczony podwójnie, punkty sprzed historii bez zmian
+        assert totals(db) == {1: 30.0 + 40.0, 2: 10.0}
+
+
+def test_recompute_refuses_to_run_before_the_roster_history_migration(legacy_engine):
+    with Session(legacy_engine) as db:
+        with pytest.raises(RuntimeError):
+            scoring.rescore_all(db)
+        db.rollback()
+        assert totals(db) == {1: 50.0, 2: 10.0}
@@ -0,0 +1,26 @@
+"""
+Reguły punktacji: odczyt tylko dla zalogowanych, zmiana przez administratora kolejkuje przeliczenie.
+"""
+import models
+
+
+def test_reading_rules_requires_a_token(client, make_user):
+    assert client.get("/scoring-rules").status_code == 401
+    _, headers = make_user("reader@example.com")
+    rules = client.get("/scoring-rules", headers=headers).json()["rules"]
+    assert (rules["points"], rules["rebounds"], rules["assists"], rules["steals"]) == (1.0, 1.2, 1.5, 0.0)
+
+
+def test_admin_update_is_saved_and_queues_a_rescore(client, make_user):
+    _, user_headers = make_user("user@example.com")
+    _, admin_headers = make_user("admin@example.com", role="admin")
+
+    assert client.put("/admin/scoring-rules", json={"rules": {"steals": 2.0}}, headers=user_headers).status_code == 403
+    assert client.put("/admin/scoring-rules", json={"rules": {"dunks": 2.0}}, headers=admin_headers).status_code == 400
+
+    response = client.put("/admin/scoring-rules", json={"rules": {"steals": 2.0}}, headers=admin_headers)
+    assert response.status_code == 202
+    assert client.get("/scoring-rules", headers=user_headers).json()["rules"]["steals"] == 2.0
+    with models.SessionLocal() as db:
+        job = db.get(models.Job, response.json()["job_id"])
+        assert (job.kind, job.status) == ("rescore", "queued")
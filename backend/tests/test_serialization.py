@@ -0,0 +1,78 @@
+"""
+Szybka serializacja (serialization.py) daje ten sam JSON co schematy Pydantic na obiektach ORM.
+"""
+from typing import List
+
+import orjson
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+import schemas
+import serialization
+from models import Base, League, Player, User, user_league_association, user_player_association
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'serialization.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Player), [
+            {"id": 1, "full_name": "Ada", "is_active": True, "position": "G", "team_name": "A",
+             "average_fantasy_points": 12.5, "last_game_fantasy_points": 20.0},
+            {"id": 2, "full_name": "Bo", "is_active": True, "position": None, "team_name": None,
+             "average_fantasy_points": 8, "last_game_fantasy_points": None},
+            {"id": 3, "full_name": "Cyd", "is_active": False, "position": "C", "team_name": "C",
+             "average_fantasy_points": 3.0, "last_game_fantasy_points": 3.0},
+        ])
+        # Liczby całkowite w kolumnach Float (SQLite zwraca je jako int)
+        connection.execute(text(
+            "INSERT INTO users (id, email, nickname, hashed_password, role, total_fantasy_points, legacy_fantasy_points) "
+            "VALUES (1, 'one@example.com', 'one', 'x', 'admin', 40, 0), (2, 'two@example.com', NULL, 'x', 'user', 55.5, 0), "
+            "(3, 'three@example.com', 'three', 'x', 'user', 40, 0)"
+        ))
+        connection.execute(insert(League), [
+            {"id": 1, "name": "First", "owner_id": 1, "invite_code": "A1"},
+            {"id": 2, "name": "Second", "owner_id": 2, "invite_code": "B2"},
+        ])
+        connection.execute(user_player_association.insert(), [
+            {"user_id": 1, "player_id": 1}, {"user_id": 1, "player_id": 3}, {"user_id": 2, "player_id": 2},
+        ])
+        connection.execute(user_league_association.insert(), [
+            {"user_id": 1, "league_id": 1}, {"user_id": 2, "league_id": 1}, {"user_id": 2, "league_id": 2},
+        ])
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def canonical(value):
+    """Sortuje listy obiektów po id (kolejność relacji ORM nie jest określona)."""
+    if isinstance(value, dict):
+        return {key: canonical(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [canonical(item) for item in value]
+        if items and all(isinstance(item, dict) and "id" in item for item in items):
+            items.sort(key=lambda item: item["id"])
+        return items
+    return value
+
+
+def through_schemas(schema, objects):
+    adapter = TypeAdapter(List[schema])
+    return orjson.loads(adapter.dump_json(adapter.validate_python(objects, from_attributes=True)))
+
+
+def test_active_players_match_the_player_schema(db):
+    expected = through_schemas(schemas.Player, db.query(Player).filter(Player.is_active == True).all())
+    assert canonical(orjson.loads(serialization.dumps(serialization.active_players(db)))) == canonical(expected)
+
+
+def test_leaderboard_matches_the_user_schema_in_ranking_order(db):
+    users = db.query(User).order_by(User.total_fantasy_points.desc(), User.id).all()
+    fast = orjson.loads(serialization.dumps(serialization.leaderboard(db)))
+    assert [user["id"] for user in fast] == [2, 1, 3]
+    assert canonical(fast) == canonical(through_schemas(schemas.User, users))
+    assert isinstance(fast[1]["total_fantasy_points"], float)
@@ -0,0 +1,63 @@
+"""
+Ingest statystyk (scripts/fetch_nba_players.py): tryb nadrabiania pobiera mecze od ostatniej zapisanej
+daty do wczoraj, pomija duplikaty i w jednej transakcji aktualizuje agregaty, sumy użytkowników i wersję.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, select
+
+import models
+import scoring
+import versions
+from scripts import fetch_nba_players
+
+# Game log jak z LeagueGameLog - po jednym meczu zawodnika dziennie
+GAME_LOG = [
+    {"PLAYER_ID": 1, "GAME_ID": f"G{day}", "GAME_DATE": f"2025-01-0{day}", "PTS": 10 * day, "REB": 0, "AST": 0}
+    for day in range(1, 6)
+]
+
+
+@pytest.fixture
+def fetched_ranges(api_db, monkeypatch):
+    requests = []
+
+    def fetch_game_logs(player_ids, date_from, date_to, progress=None, refresh=False):
+        requests.append((date_from, date_to))
+        return [game for game in GAME_LOG if date_from <= game["GAME_DATE"] <= date_to and game["PLAYER_ID"] in player_ids]
+
+    monkeypatch.setattr(fetch_nba_players, "fetch_game_logs", fetch_game_logs)
+    monkeypatch.setattr(scoring, "game_day", lambda: date(2025, 1, 5))
+    with api_db.begin() as connection:
+        connection.execute(insert(models.Player).values(id=1, full_name="Ada", is_active=True, average_fantasy_points=0.0))
+        connection.execute(insert(models.User).values(id=1, email="fan@example.com", hashed_password="x"))
+        connection.execute(insert(models.RosterMembership).values(user_id=1, player_id=1, added_on="2025-01-03"))
+    return requests
+
+
+def test_catch_up_resumes_from_the_last_ingested_day(fetched_ranges):
+    fetch_nba_players.update_stats_for_active_players(date_from="2025-01-02", date_to="2025-01-02")
+    stats_version = versions.current_versions((versions.STATS,))[versions.STATS]
+
+    fetch_nba_players.catch_up_stats()
+
+    assert fetched_ranges[-1] == ("2025-01-02", "2025-01-04")
+    with models.SessionLocal() as db:
+        dates = db.scalars(select(models.PlayerGameStats.game_date).order_by(models.PlayerGameStats.game_date)).all()
+        assert dates == ["2025-01-02", "2025-01-03", "2025-01-04"]
+        player = db.get(models.Player, 1)
+        assert (player.games_played, player.average_fantasy_points, player.last_game_date) == (3, 30.0, "2025-01-04")
+        # Do sumy trafiają tylko mecze od dodania zawodnika do składu (2025-01-03)
+        assert db.get(models.User, 1).total_fantasy_points == 30.0 + 40.0
+    assert versions.current_versions((versions.STATS,))[versions.STATS] == stats_version + 1
+
+    # Ponowne nadrabianie niczego nie dodaje ani nie zmienia wersji
+    fetch_nba_players.catch_up_stats()
+    assert versions.current_versions((versions.STATS,))[versions.STATS] == stats_version + 1
+
+
+def test_catch_up_on_an_empty_database_is_limited_to_the_last_days(fetched_ranges, monkeypatch):
+    monkeypatch.setattr(fetch_nba_players, "CATCH_UP_MAX_DAYS", 3)
+    fetch_nba_players.catch_up_stats()
+    assert fetched_ranges == [("2025-01-02", "2025-01-04")]
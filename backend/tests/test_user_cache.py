@@ -0,0 +1,39 @@
+"""
+Cache użytkowników w auth.get_current_user: trafienie nie czyta wiersza użytkownika, a zmiana
+z innego procesu (podbicie wersji bez invalidate w tym procesie) wymusza ponowny odczyt.
+"""
+from sqlalchemy import delete, update
+
+import models
+import versions
+
+
+def nickname(client, headers):
+    return client.get("/users/me", headers=headers).json()["nickname"]
+
+
+def test_cached_user_is_used_until_its_versions_change(client, make_user):
+    user_id, headers = make_user("me@example.com")
+    assert nickname(client, headers) is None
+
+    # Zmiana bez podbicia wersji (nie robi tego żaden endpoint) - odpowiedź z kopii w cache
+    with models.SessionLocal() as db:
+        db.execute(update(models.User).where(models.User.id == user_id).values(nickname="stale"))
+        db.commit()
+    assert nickname(client, headers) is None
+
+    with models.SessionLocal() as db:
+        versions.bump(db, versions.user_scope(user_id))
+        db.commit()
+    assert nickname(client, headers) == "stale"
+
+
+def test_user_deleted_by_another_process_is_rejected(client, make_user):
+    user_id, headers = make_user("gone@example.com")
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    with models.SessionLocal() as db:
+        db.execute(delete(models.User).where(models.User.id == user_id))
+        versions.bump(db, versions.USERS)
+        db.commit()
+    assert client.get("/users/me", headers=headers).status_code == 401
@@ -0,0 +1,55 @@
+"""
+Cache liczników wersji danych: trafienie nie pyta bazy, bump unieważnia liczniki po commicie
+(nie po rollbacku), a wpisy wygasają po TTL.
+"""
+import pytest
+from sqlalchemy import event
+
+import versions
+from models import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def queries():
+    Base.metadata.create_all(engine)
+    versions.version_cache.clear()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "data_versions" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+    versions.version_cache.clear()
+
+
+def test_cached_versions_do_not_query_the_database(queries):
+    first = versions.current_versions((versions.STATS, versions.USERS))
+    assert versions.current_versions((versions.USERS, versions.STATS)) == first
+    assert len(queries) == 1
+
+
+def test_bump_invalidates_cached_versions_after_commit(queries):
+    before = versions.current_versions((versions.STATS,))[versions.STATS]
+    with SessionLocal() as db:
+        versions.bump(db, versions.STATS)
+        # Przed commitem inne żądania widzą jeszcze stary licznik
+        assert versions.current_versions((versions.STATS,))[versions.STATS] == before
+        db.commit()
+    assert versions.current_versions((versions.STATS,))[versions.STATS] == before + 1
+
+    with SessionLocal() as db:
+        versions.bump(db, versions.STATS)
+        db.rollback()
+    count = len(queries)
+    assert versions.current_versions((versions.STATS,))[versions.STATS] == before + 1
+    assert len(queries) == count
+
+
+def test_cached_versions_expire(queries, monkeypatch):
+    monkeypatch.setattr(versions.version_cache, "ttl_seconds", 0.0)
+    versions.current_versions((versions.STATS,))
+    versions.current_versions((versions.STATS,))
+    assert len(queries) == 2
@@ -0,0 +1,192 @@
+"""
+Liczniki wersji danych (tabela data_versions) dla ETagów i warunkowych GET.
+
+Każda zmiana danych widocznych w API podbija w tej samej transakcji licznik swojego zakresu:
+- STATS - statystyki i zawodnicy (ingest, synchronizacja, przeliczenie punktów),
+- USERS - dane widoczne dla innych użytkowników (rankingi, składy, ligi, profile),
+- user_scope(id) - dane jednego użytkownika (jego drużyna i ligi).
+
+Liczniki są czytane przy każdym żądaniu (ETag, cache użytkowników, cache odpowiedzi), więc proces
+trzyma je w pamięci przez DATA_VERSIONS_CACHE_SECONDS: sprawdzenie If-None-Match czy trafienie
+w cache nie pyta wtedy bazy. Zmiany z tego samego procesu są widoczne od razu (bump unieważnia
+liczniki po commicie), zmiany z innych procesów - najpóźniej po DATA_VERSIONS_CACHE_SECONDS.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+import async_db
+import bulk
+from models import DataVersion, engine
+
+STATS = "stats"
+USERS = "users"
+
+# Zakresy, od których zależą odpowiedzi endpointów GET; CURRENT_USER to zakres zalogowanego użytkownika
+CURRENT_USER = "user"
+ENDPOINT_SCOPES = {
+    "/players": (STATS,),
+    "/players/catalogue": (STATS,),
+    "/me/team": (STATS, CURRENT_USER),
+    "/leaderboard": (STATS, USERS),
+    "/leaderboard/ranking": (STATS, USERS),
+    "/leagues": (STATS, USERS, CURRENT_USER),
+    "/users/me/daily_fantasy_points": (STATS, CURRENT_USER),
+}
+
+
+# 0 wyłącza cache liczników (każdy odczyt pyta bazę)
+DATA_VERSIONS_CACHE_SECONDS = float(os.getenv("DATA_VERSIONS_CACHE_SECONDS", "1"))
+DATA_VERSIONS_CACHE_MAX_ENTRIES = int(os.getenv("DATA_VERSIONS_CACHE_MAX_ENTRIES", "100000"))
+
+# Klucz w Session.info: zakresy podbite w bieżącej transakcji sesji
+BUMPED_SCOPES_KEY = "bumped_data_versions"
+
+
+class VersionCache:
+    """
+    Wątkowo bezpieczna kopia liczników z TTL. Licznik generacji chroni przed zapisaniem wartości
+    odczytanej z bazy przed unieważnieniem, które nastąpiło w trakcie odczytu.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, scopes) -> Optional[Dict[str, int]]:
+        """Liczniki wszystkich zakresów albo None, gdy któregoś brakuje lub jest przeterminowany."""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for scope in scopes:
+                entry = self._entries.get(scope)
+                if entry is None or entry[0] < now:
+                    return None
+                found[scope] = entry[1]
+        return found
+
+    def put(self, versions: Dict[str, int], generation: int):
+        if self.ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if generation != self.generation:
+                return
+            if len(self._entries) + len(versions) > self.max_entries:
+                self._entries = {scope: entry for scope, entry in self._entries.items() if entry[0] >= now}
+                if len(self._entries) + len(versions) > self.max_entries:
+                    self._entries.clear()
+            expires_at = now + self.ttl_seconds
+            self._entries.update((scope, (expires_at, version)) for scope, version in versions.items())
+
+    def invalidate(self, scopes):
+        with self._lock:
+            self.generation += 1
+            for scope in scopes:
+                self._entries.pop(scope, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+version_cache = VersionCache(DATA_VERSIONS_CACHE_SECONDS, DATA_VERSIONS_CACHE_MAX_ENTRIES)
+
+
+def user_scope(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def bump(db: Session, *scopes: str):
+    """Podbija liczniki podanych zakresów w bieżącej transakcji (INSERT ... ON CONFLICT DO UPDATE)."""
+    if not scopes:
+        return
+    stmt = bulk.dialect_insert(db, DataVersion).values([{"scope": scope, "version": 1} for scope in set(scopes)])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DataVersion.scope],
+        set_={"version": DataVersion.version + 1},
+    ))
+    db.info.setdefault(BUMPED_SCOPES_KEY, set()).update(scopes)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_bumped_scopes(session):
+    scopes = session.info.pop(BUMPED_SCOPES_KEY, None)
+    if scopes:
+        version_cache.invalidate(scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bumped_scopes(session):
+    session.info.pop(BUMPED_SCOPES_KEY, None)
+
+
+def _versions_query(scopes):
+    return select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.in_(scopes))
+
+
+def _remember(scopes, rows, generation: int) -> Dict[str, int]:
+    versions = dict.fromkeys(scopes, 0)
+    versions.update(rows)
+    version_cache.put(versions, generation)
+    return versions
+
+
+def current_versions(scopes: Iterable[str]) -> Dict[str, int]:
+    """Odczytuje liczniki zakresów (0 dla zakresów, które jeszcze nie były zmieniane) - z version_cache lub z bazy."""
+    scopes = list(scopes)
+    versions = version_cache.get(scopes)
+    if versions is not None:
+        return versions
+    generation = version_cache.generation
+    with engine.connect() as connection:
+        rows = connection.execute(_versions_query(scopes)).all()
+    return _remember(scopes, rows, generation)
+
+
+async def current_versions_async(scopes: Iterable[str]) -> Dict[str, int]:
+    """
+    Odpowiednik current_versions dla pętli zdarzeń: trafienie w version_cache nie opuszcza pętli,
+    chybienie czyta liczniki silnikiem asynchronicznym (ASYNC_DB=true) albo, bez niego, w puli wątków.
+    """
+    scopes = list(scopes)
+    versions = version_cache.get(scopes)
+    if versions is not None:
+        return versions
+    if not async_db.ASYNC_DB:
+        return await run_in_threadpool(current_versions, scopes)
+    generation = version_cache.generation
+    async with async_db.get_async_engine().connect() as connection:
+        rows = (await connection.execute(_versions_query(scopes))).all()
+    return _remember(scopes, rows, generation)
+
+
+def etag_scopes(scopes: Iterable[str], user_id: int):
+    """Zakresy ETagu z CURRENT_USER zamienionym na zakres zalogowanego użytkownika."""
+    return [user_scope(user_id) if scope == CURRENT_USER else scope for scope in scopes]
+
+
+def format_etag(path: str, query: str, user_id: int, scopes, versions: Dict[str, int]) -> str:
+    """ETag odpowiedzi: skrót ścieżki, parametrów, użytkownika i wersji danych, od których zależy."""
+    raw = "|".join([path, query, str(user_id)] + [f"{scope}={versions[scope]}" for scope in scopes])
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def compute_etag(path: str, query: str, user_id: int, scopes: Iterable[str]) -> str:
+    scopes = etag_scopes(scopes, user_id)
+    return format_etag(path, query, user_id, scopes, current_versions(scopes))
+
+
+async def compute_etag_async(path: str, query: str, user_id: int, scopes: Iterable[str]) -> str:
+    scopes = etag_scopes(scopes, user_id)
+    return format_etag(path, query, user_id, scopes, await current_versions_async(scopes))
@@ -0,0 +1,116 @@
+"""
+Samodzielny proces harmonogramu (ingest statystyk i zadania administracyjne z tabeli jobs),
+uruchamiany poza procesami API:
+
+    python worker.py
+
+Można uruchomić kilka instancji - zadania wykonuje tylko proces trzymający blokadę lidera.
+"""
+import os
+import signal
+import sys
+import threading
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+
+import jobs
+from leader_lock import LeaderLock
+from models import create_tables
+from scripts.fetch_nba_players import catch_up_stats
+
+STATS_UPDATE_HOUR = int(os.getenv("STATS_UPDATE_HOUR", "9"))
+STATS_UPDATE_MINUTE = int(os.getenv("STATS_UPDATE_MINUTE", "0"))
+LEADER_LOCK_TTL_SECONDS = int(os.getenv("LEADER_LOCK_TTL_SECONDS", "120"))
+JOBS_POLL_SECONDS = int(os.getenv("JOBS_POLL_SECONDS", "5"))
+
+leader_lock = LeaderLock("stats-scheduler", ttl_seconds=LEADER_LOCK_TTL_SECONDS)
+
+# Ingest i zadania z kolejki nie mogą biec równolegle (osobne wątki schedulera)
+_work_lock = threading.Lock()
+_leadership_lock = threading.Lock()
+_is_leader = False
+
+
+def acquire_leadership() -> bool:
+    """
+    Przejmuje lub odnawia blokadę lidera. Proces, który właśnie został liderem, oznacza jako
+    'failed' zadania 'running' - wykonywał je poprzedni lider, który przestał działać.
+    """
+    global _is_leader
+    with _leadership_lock:
+        leader = leader_lock.acquire()
+        if leader and not _is_leader:
+            orphaned = jobs.fail_orphaned()
+            if orphaned:
+                print(f"Scheduler: Marked {orphaned} interrupted job(s) as failed.")
+        _is_leader = leader
+        return leader
+
+
+def renew_leadership():
+    """Heartbeat: odnawia (lub przejmuje) blokadę lidera."""
+    try:
+        acquire_leadership()
+    except Exception as e:
+        print(f"Scheduler: Could not renew leader lock: {e}")
+
+
+def run_stats_update():
+    """
+    A wrapper function for the scheduled job to ensure logging and error handling.
+    Runs only in the process that holds the leader lock.
+    """
+    if not acquire_leadership():
+        print("Scheduler: Not the leader, skipping stats update job.")
+        return
+    print("Scheduler: Triggered stats update job...")
+    try:
+        with _work_lock:
+            # Nadrabia też dni pominięte np. przez deploy lub awarię API
+            catch_up_stats()
+        print("Scheduler: Stats update job finished successfully.")
+    except Exception as e:
+        print(f"Scheduler: An error occurred during the stats update job: {e}")
+
+
+def run_queued_jobs():
+    """Wykonuje zadania zlecone przez API (synchronizacja zawodników, przeliczenie punktów) - tylko lider."""
+    try:
+        if not acquire_leadership():
+            return
+        with _work_lock:
+            count = jobs.run_queued()
+        if count:
+            print(f"Scheduler: Finished {count} queued job(s).")
+    except Exception as e:
+        print(f"Scheduler: An error occurred while running queued jobs: {e}")
+
+
+def configure_scheduler(scheduler):
+    """Rejestruje zadania (heartbeat blokady, dzienny ingest i kolejkę jobs) w podanym schedulerze APScheduler."""
+    scheduler.add_job(renew_leadership, 'interval', seconds=max(LEADER_LOCK_TTL_SECONDS // 3, 1))
+    scheduler.add_job(run_stats_update, 'cron', hour=STATS_UPDATE_HOUR, minute=STATS_UPDATE_MINUTE)
+    scheduler.add_job(run_queued_jobs, 'interval', seconds=JOBS_POLL_SECONDS)
+    return scheduler
+
+
+def main():
+    create_tables()
+    scheduler = configure_scheduler(BlockingScheduler())
+
+    def shutdown(signum, frame):
+        print("Scheduler: Shutting down...")
+        scheduler.shutdown(wait=False)
+        leader_lock.release()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    renew_leadership()
+    print(f"Scheduler: Worker started (owner {leader_lock.owner}), stats update daily at {STATS_UPDATE_HOUR:02d}:{STATS_UPDATE_MINUTE:02d}.")
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    main()
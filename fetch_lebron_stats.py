@@ -1,12 +1,18 @@
 import sys
 import os
 from nba_api.stats.endpoints import playergamelog
-from sqlalchemy.orm import joinedload
 
 # Add the backend directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'backend')))
 
-from backend.models import Player, PlayerGameStats, SessionLocal
+import standings
+import versions
+from models import Player, PlayerGameStats, SessionLocal, create_tables
+from scripts.nba_cache import fetch_endpoint
+from scoring import add_new_game_points, build_game_records, load_scoring_rules
+
+# Game logs change at most once per game night
+GAME_LOG_CACHE_TTL = 3600
 
 def fetch_and_store_lebron_stats():
     """
@@ -17,8 +23,8 @@ def fetch_and_store_lebron_stats():
     lebron_id = 2544  # Correct Player ID for LeBron James
 
     try:
-        # Find LeBron James in the database and eager load his game stats
-        lebron = db.query(Player).options(joinedload(Player.game_stats)).filter(Player.id == lebron_id).first()
+        # Find LeBron James in the database (his game history is not loaded)
+        lebron = db.query(Player).filter(Player.id == lebron_id).first()
 
         if not lebron:
             print(f"Player with ID {lebron_id} (LeBron James) not found in the database.")
@@ -33,14 +39,19 @@ def fetch_and_store_lebron_stats():
         print(f"Fetching latest stats for {lebron.full_name}...")
 
         # Fetch the game log for the 2025-26 season
-        log_df = playergamelog.PlayerGameLog(player_id=lebron_id, season="2025-26").get_data_frames()[0]
+        log_df = fetch_endpoint(
+            playergamelog.PlayerGameLog, GAME_LOG_CACHE_TTL, player_id=lebron_id, season="2025-26"
+        ).get_data_frames()[0]
 
         if not log_df.empty:
             latest_game = log_df.iloc[0]
             game_id = latest_game["Game_ID"]
 
             # Check if this game's stats are already in the database
-            existing_game = next((g for g in lebron.game_stats if g.game_id == game_id), None)
+            existing_game = db.query(PlayerGameStats.id).filter(
+                PlayerGameStats.player_id == lebron.id,
+                PlayerGameStats.game_id == game_id
+            ).first()
             
             if existing_game:
                 print(f"Stats for game {game_id} already exist. No update needed.")
@@ -49,29 +60,34 @@ def fetch_and_store_lebron_stats():
 
             # --- It's a new game, process it ---
             print(f"New game found (ID: {game_id}). Adding to history...")
-            points = int(latest_game["PTS"])
-            rebounds = int(latest_game["REB"])
-            assists = int(latest_game["AST"])
-            fantasy_points = float(points + 1.2 * rebounds + 1.5 * assists)
+            # Full box score, scored with the current scoring rules
+            game_record = build_game_records(
+                [dict(latest_game, PLAYER_ID=lebron.id, GAME_ID=game_id)], load_scoring_rules(db)
+            )[0]
+            fantasy_points = game_record["fantasy_points"]
 
             # Create a new record for the individual game
-            new_game_stat = PlayerGameStats(
-                player_id=lebron.id,
-                game_id=game_id,
-                game_date=latest_game["GAME_DATE"],
-                points=points,
-                rebounds=rebounds,
-                assists=assists,
-                fantasy_points=fantasy_points
-            )
+            new_game_stat = PlayerGameStats(**game_record)
             db.add(new_game_stat)
-            lebron.game_stats.append(new_game_stat) # Append for immediate calculation
 
-            # Recalculate the average
-            total_fp = sum(stat.fantasy_points for stat in lebron.game_stats)
-            game_count = len(lebron.game_stats)
-            lebron.average_fantasy_points = total_fp / game_count if game_count > 0 else 0.0
-            
+            # Keep the denormalised last game columns current
+            if lebron.last_game_date is None or new_game_stat.game_date >= lebron.last_game_date:
+                lebron.last_game_date = new_game_stat.game_date
+                lebron.last_game_fantasy_points = fantasy_points
+
+            # Update the running aggregates and the average in O(1)
+            lebron.games_played += 1
+            lebron.fantasy_points_sum += fantasy_points
+            game_count = lebron.games_played
+            lebron.average_fantasy_points = lebron.fantasy_points_sum / game_count
+
+            # Credit users who have him on their roster, like the regular ingest does
+            db.flush()
+            changed_user_ids = add_new_game_points(db, [new_game_stat])
+            db.flush()
+            standings.refresh_standings_for_users(db, changed_user_ids)
+            # New data for /players, /leaderboard etc. - invalidates client ETags and cached responses
+            versions.bump(db, versions.STATS)
             db.commit()
 
             print("\nSuccessfully updated stats:")
@@ -87,4 +103,6 @@ def fetch_and_store_lebron_stats():
         db.close()
 
 if __name__ == "__main__":
+    # Applies pending migrations (e.g. the last game columns) on an existing database
+    create_tables()
     fetch_and_store_lebron_stats()
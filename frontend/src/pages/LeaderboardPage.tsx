@@ -1,12 +1,12 @@
 import React, { useEffect, useState } from "react";
 import { useAuth } from "../AuthContext";
-import { getLeaderboard } from "../services/api";
-import { User } from "../types";
+import { getLeaderboardRanking } from "../services/api";
+import { LeaderboardEntry } from "../types";
 import { Box, Typography, CircularProgress, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Paper } from '@mui/material'; // Import Material-UI components
 
 const LeaderboardPage = () => {
   const { token } = useAuth();
-  const [leaderboard, setLeaderboard] = useState<User[]>([]);
+  const [leaderboard, setLeaderboard] = useState<LeaderboardEntry[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -19,8 +19,8 @@ const LeaderboardPage = () => {
       }
       try {
         setLoading(true);
-        const data = await getLeaderboard(token);
-        setLeaderboard(data);
+        const data = await getLeaderboardRanking(token, { limit: 100 });
+        setLeaderboard(data.entries);
       } catch (err) {
         setError("Failed to fetch leaderboard data.");
         console.error("Failed to fetch leaderboard data:", err);
@@ -72,13 +72,13 @@ const LeaderboardPage = () => {
                       </TableRow>
                     </TableHead>
                     <TableBody>
-                      {leaderboard.map((user, index) => (
-                        <TableRow key={user.id}>
+                      {leaderboard.map((entry) => (
+                        <TableRow key={entry.user_id}>
                           <TableCell component="th" scope="row" sx={{ color: 'text.secondary' }}>
-                            {index + 1}
+                            {entry.rank}
                           </TableCell>
-                          <TableCell sx={{ color: 'text.primary' }}>{user.nickname || user.email}</TableCell>
-                          <TableCell align="right" sx={{ color: 'text.primary' }}>{user.total_fantasy_points.toFixed(2)}</TableCell>
+                          <TableCell sx={{ color: 'text.primary' }}>{entry.nickname || `User #${entry.user_id}`}</TableCell>
+                          <TableCell align="right" sx={{ color: 'text.primary' }}>{entry.total_fantasy_points.toFixed(2)}</TableCell>
                         </TableRow>
                       ))}
                     </TableBody>
@@ -18,6 +18,23 @@ export const getLeaderboard = async (token: string) => {
     return response.data;
 };
 
+export interface LeaderboardParams {
+    offset?: number;
+    limit?: number;
+    league_id?: number;
+    around_me?: number;
+}
+
+export const getLeaderboardRanking = async (token: string, params: LeaderboardParams = {}) => {
+    const response = await api.get('/leaderboard/ranking', {
+        params,
+        headers: {
+            Authorization: `Bearer ${token}`,
+        },
+    });
+    return response.data;
+};
+
 export const registerUser = async (email: string, password: string, nickname?: string) => {
     const response = await api.post('/register', { email, password, nickname });
     return response.data;
@@ -55,8 +72,9 @@ export const updateUserProfile = async (token: string, userUpdate: { nickname?:
     return response.data;
 };
 
-export const getDailyFantasyPoints = async (token: string) => {
+export const getDailyFantasyPoints = async (token: string, date?: string) => {
     const response = await api.get('/users/me/daily_fantasy_points', {
+        params: date ? { date } : undefined,
         headers: {
             Authorization: `Bearer ${token}`,
         },
@@ -73,6 +91,25 @@ export const getPlayers = async (token: string) => {
     return response.data;
 };
 
+export interface PlayersPageParams {
+    limit?: number;
+    cursor?: string;
+    position?: string;
+    team?: string;
+    name?: string;
+    sort_by?: 'average' | 'last_game' | 'name';
+}
+
+export const getPlayersPage = async (token: string, params: PlayersPageParams = {}) => {
+    const response = await api.get('/players/catalogue', {
+        params,
+        headers: {
+            Authorization: `Bearer ${token}`,
+        },
+    });
+    return response.data;
+};
+
 export const getMyTeam = async (token: string) => {
     const response = await api.get('/me/team', {
         headers: {
@@ -130,6 +167,16 @@ export const getLeagueDetails = async (token: string, leagueId: number) => {
     return response.data;
 };
 
+export const getLeagueStandings = async (token: string, leagueId: number, params: { offset?: number; limit?: number } = {}) => {
+    const response = await api.get(`/leagues/${leagueId}/standings`, {
+        params,
+        headers: {
+            Authorization: `Bearer ${token}`,
+        },
+    });
+    return response.data;
+};
+
 export const joinLeague = async (token: string, inviteCode: string) => {
     const response = await api.post(`/leagues/join/${inviteCode}`, {}, { // Empty body for POST request
         headers: {
@@ -188,3 +235,12 @@ export const adminSyncPlayersData = async (token: string) => {
     return response.data;
 };
 
+
+export const adminGetJob = async (token: string, jobId: string) => {
+    const response = await api.get(`/admin/jobs/${jobId}`, {
+        headers: {
+            Authorization: `Bearer ${token}`,
+        },
+    });
+    return response.data;
+};
@@ -23,3 +23,20 @@ export interface Player {
   average_fantasy_points: number;
   last_game_fantasy_points: number | null;
 }
+
+export interface PlayerPage {
+  items: Player[];
+  next_cursor: string | null;
+}
+
+export interface LeaderboardEntry {
+  rank: number;
+  user_id: number;
+  nickname: string | null;
+  total_fantasy_points: number;
+}
+
+export interface Leaderboard {
+  total: number;
+  entries: LeaderboardEntry[];
+}